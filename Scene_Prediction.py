@@ -4,11 +4,21 @@ import numpy as np
 import time
 import json
 import os
+import sys
 from collections import deque
 from ultralytics import YOLO
 import threading
-from flask import Flask, jsonify
-from flask_cors import CORS
+from live_stream import MjpegBroadcaster
+from api_server import create_api_app, serve_api
+from item_registry import ItemRegistry
+from zone_map import ZoneMap
+from presence_timeline import PresenceTimeline
+from frame_governor import FrameGovernor, DEFAULT_LEVELS
+from camera_probe import CameraProbe
+from event_log import EventLog
+from snapshot_cache import SnapshotCache
+from live_config import LiveConfig, float_map, finite_float, unit_float, positive_int, positive_float
+from frame_pyramid import FramePyramid, to_frame
 
 # Thread-safe state for API
 state_lock = threading.Lock()
@@ -25,10 +35,42 @@ except Exception:
 
 # -------- Config --------
 SPEC_EVERY_N = 3  # run spectacles model every N frames
-LAST_SEEN_JSON_PATH = 'last_spec_seen.json'
+LAST_SEEN_JSON_PATH = 'last_spec_seen.json'  # legacy spectacles record, imported into ITEMS_JSON_PATH on load
 PRESENCE_PUSH_INTERVAL = 15  # seconds between periodic location updates
 PRESENCE_JSON_PATH = 'presence.json'
+ITEMS_JSON_PATH = 'last_seen_items.json'  # last-seen records for every tracked item
+ZONES_JSON_PATH = 'zones.json'            # named zones for this camera (editable via /api/zones)
+TIMELINE_PATH = 'presence_timeline.jsonl' # merged presence intervals (location, start, end, max score)
+LIVE_CONFIG_PATH = 'live_config.json'     # tuning overrides applied while running (file edit, SIGHUP or PUT /api/config)
+SNAPSHOT_DIR = 'snapshots'               # cropped JPEG per accepted sighting (served at /api/items/<item>/snapshot.jpg)
+SNAPSHOT_MAX_BYTES = 20 * 1024 * 1024     # oldest thumbnails are deleted beyond this
+SNAPSHOT_WIDTH = 320
+CAMERA_PROFILE_PATH = 'camera_profile.json'  # cached best camera config (delete or set CAMERA_REPROBE to re-probe)
+CAMERA_REPROBE = False
+CAMERA_BUFFER_SIZE = 1  # driver frames queued; 1 = always read the newest frame
 API_HOST, API_PORT = '0.0.0.0', 5000
+API_SERVER_MODE = 'production'  # 'production' (waitress, bounded workers) or 'dev' (Flask dev server)
+API_THREADS = 4                 # worker threads in production mode
+API_GZIP = True                 # gzip JSON responses for clients that accept it
+API_CACHE_TTL = 1.0             # seconds /api/summary, /api/presence, /api/last_seen are cached
+API_WRITE_TOKEN = os.environ.get("API_WRITE_TOKEN")  # Bearer token for PUT endpoints; unset = localhost only
+
+# Adaptive governor: share of the capture frame period inference may use, CPU temperature band (deg C)
+GOVERNOR_ENABLED = True
+GOV_FRAME_BUDGET = 0.8
+GOV_TEMP_HIGH, GOV_TEMP_LOW = 75.0, 65.0
+
+# Logging: recent records served at /api/logs; each message limited to LOG_RATE_BURST lines per window
+LOG_RING_SIZE = 500
+LOG_RATE_WINDOW = 10.0  # seconds
+LOG_RATE_BURST = 5
+
+# Live view stream (encoded once, shared by all dashboard viewers)
+STREAM_FPS = 5          # encoded frames per second sent to viewers
+STREAM_WIDTH = 320      # downscaled width of the streamed frame
+STREAM_JPEG_QUALITY = 70
+STREAM_MAX_CLIENTS = 2  # each viewer holds an API worker thread
+STREAM_IDLE_TIMEOUT = 10.0  # seconds without a new frame before a viewer's stream is closed
 
 # Firebase config (set FIREBASE_ENABLED=True and provide a service account JSON to enable)
 FIREBASE_ENABLED = True
@@ -81,7 +123,7 @@ THRESHOLDS = {
     'Kettle': 0.50,
 }
 SPEC_THRESHOLD = 0.60  # spectacles confidence to accept
-SPECTACLE_LABELS = {'Spectacle'}
+# Labels/thresholds for the other tracked items live in item_registry.DEFAULT_TRACKED_ITEMS
 
 # Toggle drawing spec box (remain off)
 DRAW_SPEC_BOX = False
@@ -92,14 +134,39 @@ STABLE_REQUIRED = 3
 recent_decisions = deque(maxlen=STABLE_WINDOW)
 last_reason = "awaiting sufficient evidence"
 
-# Track last time/place spectacles were seen
-last_spec_seen = {
-    'place': None,       # "Kitchen" or "EE Department Level 3"
-    'time': None,        # epoch seconds
-    'conf': None,        # float
-    'bbox': None,        # (x1,y1,x2,y2)
-    'label': None        # label from model
-}
+# Non-blocking log sink (the display loop only enqueues)
+event_log = EventLog(capacity=LOG_RING_SIZE, window=LOG_RATE_WINDOW, burst=LOG_RATE_BURST).start()
+
+# Track last time/place of every item (spectacles, keys, wallet, phone, medication);
+# a last_spec_seen.json from older versions is imported on load
+item_registry = ItemRegistry(path=ITEMS_JSON_PATH, thresholds={'spectacles': SPEC_THRESHOLD}, lock=state_lock,
+                             legacy_paths={'spectacles': LAST_SEEN_JSON_PATH}, log=event_log.log)
+
+# Spectacles record: 'place', 'zone', 'time' (epoch), 'conf', 'bbox' (x1,y1,x2,y2), 'label'
+last_spec_seen = item_registry.records['spectacles']
+
+# Named zones ("on the dining table") compiled into a lookup grid
+zone_map = ZoneMap(ZONES_JSON_PATH, log=event_log.log)
+
+# Presence history; a sample up to 3 pushes late still extends the current interval
+presence_timeline = PresenceTimeline(TIMELINE_PATH, max_gap=3 * PRESENCE_PUSH_INTERVAL, log=event_log.log)
+
+# Governor: level 0 is the configured cadence; disabling it pins the loop there
+_gov_levels = (DEFAULT_LEVELS[0]._replace(spec_every_n=SPEC_EVERY_N),) + DEFAULT_LEVELS[1:]
+governor = FrameGovernor(_gov_levels if GOVERNOR_ENABLED else _gov_levels[:1],
+                         frame_budget=GOV_FRAME_BUDGET, temp_high=GOV_TEMP_HIGH, temp_low=GOV_TEMP_LOW,
+                         log=event_log.log)
+
+# Live view broadcaster (encoder idles until a viewer connects)
+live_stream = MjpegBroadcaster(fps=STREAM_FPS, width=STREAM_WIDTH, quality=STREAM_JPEG_QUALITY,
+                               idle_timeout=STREAM_IDLE_TIMEOUT, log=event_log.log)
+
+# Sighting thumbnails: copied out on the camera thread, encoded and written by a worker
+snapshot_cache = SnapshotCache(SNAPSHOT_DIR, max_bytes=SNAPSHOT_MAX_BYTES, width=SNAPSHOT_WIDTH, log=event_log.log)
+
+# Camera capability probe; backends follow the OS (DSHOW/MSMF on Windows, V4L2 on Linux)
+camera_probe = CameraProbe(CAMERA_PROFILE_PATH, preferred_size=(640, 480),
+                           fps=governor.profile.capture_fps, buffer_size=CAMERA_BUFFER_SIZE, log=event_log.log)
 
 # Firebase state
 db = None
@@ -115,74 +182,30 @@ def init_firebase():
     except Exception as e:
         print(f"Firebase init failed: {e}")
 
-def load_last_seen():
-    global last_spec_seen
-    if os.path.exists(LAST_SEEN_JSON_PATH):
-        try:
-            with open(LAST_SEEN_JSON_PATH, 'r') as f:
-                data = json.load(f)
-            # Basic validation
-            last_spec_seen.update({
-                'place': data.get('place'),
-                'time': data.get('time'),
-                'conf': data.get('conf'),
-                'bbox': tuple(data['bbox']) if isinstance(data.get('bbox'), list) else data.get('bbox'),
-                'label': data.get('label')
-            })
-            print("Loaded last_spec_seen from JSON.")
-        except Exception as e:
-            print(f"Failed to load {LAST_SEEN_JSON_PATH}: {e}")
-
-def save_last_seen():
-    # Local JSON
-    try:
-        data = dict(last_spec_seen)
-        if isinstance(data.get('bbox'), tuple):
-            data['bbox'] = list(data['bbox'])
-        # human readable time
-        if data.get('time'):
-            data['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data['time']))
-        with open(LAST_SEEN_JSON_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"Failed to save {LAST_SEEN_JSON_PATH}: {e}")
-    # Firestore write removed for last_seen (optional) to keep it local-only
-    # try:
-    #     if db is not None:
-    #         payload = dict(last_spec_seen)
-    #         if isinstance(payload.get('bbox'), tuple):
-    #             payload['bbox'] = list(payload['bbox'])
-    #         # Also include ISO time for easy reading
-    #         if payload.get('time'):
-    #             payload['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(payload['time']))
-    #         db.collection(FIREBASE_COLLECTION).document(FIREBASE_DOC).set(payload)
-    # except Exception as e:
-    #     print(f"Failed to write to Firebase: {e}")
-
-def evaluate_frame(object_dict):
+def evaluate_frame(object_dict, thresholds=THRESHOLDS, weights=WEIGHTS):
     objs = {lbl: conf for lbl, conf in object_dict.items() if lbl in KITCHEN_OBJECTS}
 
-    if 'Stove' in objs and objs['Stove'] >= THRESHOLDS['Stove']:
-        return True, f"Stove conf={objs['Stove']:.2f}", WEIGHTS['Stove']
-    if ('Fridge' in objs and objs['Fridge'] >= THRESHOLDS['Fridge'] and
-        any(o in objs and objs[o] >= THRESHOLDS[o] for o in ['Basin', 'Pot', 'Kettle'])):
-        return True, f"Fridge+support conf={objs['Fridge']:.2f}", WEIGHTS['Fridge']
+    if 'Stove' in objs and objs['Stove'] >= thresholds['Stove']:
+        return True, f"Stove conf={objs['Stove']:.2f}", weights['Stove']
+    if ('Fridge' in objs and objs['Fridge'] >= thresholds['Fridge'] and
+        any(o in objs and objs[o] >= thresholds[o] for o in ['Basin', 'Pot', 'Kettle'])):
+        return True, f"Fridge+support conf={objs['Fridge']:.2f}", weights['Fridge']
     if ('Basin' in objs and 'Pot' in objs and
-        objs['Basin'] >= THRESHOLDS['Basin'] and objs['Pot'] >= THRESHOLDS['Pot']):
-        return True, "Basin+Pot combo", WEIGHTS['Basin'] + WEIGHTS['Pot']
+        objs['Basin'] >= thresholds['Basin'] and objs['Pot'] >= thresholds['Pot']):
+        return True, "Basin+Pot combo", weights['Basin'] + weights['Pot']
 
-    distinct_valid = [o for o, c in objs.items() if c >= THRESHOLDS[o]]
+    distinct_valid = [o for o, c in objs.items() if c >= thresholds[o]]
     if len(distinct_valid) >= 3:
-        return True, f"3+ objects: {distinct_valid}", sum(WEIGHTS[o] for o in distinct_valid)
+        return True, f"3+ objects: {distinct_valid}", sum(weights[o] for o in distinct_valid)
 
     score = 0.0
     for o, conf in objs.items():
-        if conf >= THRESHOLDS[o]:
-            score += WEIGHTS[o]
+        if conf >= thresholds[o]:
+            score += weights[o]
 
-    if all(x in objs and objs[x] >= THRESHOLDS[x] for x in ['Basin', 'Pot']):
+    if all(x in objs and objs[x] >= thresholds[x] for x in ['Basin', 'Pot']):
         score += 1.0
-    if 'Stove' in objs and objs['Stove'] >= THRESHOLDS['Stove'] and 'Kettle' in objs and objs['Kettle'] >= THRESHOLDS['Kettle']:
+    if 'Stove' in objs and objs['Stove'] >= thresholds['Stove'] and 'Kettle' in objs and objs['Kettle'] >= thresholds['Kettle']:
         score += 0.5
 
     if score >= 3.0:
@@ -190,12 +213,35 @@ def evaluate_frame(object_dict):
 
     return False, "insufficient combination", score
 
-def stable_kitchen(decision):
+def stable_kitchen(decision, required=STABLE_REQUIRED):
     recent_decisions.append(decision)
-    return recent_decisions.count(True) >= STABLE_REQUIRED
-
-def detect_objects(frame):
-    result = model(frame, verbose=False)[0]
+    return recent_decisions.count(True) >= required
+
+def check_stable_window(cfg):
+    if cfg['STABLE_REQUIRED'] > cfg['STABLE_WINDOW']:
+        raise ValueError("STABLE_REQUIRED cannot exceed STABLE_WINDOW")
+
+def apply_live_config(cfg):
+    """Re-apply side effects of new tuning values; runs on the camera loop between frames."""
+    global recent_decisions
+    if recent_decisions.maxlen != cfg['STABLE_WINDOW']:
+        recent_decisions = deque(recent_decisions, maxlen=cfg['STABLE_WINDOW'])
+    item_registry.set_threshold('spectacles', cfg['SPEC_THRESHOLD'])
+    governor.levels = (governor.levels[0]._replace(spec_every_n=cfg['SPEC_EVERY_N']),) + governor.levels[1:]
+    presence_timeline.max_gap = 3 * cfg['PRESENCE_PUSH_INTERVAL']
+
+# Hot-reloadable tuning values; the constants above are the defaults
+live_config = LiveConfig(LIVE_CONFIG_PATH, defaults={
+    'THRESHOLDS': THRESHOLDS, 'WEIGHTS': WEIGHTS, 'SPEC_THRESHOLD': SPEC_THRESHOLD, 'SPEC_EVERY_N': SPEC_EVERY_N,
+    'PRESENCE_PUSH_INTERVAL': PRESENCE_PUSH_INTERVAL, 'STABLE_WINDOW': STABLE_WINDOW, 'STABLE_REQUIRED': STABLE_REQUIRED,
+}, schema={
+    'THRESHOLDS': float_map(KITCHEN_OBJECTS, unit_float), 'WEIGHTS': float_map(KITCHEN_OBJECTS, finite_float),
+    'SPEC_THRESHOLD': unit_float, 'SPEC_EVERY_N': positive_int, 'PRESENCE_PUSH_INTERVAL': positive_float,
+    'STABLE_WINDOW': positive_int, 'STABLE_REQUIRED': positive_int,
+}, check=check_stable_window, log=event_log.log)
+
+def detect_objects(frame, imgsz=640):
+    result = model(frame, imgsz=imgsz, verbose=False)[0]
     best = {}
     names = result.names
     for box in result.boxes:
@@ -206,8 +252,8 @@ def detect_objects(frame):
             best[label] = conf
     return result.boxes, best, names
 
-def detect_spectacles(frame):
-    result = spec_model(frame, verbose=False)[0]
+def detect_spectacles(frame, imgsz=640):
+    result = spec_model(frame, imgsz=imgsz, verbose=False)[0]
     return result.boxes, result.names
 
 def push_presence_update(location, reason, is_kitchen, score=None):
@@ -224,87 +270,40 @@ def push_presence_update(location, reason, is_kitchen, score=None):
             'time_iso': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
         }
         with state_lock:
+            prev = last_presence
             last_presence = payload
-        # persist to file so external tools can read if needed
-        with open(PRESENCE_JSON_PATH, 'w') as f:
-            json.dump(payload, f, indent=2)
+        presence_timeline.record(location, ts, score)
+        # persist to file so external tools can read if needed (only when the location changes)
+        if prev is None or prev['location'] != location or prev['is_kitchen'] != payload['is_kitchen']:
+            with open(PRESENCE_JSON_PATH, 'w') as f:
+                json.dump(payload, f, indent=2)
     except Exception as e:
-        print(f"Presence update failed: {e}")
+        event_log.error('PRESENCE', "update failed: %s", e)
 
 def start_api_server():
-    """Start a small Flask server in a background thread."""
+    """Start the REST API (api_server.py) in a background thread."""
     global api_app
-    api_app = Flask(__name__)
-    CORS(api_app, resources={r"/api/*": {"origins": "*"}})
-
-    @api_app.get("/api/health")
-    def health():
-        return jsonify({
-            "ok": True,
-            "api": "online",
-            "last_seen_file": os.path.exists(LAST_SEEN_JSON_PATH),
-            "presence_file": os.path.exists(PRESENCE_JSON_PATH),
-        })
-
-    @api_app.get("/api/last_seen")
-    def api_last_seen():
-        with state_lock:
-            data = dict(last_spec_seen) if last_spec_seen else None
-        # ensure time_iso present
-        if data and data.get('time') and not data.get('time_iso'):
-            data['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data['time']))
-        return jsonify({"ok": data is not None, "last_seen": data})
-
-    @api_app.get("/api/presence")
-    def api_presence():
-        with state_lock:
-            data = dict(last_presence) if last_presence else None
-        return jsonify({"ok": data is not None, "presence": data})
-
-    @api_app.get("/api/summary")
-    def api_summary():
-        with state_lock:
-            ls = dict(last_spec_seen) if last_spec_seen else None
-            pr = dict(last_presence) if last_presence else None
-        if ls and ls.get('time') and not ls.get('time_iso'):
-            ls['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ls['time']))
-        return jsonify({"ok": bool(ls or pr), "last_seen": ls, "presence": pr})
-
-    t = threading.Thread(target=lambda: api_app.run(host=API_HOST, port=API_PORT, debug=False, use_reloader=False, threaded=True),
-                         daemon=True)
+    api_app = create_api_app(sys.modules[__name__], use_gzip=API_GZIP, cache_ttl=API_CACHE_TTL,
+                             stream_max_clients=STREAM_MAX_CLIENTS, write_token=API_WRITE_TOKEN)
+    live_stream.start()
+    t = threading.Thread(target=serve_api, args=(api_app, API_HOST, API_PORT),
+                         kwargs={'mode': API_SERVER_MODE, 'threads': API_THREADS, 'log': event_log.log}, daemon=True)
     t.start()
     print(f"API server listening at http://localhost:{API_PORT}")
 
 # Init persisted state and Firebase
-load_last_seen()
+item_registry.load()
+zone_map.load()
+presence_timeline.load()
+live_config.load()
+live_config.install_signal_handler()
+snapshot_cache.start()
 init_firebase()
 # Add: start API before camera loop
 start_api_server()
 
-# Add a robust camera opener
-def open_camera(preferred_size=(640, 480)):
-    trials = [
-        (0, cv2.CAP_DSHOW),
-        (0, cv2.CAP_MSMF),
-        (0, cv2.CAP_ANY),
-        (1, cv2.CAP_DSHOW),
-        (1, cv2.CAP_MSMF),
-        (1, cv2.CAP_ANY),
-    ]
-    for idx, backend in trials:
-        cap = cv2.VideoCapture(idx, backend)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, preferred_size[0])
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, preferred_size[1])
-        if cap.isOpened():
-            ok, _ = cap.read()
-            if ok:
-                print(f"Using camera index {idx} with backend {backend}")
-                return cap
-        cap.release()
-    return None
-
-# Replace the direct VideoCapture with the robust opener
-cap = open_camera((640, 480))
+# Camera: cached probe result (MJPEG, 1-frame buffer); the full probe only runs on first start
+cap = camera_probe.open(force_probe=CAMERA_REPROBE)
 if cap is None:
     print("Error: Could not access any webcam. Close other apps (Teams/Zoom), enable Windows camera access, or try a different USB port.")
     raise SystemExit(1)
@@ -314,57 +313,82 @@ print("Press 'q' to quit")
 frame_idx = 0
 prev_kitchen_now = None
 last_presence_push = 0.0
+kitchen_now, reason, score = False, last_reason, 0.0
+boxes, names, box_scale = [], {}, 1.0  # kitchen boxes are in detector-view pixels; box_scale maps them back
+pyramid = FramePyramid()  # detector-size views, resized once per frame into reused buffers
+prof = None
+next_frame_at = time.monotonic()
+applied_cfg = None
 
 while True:
+    # Tuning values: one snapshot per frame; a new snapshot is applied here, between frames
+    if frame_idx % 15 == 0:
+        live_config.poll()
+    cfg = live_config.values
+    if cfg is not applied_cfg:
+        apply_live_config(cfg)
+        applied_cfg = cfg
+
+    # Governor-paced capture: lighter profiles read (and infer on) fewer frames
+    if governor.profile != prof:
+        prof = governor.profile
+        cap.set(cv2.CAP_PROP_FPS, prof.capture_fps)
+    delay = next_frame_at - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    next_frame_at = max(next_frame_at + 1.0 / prof.capture_fps, time.monotonic())
+
     ret, frame = cap.read()
     if not ret:
         break
+    pyramid.update(frame)
 
-    # 1) Kitchen anchors every frame
-    boxes, best_conf, names = detect_objects(frame)
-    frame_decision, reason, score = evaluate_frame(best_conf)
-    kitchen_now = stable_kitchen(frame_decision)
+    # 1) Kitchen anchors every kitchen_stride frames (decision carried over in between)
+    if frame_idx % prof.kitchen_stride == 0:
+        t0 = time.perf_counter()
+        view, box_scale = pyramid.view(prof.imgsz)
+        boxes, best_conf, names = detect_objects(view, prof.imgsz)
+        governor.observe(time.perf_counter() - t0, 'kitchen')
+        frame_decision, reason, score = evaluate_frame(best_conf, cfg['THRESHOLDS'], cfg['WEIGHTS'])
+        kitchen_now = stable_kitchen(frame_decision, cfg['STABLE_REQUIRED'])
 
     # Push presence when state changes or periodically
     now = time.time()
-    if (prev_kitchen_now is None) or (kitchen_now != prev_kitchen_now) or (now - last_presence_push >= PRESENCE_PUSH_INTERVAL):
+    if (prev_kitchen_now is None) or (kitchen_now != prev_kitchen_now) or (now - last_presence_push >= cfg['PRESENCE_PUSH_INTERVAL']):
         loc = 'Kitchen' if kitchen_now else 'EE Department Level 3'
         push_presence_update(loc, reason, kitchen_now, score)
         last_presence_push = now
         prev_kitchen_now = kitchen_now
 
-    # 2) Spectacles detection on schedule
-    run_spec_now = (frame_idx % SPEC_EVERY_N == 0)
+    # 2) Tracked items (spectacles, keys, wallet, ...) on schedule, one model pass for all
+    run_spec_now = (frame_idx % prof.spec_every_n == 0)
     best_spec_conf = None
     best_spec_bbox = None
     best_spec_label = None
 
     if run_spec_now:
-        spec_boxes, spec_names = detect_spectacles(frame)
-        only_one_class = len(spec_names) == 1
-
-        for sbox in spec_boxes:
-            cls_id = int(sbox.cls[0])
-            conf = float(sbox.conf[0])
-            label = spec_names[cls_id]
-            if (not only_one_class) and (label not in SPECTACLE_LABELS):
-                continue
-            if best_spec_conf is None or conf > best_spec_conf:
-                best_spec_conf = conf
-                best_spec_bbox = tuple(map(int, sbox.xyxy[0]))
-                best_spec_label = label
-
-        # Update last seen (Kitchen or Unknown) and persist
-        if best_spec_conf is not None and best_spec_conf >= SPEC_THRESHOLD:
-            place = 'Kitchen' if kitchen_now else 'EE Department Level 3'
-            last_spec_seen.update({
-                'place': place,
-                'time': time.time(),
-                'conf': best_spec_conf,
-                'bbox': best_spec_bbox,
-                'label': best_spec_label
-            })
-            save_last_seen()
+        t0 = time.perf_counter()
+        view, scale = pyramid.view(prof.imgsz)  # shared with the kitchen model when both run this frame
+        spec_boxes, spec_names = detect_spectacles(view, prof.imgsz)
+        governor.observe(time.perf_counter() - t0, 'spec')
+        place = 'Kitchen' if kitchen_now else 'EE Department Level 3'
+        detections = ((spec_names[int(sbox.cls[0])], float(sbox.conf[0]), to_frame(sbox.xyxy[0], scale, frame.shape))
+                      for sbox in spec_boxes)
+        updated = item_registry.observe(detections, place, single_class=len(spec_names) == 1,
+                                        zone_map=zone_map, frame_shape=frame.shape)
+
+        # Persist updated records (Kitchen or Unknown)
+        if updated:
+            item_registry.save()
+            for item in updated:
+                rec = item_registry.get(item)
+                snapshot_cache.submit(item, frame, rec['bbox'], rec['time'])
+        if 'spectacles' in updated:
+            best_spec_conf = last_spec_seen['conf']
+            best_spec_bbox = last_spec_seen['bbox']
+            best_spec_label = last_spec_seen['label']
+
+    governor.update()
 
     # Top-left banner when kitchen confirmed
     if kitchen_now:
@@ -390,7 +414,7 @@ while True:
         # Skip drawing boxes for any label in HIDDEN_BOXES
         if label in HIDDEN_BOXES:
             continue
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        x1, y1, x2, y2 = to_frame(box.xyxy[0], box_scale, frame.shape)
         color = BOX_COLORS.get(label, (100, 100, 100))
         cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
         text = f"{label} {conf:.2f}"
@@ -400,7 +424,7 @@ while True:
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
 
     # Optional: draw spectacles box (kept off unless enabled)
-    if DRAW_SPEC_BOX and best_spec_conf is not None and best_spec_conf >= SPEC_THRESHOLD and best_spec_bbox:
+    if DRAW_SPEC_BOX and best_spec_conf is not None and best_spec_conf >= cfg['SPEC_THRESHOLD'] and best_spec_bbox:
         x1, y1, x2, y2 = best_spec_bbox
         cv2.rectangle(frame, (x1, y1), (x2, y2), SPEC_COLOR, 2)
         spec_text = f"{best_spec_label or 'Spec'} {best_spec_conf:.2f}"
@@ -415,6 +439,7 @@ while True:
         lines = [
             "Spectacle last seen",
             f"Location: {last_spec_seen['place'] or 'N/A'}",
+            f"Zone: {last_spec_seen.get('zone') or 'N/A'}",
             f"Time: {ts}"
         ]
         pad = 8
@@ -439,11 +464,21 @@ while True:
                         cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thickness)
             y += th + 6
 
+    # Hand the annotated frame to the live view (no-op when nobody is watching)
+    live_stream.publish(frame)
+
     cv2.imshow("Kitchen Anchor + Spectacles Tracker", frame)
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
+    # Pick up zones.json edits made outside the API
+    if frame_idx % 150 == 0:
+        zone_map.reload_if_changed()
+
     frame_idx += 1
 
+live_stream.stop()
+snapshot_cache.stop()
 cap.release()
 cv2.destroyAllWindows()
+event_log.stop()
@@ -0,0 +1,318 @@
+# api_server.py
+"""
+Flask REST API for the caregiver dashboard.
+
+create_api_app(src) builds the app from a state source: any object exposing
+state_lock, last_spec_seen, last_presence, LAST_SEEN_JSON_PATH and
+PRESENCE_JSON_PATH, plus optional item_registry, presence_timeline, governor,
+camera_probe, event_log, snapshot_cache, zone_map, live_config, supervisor and
+live_stream (endpoints for missing ones are not registered). Scene_Prediction.py and main.py (DIAG_API_PORT) pass their
+own module; load_test.py passes a stub.
+
+Reads are open to any origin (the dashboard is a static page). Writes
+(PUT /api/zones, PUT /api/config) need `Authorization: Bearer <write_token>`
+when a token is configured, and come from the local machine otherwise; CORS
+preflights only allow GET, so no other web origin can send them from a browser.
+
+serve_api() runs it either on Flask's development server or, in production
+mode, on waitress (bounded worker threads, HTTP/1.1 keep-alive). Hot polling
+endpoints (/api/summary, /api/presence, /api/last_seen) are served from a
+short TTL cache of pre-serialised (and pre-gzipped) bodies.
+"""
+
+import gzip
+import hmac
+import json
+import os
+import threading
+import time
+
+from flask import Flask, jsonify, Response, request
+from flask_cors import CORS
+
+from event_log import print_log
+from presence_timeline import day_bounds, DAY_SECONDS
+
+# Optional production WSGI server
+try:
+    from waitress import serve as waitress_serve
+    WAITRESS_AVAILABLE = True
+except Exception:
+    WAITRESS_AVAILABLE = False
+
+GZIP_MIN_BYTES = 512
+GZIP_LEVEL = 5
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+LOOPBACK = ('127.0.0.1', '::1')
+
+
+def _with_time_iso(rec):
+    if rec and rec.get('time') and not rec.get('time_iso'):
+        rec['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rec['time']))
+    return rec
+
+
+class ResponseCache:
+    """key -> (expires, body, gzipped body) for a few hot JSON endpoints."""
+
+    def __init__(self, ttl, clock=time.monotonic):
+        self.ttl = float(ttl)
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build, use_gzip):
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry
+        # Build outside the lock; concurrent misses just build twice
+        body = json.dumps(build(), separators=(',', ':')).encode()
+        gz = gzip.compress(body, GZIP_LEVEL) if use_gzip and len(body) >= GZIP_MIN_BYTES else None
+        entry = (now + self.ttl, body, gz)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+
+def create_api_app(src, use_gzip=True, cache_ttl=1.0, stream_max_clients=2, write_token=None):
+    """write_token: required (as a Bearer token) on PUT; None allows writes from loopback clients only."""
+    api_app = Flask(__name__)
+    CORS(api_app, resources={r"/api/*": {"origins": "*", "methods": list(READ_METHODS)}})
+    cache = ResponseCache(cache_ttl)
+
+    @api_app.before_request
+    def guard_writes():
+        if request.method in READ_METHODS:
+            return None
+        if write_token:
+            given = request.headers.get('Authorization', '').encode()
+            if not hmac.compare_digest(given, f"Bearer {write_token}".encode()):
+                return jsonify({"ok": False, "error": "missing or wrong API token"}), 401
+        elif request.remote_addr not in LOOPBACK:
+            return jsonify({"ok": False, "error": "writes are only accepted from localhost "
+                                                  "unless an API token is configured"}), 403
+        return None
+
+    def accepts_gzip():
+        return use_gzip and 'gzip' in request.headers.get('Accept-Encoding', '')
+
+    def cached_json(key, build):
+        if cache.ttl <= 0:
+            return jsonify(build())
+        _, body, gz = cache.get(key, build, use_gzip)
+        if gz is not None and accepts_gzip():
+            resp = Response(gz, mimetype='application/json')
+            resp.headers['Content-Encoding'] = 'gzip'
+        else:
+            resp = Response(body, mimetype='application/json')
+        resp.headers['Vary'] = 'Accept-Encoding'
+        resp.headers['Cache-Control'] = f'max-age={int(cache.ttl)}'
+        return resp
+
+    @api_app.after_request
+    def compress(resp):
+        if (not accepts_gzip() or resp.direct_passthrough or resp.is_streamed or resp.status_code != 200
+                or 'Content-Encoding' in resp.headers or resp.mimetype != 'application/json'):
+            return resp
+        data = resp.get_data()
+        if len(data) < GZIP_MIN_BYTES:
+            return resp
+        resp.set_data(gzip.compress(data, GZIP_LEVEL))
+        resp.headers['Content-Encoding'] = 'gzip'
+        resp.headers['Vary'] = 'Accept-Encoding'
+        return resp
+
+    # sightings live in the item registry's file; LAST_SEEN_JSON_PATH is the pre-registry one
+    last_seen_path = getattr(getattr(src, 'item_registry', None), 'path', None) or src.LAST_SEEN_JSON_PATH
+
+    @api_app.get("/api/health")
+    def health():
+        return jsonify({
+            "ok": True,
+            "api": "online",
+            "last_seen_file": os.path.exists(last_seen_path),
+            "presence_file": os.path.exists(src.PRESENCE_JSON_PATH),
+        })
+
+    def build_last_seen():
+        with src.state_lock:
+            data = dict(src.last_spec_seen) if src.last_spec_seen else None
+        return {"ok": data is not None, "last_seen": _with_time_iso(data)}
+
+    def build_presence():
+        with src.state_lock:
+            data = dict(src.last_presence) if src.last_presence else None
+        return {"ok": data is not None, "presence": data}
+
+    def build_summary():
+        ls = build_last_seen()["last_seen"]
+        pr = build_presence()["presence"]
+        return {"ok": bool(ls or pr), "last_seen": ls, "presence": pr}
+
+    @api_app.get("/api/last_seen")
+    def api_last_seen():
+        return cached_json('last_seen', build_last_seen)
+
+    @api_app.get("/api/presence")
+    def api_presence():
+        return cached_json('presence', build_presence)
+
+    @api_app.get("/api/summary")
+    def api_summary():
+        return cached_json('summary', build_summary)
+
+    item_registry = getattr(src, 'item_registry', None)
+    if item_registry is not None:
+        @api_app.get("/api/items")
+        def api_items():
+            return jsonify({"ok": True, "items": item_registry.snapshot()})
+
+    snapshot_cache = getattr(src, 'snapshot_cache', None)
+    if snapshot_cache is not None:
+        def snapshot_response(item):
+            info = snapshot_cache.latest(item)
+            data = None
+            if info is not None and info['etag'] not in request.if_none_match:
+                try:
+                    with open(info['path'], 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    info = None
+            if info is None:
+                return jsonify({"ok": False, "error": f"no snapshot for {item}"}), 404
+            resp = Response(data, mimetype='image/jpeg') if data is not None else Response(status=304)
+            resp.set_etag(info['etag'])
+            resp.last_modified = info['time']
+            # a new sighting replaces the image; clients revalidate cheaply via ETag
+            resp.headers['Cache-Control'] = 'private, max-age=5'
+            return resp
+
+        @api_app.get("/api/items/<item>/snapshot.jpg")
+        def api_item_snapshot(item):
+            return snapshot_response(item)
+
+        @api_app.get("/api/last_seen/snapshot.jpg")
+        def api_last_seen_snapshot():
+            return snapshot_response('spectacles')
+
+    def page_args():
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = min(500, max(1, request.args.get('limit', 100, type=int)))
+        return offset, limit
+
+    presence_timeline = getattr(src, 'presence_timeline', None)
+    if presence_timeline is not None:
+        @api_app.get("/api/timeline")
+        def api_timeline():
+            offset, limit = page_args()
+            try:
+                data = presence_timeline.day(request.args.get('date'), offset, limit)
+            except ValueError as e:
+                return jsonify({"ok": False, "error": str(e)}), 400
+            return jsonify({"ok": True, **data})
+
+        @api_app.get("/api/timeline/totals")
+        def api_timeline_totals():
+            try:
+                totals = presence_timeline.totals(request.args.get('date'))
+            except ValueError as e:
+                return jsonify({"ok": False, "error": str(e)}), 400
+            return jsonify({"ok": True, "totals_seconds": totals})
+
+        @api_app.get("/api/timeline/absences")
+        def api_timeline_absences():
+            offset, limit = page_args()
+            location = request.args.get('location', 'Kitchen')
+            min_seconds = 60 * request.args.get('min_minutes', 120, type=float)
+            days = min(90, max(1, request.args.get('days', 1, type=int)))
+            try:
+                _, hi = day_bounds(request.args.get('date'))
+            except ValueError as e:
+                return jsonify({"ok": False, "error": str(e)}), 400
+            data = presence_timeline.absences(location, min_seconds, hi - days * DAY_SECONDS, hi, offset, limit)
+            return jsonify({"ok": True, **data})
+
+    governor = getattr(src, 'governor', None)
+    if governor is not None:
+        @api_app.get("/api/governor")
+        def api_governor():
+            return jsonify({"ok": True, **governor.status()})
+
+    supervisor = getattr(src, 'supervisor', None)
+    if supervisor is not None:
+        @api_app.get("/api/supervisor")
+        def api_supervisor():
+            return jsonify({"ok": True, **supervisor.status()})
+
+    camera_probe = getattr(src, 'camera_probe', None)
+    if camera_probe is not None:
+        @api_app.get("/api/camera")
+        def api_camera():
+            return jsonify({"ok": camera_probe.config is not None, **camera_probe.status()})
+
+    event_log = getattr(src, 'event_log', None)
+    if event_log is not None:
+        @api_app.get("/api/logs")
+        def api_logs():
+            limit = min(event_log.capacity, max(1, request.args.get('limit', 100, type=int)))
+            records = event_log.recent(limit, level=request.args.get('level'), tag=request.args.get('tag'),
+                                       since_seq=request.args.get('since', 0, type=int))
+            return jsonify({"ok": True, "records": records, **event_log.stats()})
+
+    zone_map = getattr(src, 'zone_map', None)
+    if zone_map is not None:
+        @api_app.get("/api/zones")
+        def api_zones():
+            return jsonify({"ok": True, **zone_map.snapshot()})
+
+        @api_app.put("/api/zones")
+        def api_zones_update():
+            try:
+                zone_map.update(request.get_json(force=True))
+            except Exception as e:
+                return jsonify({"ok": False, "error": str(e)}), 400
+            return jsonify({"ok": True, **zone_map.snapshot()})
+
+    live_config = getattr(src, 'live_config', None)
+    if live_config is not None:
+        @api_app.get("/api/config")
+        def api_config():
+            return jsonify({"ok": True, **live_config.snapshot()})
+
+        @api_app.put("/api/config")
+        def api_config_update():
+            try:
+                live_config.apply(request.get_json(force=True), source='api')
+            except Exception as e:
+                return jsonify({"ok": False, "error": str(e)}), 400
+            return jsonify({"ok": True, **live_config.snapshot()})
+
+    live_stream = getattr(src, 'live_stream', None)
+    if live_stream is not None:
+        @api_app.get("/api/stream.mjpg")
+        def api_stream():
+            # each viewer holds a worker thread for the life of the stream; the slot is reserved
+            # atomically here and freed when the response closes (even before the first frame)
+            if not live_stream.acquire(stream_max_clients):
+                return jsonify({"ok": False, "error": "too many live viewers"}), 503
+            resp = Response(live_stream.frames(), mimetype=live_stream.mimetype)
+            resp.headers['Cache-Control'] = 'no-store'
+            resp.call_on_close(live_stream.release)
+            return resp
+
+    return api_app
+
+
+def serve_api(api_app, host, port, mode='production', threads=4, connection_limit=64, channel_timeout=30,
+              log=None):
+    """Blocking. mode='production' uses waitress when installed, else Flask's dev server."""
+    log = log or print_log
+    if mode == 'production' and WAITRESS_AVAILABLE:
+        log('API', "waitress: %d workers, keep-alive, up to %d connections", threads, connection_limit)
+        waitress_serve(api_app, host=host, port=port, threads=threads, connection_limit=connection_limit,
+                       channel_timeout=channel_timeout, ident='cognia')
+        return
+    if mode == 'production':
+        log('API', "waitress not installed (pip install waitress); using Flask dev server", level='warning')
+    api_app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
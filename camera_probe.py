@@ -0,0 +1,269 @@
+# camera_probe.py
+"""
+Camera capability probe with a cached best configuration.
+
+The first start lists video devices (and, on Linux, their formats and frame
+sizes via v4l2-ctl), tries each (device, backend, pixel format) and keeps the
+best working one: compressed MJPEG over raw YUYV, the requested resolution,
+and a 1-frame driver buffer so reads return the newest frame instead of a
+queued one. The choice and its measured read latency / FPS are written to
+`cache_path`; later starts open that configuration directly, report the
+cached measurements instead of timing reads again (so a supervised restart
+gets its capture back after one read), and only re-probe if it fails or the
+set of attached cameras changed.
+"""
+
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import time
+
+import cv2
+
+from event_log import print_log
+
+# Backends worth trying per OS, in order
+BACKENDS = {
+    'Linux': ('V4L2', 'ANY'),
+    'Windows': ('DSHOW', 'MSMF', 'ANY'),
+    'Darwin': ('AVFOUNDATION', 'ANY'),
+}
+# Compressed first: less USB bandwidth and driver-side copying than raw YUYV
+FOURCC_PREFERENCE = ('MJPG', 'YUYV')
+PROBE_FRAMES = 10    # frames read per candidate while probing
+MEASURE_FRAMES = 30  # frames read when reporting the chosen configuration
+
+_V4L2_FORMAT_RE = re.compile(r"\[\d+\]:\s+'(\w+)'")
+_V4L2_SIZE_RE = re.compile(r"Size:\s+\w+\s+(\d+)x(\d+)")
+
+
+def fourcc_str(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 ')
+
+
+def backend_id(name):
+    return getattr(cv2, 'CAP_' + name, cv2.CAP_ANY)
+
+
+def list_devices(max_index=2):
+    """[(index, name)]; /dev/video* with their sysfs names on Linux, else indices 0..max_index-1."""
+    if platform.system() == 'Linux':
+        devices = []
+        for path in sorted(glob.glob('/dev/video*')):
+            m = re.search(r'(\d+)$', path)
+            if not m:
+                continue
+            idx = int(m.group(1))
+            try:
+                with open(f'/sys/class/video4linux/video{idx}/name', 'r') as f:
+                    name = f.read().strip()
+            except Exception:
+                name = path
+            devices.append((idx, name))
+        if devices:
+            return devices
+    return [(i, f'camera {i}') for i in range(max_index)]
+
+
+def list_formats(index):
+    """{fourcc: [(w, h), ...]} from `v4l2-ctl --list-formats-ext`, or {} when unavailable."""
+    if platform.system() != 'Linux' or not shutil.which('v4l2-ctl'):
+        return {}
+    try:
+        out = subprocess.run(['v4l2-ctl', '-d', f'/dev/video{index}', '--list-formats-ext'],
+                             capture_output=True, text=True, timeout=5).stdout
+    except Exception:
+        return {}
+    formats, current = {}, None
+    for line in out.splitlines():
+        m = _V4L2_FORMAT_RE.search(line)
+        if m:
+            current = formats.setdefault(m.group(1), [])
+            continue
+        m = _V4L2_SIZE_RE.search(line)
+        if m and current is not None:
+            current.append((int(m.group(1)), int(m.group(2))))
+    return formats
+
+
+def configure(cap, fourcc, size, fps, buffer_size):
+    """Apply a capture mode; returns what the driver actually gave (fourcc, w, h, buffer)."""
+    # FOURCC has to go before the frame size on V4L2 or the size may be rejected
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return (fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)),
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            int(cap.get(cv2.CAP_PROP_BUFFERSIZE)))
+
+
+def measure(cap, frames=MEASURE_FRAMES, warmup=3):
+    """Time blocking reads: {'read_ms_p50', 'read_ms_max', 'fps'} or None if reads fail."""
+    for _ in range(warmup):
+        if not cap.read()[0]:
+            return None
+    times = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        if not cap.read()[0]:
+            return None
+        times.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    times.sort()
+    return {
+        'read_ms_p50': round(times[len(times) // 2] * 1000, 2),
+        'read_ms_max': round(times[-1] * 1000, 2),
+        'fps': round(frames / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+class CameraProbe:
+    def __init__(self, cache_path='camera_profile.json', preferred_size=(640, 480), fps=15,
+                 buffer_size=1, max_index=2, backends=None, log=None):
+        self.cache_path = cache_path
+        self.preferred_size = tuple(preferred_size)
+        self.fps = fps
+        self.buffer_size = int(buffer_size)
+        self.max_index = int(max_index)
+        self.backends = tuple(backends or BACKENDS.get(platform.system(), ('ANY',)))
+        self.log = log or print_log
+        self.config = None    # {'index', 'backend', 'fourcc', 'width', 'height', 'buffer_size'}
+        self.measured = None  # read latency / FPS of the opened configuration
+        self.source = None    # 'cache' or 'probe'
+
+    def signature(self):
+        """Identifies the attached cameras; a different set invalidates the cache."""
+        return [platform.system()] + [name for _, name in list_devices(self.max_index)]
+
+    # ---------- public ----------
+    def open(self, force_probe=False):
+        """Open the camera (cached config when valid, otherwise probe); returns a VideoCapture or None."""
+        cached = None if force_probe else self._load()
+        if cached is not None:
+            cap = self._open_config(cached['config'])
+            if cap is not None:
+                self.config, self.measured, self.source = cached['config'], cached.get('measured'), 'cache'
+                self._report()
+                return cap
+            self.log('CAM', "cached camera config failed; re-probing", level='warning')
+        config = self.probe()
+        if config is None:
+            self.log('CAM', "no usable camera found", level='error')
+            return None
+        cap = self._open_config(config)
+        if cap is None:
+            return None
+        self.config, self.source = config, 'probe'
+        self.measured = measure(cap)
+        self._report()
+        self._save()
+        return cap
+
+    def probe(self):
+        """Try every device / backend / format; returns the best config dict or None."""
+        best, best_rank = None, None
+        for idx, name in list_devices(self.max_index):
+            listed = list_formats(idx)
+            fourccs = [f for f in FOURCC_PREFERENCE if not listed or f in listed] or list(FOURCC_PREFERENCE)
+            for backend in self.backends:
+                cap = self._try_open(idx, backend)
+                if cap is None:
+                    continue
+                try:
+                    for fourcc in fourccs:
+                        size = self._pick_size(listed.get(fourcc))
+                        got_fourcc, w, h, buf = configure(cap, fourcc, size, self.fps, self.buffer_size)
+                        stats = measure(cap, PROBE_FRAMES, warmup=2)
+                        if stats is None:
+                            continue
+                        self.log('CAM', "probe video%d (%s) %s: asked %s %dx%d, got %s %dx%d buf=%d read=%sms fps=%s",
+                                 idx, name, backend, fourcc, size[0], size[1], got_fourcc or '?', w, h, buf,
+                                 stats['read_ms_p50'], stats['fps'])
+                        rank = self._rank(got_fourcc, w, h, stats)
+                        if best_rank is None or rank < best_rank:
+                            best_rank = rank
+                            # cache what the driver settled on; backends that can't report a
+                            # property return 0 / an empty code, then keep what was asked for
+                            best = {'index': idx, 'name': name, 'backend': backend,
+                                    'fourcc': got_fourcc if len(got_fourcc) == 4 else fourcc,
+                                    'width': w or size[0], 'height': h or size[1],
+                                    'buffer_size': buf if buf > 0 else self.buffer_size}
+                finally:
+                    cap.release()
+            if best is not None and best_rank[0] == 0:
+                break  # MJPEG on the first working device; no need to open the others
+        return best
+
+    def status(self):
+        return {'config': self.config, 'measured': self.measured, 'source': self.source}
+
+    # ---------- internals ----------
+    def _pick_size(self, sizes):
+        if not sizes or self.preferred_size in sizes:
+            return self.preferred_size
+        pw, ph = self.preferred_size
+        return min(sizes, key=lambda s: (abs(s[0] * s[1] - pw * ph), abs(s[0] - pw)))
+
+    def _rank(self, fourcc, w, h, stats):
+        """Lower is better: preferred format, then closeness to the requested size, then speed."""
+        fmt = FOURCC_PREFERENCE.index(fourcc) if fourcc in FOURCC_PREFERENCE else len(FOURCC_PREFERENCE)
+        pw, ph = self.preferred_size
+        return (fmt, abs(w * h - pw * ph), -(stats['fps'] or 0), stats['read_ms_p50'])
+
+    def _try_open(self, idx, backend):
+        try:
+            cap = cv2.VideoCapture(idx, backend_id(backend))
+        except Exception as e:
+            self.log('CAM', "open attempt failed: %s", e, level='warning')
+            return None
+        if cap.isOpened():
+            return cap
+        cap.release()
+        return None
+
+    def _open_config(self, config):
+        cap = self._try_open(config['index'], config['backend'])
+        if cap is None:
+            return None
+        configure(cap, config['fourcc'], (config['width'], config['height']), self.fps, config['buffer_size'])
+        if cap.read()[0]:
+            return cap
+        cap.release()
+        return None
+
+    def _report(self):
+        c = self.config
+        m = self.measured or {}
+        self.log('CAM', "video%s %s %s %sx%s buf=%s (%s): read p50=%sms max=%sms fps=%s",
+                 c['index'], c['backend'], c['fourcc'], c['width'], c['height'], c['buffer_size'], self.source,
+                 m.get('read_ms_p50'), m.get('read_ms_max'), m.get('fps'))
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        if data.get('signature') != self.signature():
+            self.log('CAM', "camera set changed since last probe")
+            return None
+        return data if data.get('config') else None
+
+    def _save(self):
+        data = {'signature': self.signature(), 'config': self.config, 'measured': self.measured,
+                'probed_at': time.time()}
+        tmp = self.cache_path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            self.log('CAM', "could not save camera profile: %s", e, level='warning')
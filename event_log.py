@@ -0,0 +1,193 @@
+# event_log.py
+"""
+Queue-backed structured logging for the camera and voice loops.
+
+Hot-path threads call log(), which only builds a small tuple and does a
+non-blocking put; when the queue is full the record is counted as dropped
+rather than waited on. One sink thread formats and writes the records,
+rate-limits each (tag, message) key to `burst` lines per `window` seconds,
+and folds the rest into one "suppressed N repeats" line. It also keeps the
+last `capacity` records in a ring that the API serves at /api/logs.
+
+Messages use %-style args so formatting (and traceback rendering for
+exception()) happens on the sink thread, not in the loop that logged.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+LEVELS = ('debug', 'info', 'warning', 'error')
+
+
+def _format(msg, args):
+    try:
+        return msg % args if args else msg
+    except Exception:
+        return " ".join([msg] + [str(a) for a in args])
+
+
+def print_log(tag, msg, *args, level='info', exc=None, **fields):
+    """Same call as EventLog.log, printed inline; the default for modules' `log=` before one is wired in."""
+    extra = "".join(f" {k}={v}" for k, v in fields.items())
+    print(f"[{tag}] " + _format(msg, args) + extra)
+    if exc is not None:
+        print("".join(traceback.format_exception(type(exc), exc, exc.__traceback__)).rstrip())
+
+
+class EventLog:
+    def __init__(self, capacity=500, queue_size=1000, window=10.0, burst=5, stream=None,
+                 json_lines=False, min_level='info', clock=time.time):
+        self.capacity = int(capacity)
+        self.window = float(window)
+        self.burst = int(burst)
+        self.stream = stream
+        self.json_lines = json_lines
+        self.min_level = LEVELS.index(min_level)
+        self.clock = clock
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._ring = deque(maxlen=self.capacity)
+        self._ring_lock = threading.Lock()
+        self._limits = {}  # (tag, msg) -> [window start, count in window, suppressed, last suppressed args]
+        self._seq = 0
+        self.dropped = 0     # records lost to a full queue (counted on the logging thread)
+        self.suppressed = 0  # records folded by the rate limiter
+        self._thread = None
+        self._stop = threading.Event()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    # ---------- any thread ----------
+    def log(self, tag, msg, *args, level='info', exc=None, **fields):
+        """Never blocks; formatting happens on the sink thread."""
+        if LEVELS.index(level) < self.min_level:
+            return
+        try:
+            self._queue.put_nowait((self.clock(), level, tag, msg, args, fields, exc))
+        except queue.Full:
+            self.dropped += 1
+
+    def info(self, tag, msg, *args, **fields):
+        self.log(tag, msg, *args, level='info', **fields)
+
+    def warning(self, tag, msg, *args, **fields):
+        self.log(tag, msg, *args, level='warning', **fields)
+
+    def error(self, tag, msg, *args, **fields):
+        self.log(tag, msg, *args, level='error', **fields)
+
+    def exception(self, tag, msg, *args, **fields):
+        """error() plus the active exception's traceback, rendered by the sink."""
+        self.log(tag, msg, *args, level='error', exc=sys.exc_info()[1], **fields)
+
+    def recent(self, limit=100, level=None, tag=None, since_seq=0):
+        """Newest-last list of ring records, optionally filtered."""
+        min_level = LEVELS.index(level) if level else 0
+        with self._ring_lock:
+            records = list(self._ring)
+        out = [r for r in records if r['seq'] > since_seq and LEVELS.index(r['level']) >= min_level
+               and (tag is None or r['tag'] == tag)]
+        return out[-limit:]
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'dropped': self.dropped, 'suppressed': self.suppressed,
+                'ring': len(self._ring), 'capacity': self.capacity}
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name='event-log', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Flush what is queued, then stop the sink."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _after_fork(self):
+        """Forked worker (supervisor.py): the sink thread did not survive the fork, start a fresh one."""
+        running = self._thread is not None and not self._stop.is_set()
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._ring_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if running:
+            self.start()
+
+    # ---------- sink thread ----------
+    def _run(self):
+        last_sweep = self.clock()
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                item = None
+            now = self.clock()
+            if item is not None:
+                self._handle(*item)
+            if now - last_sweep >= self.window:
+                self._flush_suppressed(now)
+                last_sweep = now
+        self._flush_suppressed(self.clock() + self.window)
+
+    def _handle(self, ts, level, tag, msg, args, fields, exc):
+        key = (tag, msg)
+        lim = self._limits.get(key)
+        if lim is None or ts - lim[0] >= self.window:
+            if lim is not None and lim[2]:
+                self._summarize(key, lim, ts)
+            lim = self._limits[key] = [ts, 0, 0, ()]
+        lim[1] += 1
+        if lim[1] > self.burst:
+            lim[2] += 1
+            lim[3] = args
+            self.suppressed += 1
+            return
+        record = {'ts': ts, 'level': level, 'tag': tag, 'msg': _format(msg, args)}
+        if fields:
+            record['fields'] = fields
+        if exc is not None:
+            record['traceback'] = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        self._emit(record)
+
+    def _summarize(self, key, lim, now):
+        tag, msg = key
+        self._emit({'ts': now, 'level': 'warning', 'tag': tag,
+                    'msg': f"{_format(msg, lim[3])} (suppressed {lim[2]} repeats in {now - lim[0]:.0f}s)",
+                    'fields': {'repeats': lim[2]}})
+        lim[2] = 0
+
+    def _flush_suppressed(self, now):
+        for key, lim in list(self._limits.items()):
+            if now - lim[0] >= self.window:
+                if lim[2]:
+                    self._summarize(key, lim, now)
+                del self._limits[key]
+
+    def _emit(self, record):
+        self._seq += 1
+        record['seq'] = self._seq
+        with self._ring_lock:
+            self._ring.append(record)
+        try:
+            if self.json_lines:
+                line = json.dumps(record, default=str)
+            else:
+                line = f"[{record['tag']}] {record['msg']}"
+                if record.get('fields'):
+                    line += " " + " ".join(f"{k}={v}" for k, v in record['fields'].items())
+                if record.get('traceback'):
+                    line += "\n" + record['traceback'].rstrip()
+            stream = self.stream or sys.stdout
+            stream.write(line + "\n")
+            stream.flush()
+        except Exception:
+            pass
@@ -0,0 +1,166 @@
+# frame_governor.py
+"""
+Adaptive frame-rate / inference governor.
+
+Watches inference latency (one EWMA per model, over the calls that ran it)
+plus CPU temperature and clock from sysfs, and walks a ladder of processing
+profiles. The load of a profile is the share of its capture frame period
+spent on inference: (kitchen latency / kitchen_stride + item latency /
+spec_every_n) x capture_fps, with the latencies scaled by input area when the
+profile uses another imgsz. Keeping the models apart matters because the
+ladder changes their cadences at different rates. Step to a
+lighter profile as soon as the current load exceeds `frame_budget` or the SoC
+runs hot; step back up only when the heavier profile's predicted load stays
+under `frame_budget x headroom` for `ramp_up_hold` seconds. Judging the
+heavier profile, not the current one, is what keeps a lighter profile's
+spare time from reading as headroom and the levels from oscillating.
+sysfs_root and clock are injectable, so it can be driven by a fake sysfs tree
+and synthetic latency traces.
+"""
+
+import os
+import time
+from collections import namedtuple
+
+from event_log import print_log
+
+# capture_fps: camera pacing, kitchen_stride: run kitchen model every N frames,
+# spec_every_n: run item model every N frames, imgsz: YOLO input size
+Profile = namedtuple('Profile', 'capture_fps kitchen_stride spec_every_n imgsz')
+
+DEFAULT_LEVELS = (
+    Profile(15, 1, 3, 640),
+    Profile(12, 2, 4, 640),
+    Profile(10, 3, 6, 480),
+    Profile(6, 4, 8, 416),
+    Profile(4, 6, 12, 320),
+)
+
+# model fed to observe() -> the Profile field holding its frame stride
+MODEL_STRIDES = {'kitchen': 'kitchen_stride', 'spec': 'spec_every_n'}
+
+THERMAL_TEMP = 'sys/class/thermal/thermal_zone0/temp'                  # millidegrees C
+CPU_CUR_FREQ = 'sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq'  # kHz
+CPU_MAX_FREQ = 'sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq'  # kHz
+
+
+def read_sysfs_int(root, rel):
+    try:
+        with open(os.path.join(root, rel), 'r') as f:
+            return int(f.read().strip())
+    except Exception:
+        return None
+
+
+def with_spec_cadence(levels, every_n):
+    """`levels` with the item model every `every_n` frames at level 0, stretched in proportion below."""
+    base = levels[0].spec_every_n
+    return tuple(p._replace(spec_every_n=max(1, round(every_n * p.spec_every_n / float(base)))) for p in levels)
+
+
+class FrameGovernor:
+    def __init__(self, levels=DEFAULT_LEVELS, frame_budget=0.8, temp_high=75.0, temp_low=65.0,
+                 headroom=0.6, ramp_up_hold=10.0, step_down_cooldown=2.0, ewma_alpha=0.2,
+                 sensor_interval=1.0, sysfs_root='/', clock=time.monotonic, log=None):
+        """frame_budget: share of the capture frame period (1 / capture_fps) inference may use."""
+        self.levels = tuple(levels)
+        self.frame_budget = float(frame_budget)
+        self.temp_high = float(temp_high)
+        self.temp_low = float(temp_low)
+        self.headroom = float(headroom)
+        self.ramp_up_hold = float(ramp_up_hold)
+        self.step_down_cooldown = float(step_down_cooldown)
+        self.ewma_alpha = float(ewma_alpha)
+        self.sensor_interval = float(sensor_interval)
+        self.sysfs_root = sysfs_root
+        self.clock = clock
+        self.log = log or print_log
+
+        self.level = 0
+        self.latency = {}       # model -> EWMA of seconds per call of that model, at profile.imgsz
+        self.temp_c = None
+        self.freq_ratio = None  # current / max CPU clock
+        self._last_sensor = None
+        self._last_change = clock()
+        self._headroom_since = None
+
+    @property
+    def profile(self):
+        return self.levels[self.level]
+
+    def observe(self, latency_s, model='kitchen'):
+        """Feed the time one call of `model` ('kitchen' or 'spec') took; 0 (model skipped) is ignored."""
+        if latency_s <= 0:
+            return
+        cur = self.latency.get(model)
+        if cur is None:
+            self.latency[model] = float(latency_s)
+        else:
+            self.latency[model] = cur + self.ewma_alpha * (float(latency_s) - cur)
+
+    def load(self, profile=None):
+        """Predicted share of `profile`'s frame period spent on inference (current profile by default)."""
+        if not self.latency:
+            return None
+        p = profile or self.profile
+        per_frame = sum(lat / getattr(p, MODEL_STRIDES[m]) for m, lat in self.latency.items())
+        return per_frame * (float(p.imgsz) / self.profile.imgsz) ** 2 * p.capture_fps
+
+    def read_sensors(self):
+        temp = read_sysfs_int(self.sysfs_root, THERMAL_TEMP)
+        self.temp_c = temp / 1000.0 if temp is not None else None
+        cur = read_sysfs_int(self.sysfs_root, CPU_CUR_FREQ)
+        mx = read_sysfs_int(self.sysfs_root, CPU_MAX_FREQ)
+        self.freq_ratio = cur / float(mx) if cur and mx else None
+
+    def update(self):
+        """Re-evaluate the level; returns the (possibly new) profile."""
+        now = self.clock()
+        if self._last_sensor is None or now - self._last_sensor >= self.sensor_interval:
+            self.read_sensors()
+            self._last_sensor = now
+
+        load = self.load()
+        hot = self.temp_c is not None and self.temp_c >= self.temp_high
+        over_budget = load is not None and load > self.frame_budget
+        cool = self.temp_c is None or self.temp_c < self.temp_low
+        full_clock = self.freq_ratio is None or self.freq_ratio >= 0.9
+        up_load = self.load(self.levels[self.level - 1]) if self.level > 0 else None
+        has_headroom = up_load is not None and up_load < self.frame_budget * self.headroom and cool and full_clock
+
+        if (hot or over_budget) and self.level < len(self.levels) - 1:
+            self._headroom_since = None
+            if now - self._last_change >= self.step_down_cooldown:
+                self._set_level(self.level + 1, now, 'hot' if hot else 'over budget')
+        elif has_headroom and self.level > 0:
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= self.ramp_up_hold:
+                self._set_level(self.level - 1, now, 'headroom')
+                self._headroom_since = now
+        else:
+            self._headroom_since = None
+        return self.profile
+
+    def _set_level(self, level, now, why):
+        old = self.profile
+        self.level = level
+        self._last_change = now
+        p = self.profile
+        for m in self.latency:
+            self.latency[m] *= (float(p.imgsz) / old.imgsz) ** 2  # expected latency at the new input size
+        self.log('GOV', "level %d (%s): fps=%s kitchen/%s spec/%s imgsz=%s", level, why, p.capture_fps,
+                 p.kitchen_stride, p.spec_every_n, p.imgsz, level='warning' if why == 'hot' else 'info',
+                 load=round(self.load() or 0, 2), temp_c=self.temp_c,
+                 **{f'{m}_s': round(lat, 3) for m, lat in self.latency.items()})
+
+    def status(self):
+        return {
+            'level': self.level,
+            'profile': self.profile._asdict(),
+            'latency_s': {m: round(lat, 4) for m, lat in self.latency.items()},
+            'load': round(self.load(), 3) if self.latency else None,
+            'frame_budget': self.frame_budget,
+            'temp_c': self.temp_c,
+            'freq_ratio': round(self.freq_ratio, 3) if self.freq_ratio is not None else None,
+        }
@@ -0,0 +1,192 @@
+# frame_pyramid.py
+"""
+Per-frame detector views, computed once and shared by every consumer.
+
+Both YOLO models letterbox their input internally, so at a reduced governor
+input size (480 / 416 / 320) each model call resized and padded the same
+640x480 frame again, into freshly allocated arrays. FramePyramid does that
+work once per frame and size: view(imgsz) downscales the frame so its long
+side is `imgsz` and pads the short side (bottom / right, value 114 like
+ultralytics) up to a multiple of `stride`, into a buffer allocated on first
+use and reused for every later frame (bilinear, as ultralytics resizes, so
+the detectors see the same pixels as before). Ultralytics' letterbox then finds
+nothing to resize or pad, and the kitchen model, the item model and anything
+else reading the same size share one array. At full size the frame itself is
+returned, no copy.
+
+Boxes predicted on a view are in view pixels; to_frame(bbox, scale) maps them
+back. Padding is only added after the image, so the mapping is a plain scale.
+
+Views are valid until the next update(); consumers that keep pixels past the
+frame (snapshot thumbnails, the live stream) copy what they need, as before.
+They read the full-resolution frame, not a view: thumbnails crop the sighting
+box at camera resolution and the stream is encoded at its own size.
+
+The savings only appear below 640. At the default imgsz of 640 a 640x480
+frame is already at size and stride-aligned, so view() returns the frame and
+the only cost is the lookup (within benchmark noise, ~1.6 ms per frame before
+and after). Under thermal or load pressure the governor drops to 480 / 416 /
+320, and that is where the one shared resize replaces one per model call.
+
+`python frame_pyramid.py` benchmarks time and allocations per frame with and
+without the shared views at each governor input size.
+"""
+
+import cv2
+import numpy as np
+
+
+def to_frame(bbox, scale, shape=None):
+    """View-pixel (x1, y1, x2, y2) -> frame-pixel ints, clipped to `shape` (h, w, ...) when given."""
+    if bbox is None:
+        return None
+    x1, y1, x2, y2 = (float(v) / scale for v in bbox)
+    if shape is not None:
+        h, w = shape[:2]
+        x1, x2 = min(max(x1, 0.0), w), min(max(x2, 0.0), w)
+        y1, y2 = min(max(y1, 0.0), h), min(max(y2, 0.0), h)
+    return int(x1), int(y1), int(x2), int(y2)
+
+
+class FramePyramid:
+    def __init__(self, stride=32, pad_value=114, interpolation=cv2.INTER_LINEAR):
+        self.stride = int(stride)
+        self.pad_value = int(pad_value)
+        self.interpolation = interpolation
+        self.frame = None
+        self._buffers = {}  # (imgsz, frame shape) -> (padded buffer, resized w, h, scale)
+        self._ready = {}    # imgsz -> (view, scale), computed for the current frame
+        self.allocations = 0
+        self.resizes = 0
+        self.shared = 0     # view() calls served without any work
+
+    def update(self, frame):
+        """Start a new frame; views are computed lazily on first request."""
+        self.frame = frame
+        self._ready.clear()
+        return self
+
+    def view(self, imgsz):
+        """(image, scale): the frame with its long side at `imgsz`, padded to the stride."""
+        hit = self._ready.get(imgsz)
+        if hit is not None:
+            self.shared += 1
+            return hit
+        frame = self.frame
+        h, w = frame.shape[:2]
+        key = (imgsz, frame.shape)
+        entry = self._buffers.get(key)
+        if entry is None:
+            entry = self._buffers[key] = self._allocate(imgsz, frame.shape)
+        buf, nw, nh, scale = entry
+        if buf is None:
+            out = (frame, 1.0)  # already at size and stride-aligned
+        else:
+            if (nw, nh) == (w, h):
+                buf[:h, :w] = frame
+            else:
+                cv2.resize(frame, (nw, nh), dst=buf[:nh, :nw], interpolation=self.interpolation)
+                self.resizes += 1
+            out = (buf, scale)
+        self._ready[imgsz] = out
+        return out
+
+    def _allocate(self, imgsz, shape):
+        h, w = shape[:2]
+        scale = min(1.0, float(imgsz) / max(h, w))
+        nw, nh = int(round(w * scale)), int(round(h * scale))
+        pw, ph = -(-nw // self.stride) * self.stride, -(-nh // self.stride) * self.stride
+        if scale == 1.0 and (pw, ph) == (w, h):
+            return None, w, h, 1.0
+        buf = np.full((ph, pw) + tuple(shape[2:]), self.pad_value, dtype=np.uint8)
+        self.allocations += 1
+        # x and y scale are equal up to rounding; use the horizontal one
+        return buf, nw, nh, nw / float(w)
+
+    def stats(self):
+        return {'buffers': len(self._buffers), 'allocations': self.allocations, 'resizes': self.resizes,
+                'shared': self.shared,
+                'buffer_bytes': sum(b[0].nbytes for b in self._buffers.values() if b[0] is not None)}
+
+
+# ---------- benchmark ----------
+def _model_preprocess(img, imgsz, stride=32, pad_value=114, allocs=None):
+    """What ultralytics does to a numpy BGR input before inference: LetterBox(auto=True), then
+    BGR->RGB, HWC->CHW, contiguous, float, /= 255. Resize and pad are skipped when already in shape.
+    Every array it creates is appended to `allocs` (nbytes)."""
+    h, w = img.shape[:2]
+    r = min(imgsz / h, imgsz / w, 1.0)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    dw, dh = (imgsz - nw) % stride / 2, (imgsz - nh) % stride / 2
+    steps = []
+    if (nw, nh) != (w, h):
+        img = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        steps.append(img)
+    if dw or dh:
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(pad_value,) * 3)
+        steps.append(img)
+    chw = np.ascontiguousarray(img[..., ::-1].transpose(2, 0, 1))
+    steps.append(chw)
+    out = chw.astype(np.float32)
+    out /= 255.0
+    steps.append(out)
+    if allocs is not None:
+        allocs.extend(a.nbytes for a in steps)
+    return out
+
+
+def _run(frames, imgsz, consumers, shared, allocs=None):
+    pyramid = FramePyramid()
+    for frame in frames:
+        pyramid.update(frame)
+        for _ in range(consumers):
+            _model_preprocess(pyramid.view(imgsz)[0] if shared else frame, imgsz, allocs=allocs)
+    return pyramid
+
+
+def _bench(frames, imgsz, consumers, shared, warmup=3):
+    """(ms per frame, arrays per frame, MB allocated per frame) after the first-use buffer allocation."""
+    import time
+    _run(frames[:warmup], imgsz, consumers, shared)
+    t0 = time.perf_counter()
+    _run(frames, imgsz, consumers, shared)
+    ms = (time.perf_counter() - t0) / len(frames) * 1000.0
+    allocs = []
+    pyramid = _run(frames[:1], imgsz, consumers, shared)  # owns its buffer from here on
+    pyramid_allocs = pyramid.allocations
+    for frame in frames:
+        pyramid.update(frame)
+        for _ in range(consumers):
+            _model_preprocess(pyramid.view(imgsz)[0] if shared else frame, imgsz, allocs=allocs)
+    per_frame = (len(allocs) + pyramid.allocations - pyramid_allocs) / float(len(frames))
+    return ms, per_frame, sum(allocs) / float(len(frames)) / 1e6
+
+
+def main():
+    import argparse
+    from frame_governor import DEFAULT_LEVELS
+
+    parser = argparse.ArgumentParser(description="Shared per-frame detector views: time and allocations per frame")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--consumers', type=int, default=2, help="model calls reading the frame (kitchen + item)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    distinct = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [distinct[i % len(distinct)] for i in range(args.frames)]
+    cv2.setNumThreads(1)  # comparable numbers; on the Pi the other cores run inference
+    print(f"frame {args.width}x{args.height}, {args.consumers} model calls per frame, {args.frames} frames")
+    print("preprocessing per frame (everything before the network runs), before -> after")
+    print(f"{'imgsz':>5}  {'ms':>15}  {'arrays':>13}  {'MB allocated':>14}")
+    for imgsz in sorted({p.imgsz for p in DEFAULT_LEVELS}, reverse=True):
+        t_b, n_b, mb_b = _bench(frames, imgsz, args.consumers, shared=False)
+        t_a, n_a, mb_a = _bench(frames, imgsz, args.consumers, shared=True)
+        print(f"{imgsz:>5}  {t_b:>6.2f} -> {t_a:<6.2f}  {n_b:>4.1f} -> {n_a:<4.1f}  {mb_b:>5.2f} -> {mb_a:<5.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+# item_registry.py
+"""
+Multi-object last-seen registry and on-demand item search.
+
+Maps many tracked item classes (spectacles, keys, wallet, phone, medication)
+to last-seen records. All records are filled from ONE detector pass: observe()
+walks the boxes of that pass once, keeps the best box per item via a flat
+label -> item lookup, then applies per-item thresholds. Per-frame cost depends
+on the number of boxes, not on the number of tracked items.
+
+The registry file is the only place sightings are persisted. Single-item
+files from before it (last_spec_seen.json) are passed as `legacy_paths` and
+read on load: a legacy record newer than the registry's is imported and the
+registry saved, so the old file is never written again.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from event_log import print_log
+
+# item name -> model labels (lowercase), accept threshold, words used in voice queries
+DEFAULT_TRACKED_ITEMS = {
+    'spectacles': {
+        'labels': {'spectacle', 'spectacles', 'glasses', 'eyeglasses', 'sunglasses'},
+        'threshold': 0.60,
+        'aliases': ('spec', 'glasses'),
+    },
+    'keys': {
+        'labels': {'key', 'keys'},
+        'threshold': 0.55,
+        'aliases': ('key',),
+    },
+    'wallet': {
+        'labels': {'wallet', 'purse'},
+        'threshold': 0.55,
+        'aliases': ('wallet', 'purse'),
+    },
+    'phone': {
+        'labels': {'phone', 'cell phone', 'mobile phone', 'smartphone'},
+        'threshold': 0.55,
+        'aliases': ('phone', 'handphone', 'mobile'),
+    },
+    'medication': {
+        'labels': {'medication', 'medicine', 'pill box', 'pillbox', 'pill bottle'},
+        'threshold': 0.50,
+        'aliases': ('medic', 'medicine', 'pill'),
+    },
+}
+
+
+def empty_record():
+    return {'place': None, 'zone': None, 'time': None, 'conf': None, 'bbox': None, 'label': None}
+
+
+class ItemRegistry:
+    def __init__(self, items=None, path='last_seen_items.json', thresholds=None, default_item='spectacles', lock=None,
+                 legacy_paths=None, log=None):
+        """legacy_paths: {item: path} of old single-record JSON files to migrate on load()."""
+        self.items = {name: dict(cfg) for name, cfg in (items or DEFAULT_TRACKED_ITEMS).items()}
+        for name, thr in (thresholds or {}).items():
+            if name in self.items:
+                self.items[name]['threshold'] = float(thr)
+        self.path = path
+        self.legacy_paths = dict(legacy_paths or {})
+        self.log = log or print_log
+        # used when the detector only has a single (unrecognised) class, like the original spec model
+        self.default_item = default_item
+        self.lock = lock or threading.Lock()
+        self._label_to_item = {}
+        for name, cfg in self.items.items():
+            for lbl in cfg['labels']:
+                self._label_to_item[str(lbl).strip().lower()] = name
+        # whole words only (optional plural): 'key' must not match "keyboard", nor 'spec' "special"
+        self._query_res = {}
+        for name, cfg in self.items.items():
+            words = (name,) + tuple(cfg.get('aliases', ()))
+            self._query_res[name] = re.compile(r'\b(?:%s)s?\b' % '|'.join(re.escape(w.lower()) for w in words))
+        # Record dicts are updated in place so callers may keep references (e.g. last_spec_seen)
+        self.records = {name: empty_record() for name in self.items}
+
+    def set_threshold(self, item, threshold):
+        with self.lock:
+            self.items[item]['threshold'] = float(threshold)
+
+    def item_for_label(self, label, single_class=False):
+        item = self._label_to_item.get(str(label).strip().lower()) if label is not None else None
+        if item is None and single_class:
+            return self.default_item
+        return item
+
+    def observe(self, detections, place, single_class=False, ts=None, zone_map=None, frame_shape=None):
+        """detections: iterable of (label, conf, bbox) from a single detector pass.
+
+        Accepted sightings get a 'zone' from zone_map (an O(1) grid lookup) when given.
+        Returns the list of item names whose record was updated.
+        """
+        best = {}
+        for label, conf, bbox in detections:
+            item = self.item_for_label(label, single_class)
+            if item is None:
+                continue
+            cur = best.get(item)
+            if cur is None or conf > cur[0]:
+                best[item] = (conf, bbox, label)
+
+        updated = []
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            for item, (conf, bbox, label) in best.items():
+                if conf < self.items[item]['threshold']:
+                    continue
+                zone = zone_map.lookup(bbox, frame_shape) if zone_map is not None else None
+                self.records[item].update({'place': place, 'zone': zone, 'time': ts, 'conf': conf,
+                                           'bbox': bbox, 'label': label})
+                updated.append(item)
+        return updated
+
+    def match_query(self, text):
+        """Return the tracked item mentioned in a spoken query, or None."""
+        low = (text or '').lower()
+        for name, pattern in self._query_res.items():
+            if pattern.search(low):
+                return name
+        return None
+
+    def get(self, item):
+        with self.lock:
+            rec = self.records.get(item)
+            return dict(rec) if rec else None
+
+    def snapshot(self):
+        with self.lock:
+            data = {name: dict(rec) for name, rec in self.records.items()}
+        for rec in data.values():
+            if isinstance(rec.get('bbox'), tuple):
+                rec['bbox'] = list(rec['bbox'])
+            if rec.get('time'):
+                rec['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rec['time']))
+        return data
+
+    def describe(self, item):
+        """Spoken answer built from the stored sighting."""
+        rec = self.get(item)
+        if not rec or rec.get('time') is None:
+            return f"I have not seen your {item} yet."
+        time_iso = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rec['time']))
+        verb = 'were' if item.endswith('s') else 'was'
+        place = rec.get('place') or 'an unknown place'
+        if rec.get('zone'):
+            return f"Your {item} {verb} last seen {rec['zone']}, in {place}, at {time_iso}."
+        return f"Your {item} {verb} last seen at {place}, at {time_iso}."
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                with self.lock:
+                    for name, rec in data.items():
+                        if name in self.records and isinstance(rec, dict):
+                            self._set_record(name, rec)
+                self.log('ITEMS', "loaded %d records from %s", len(data), self.path)
+            except Exception as e:
+                self.log('ITEMS', "load failed: %s", e, level='error')
+        if self._migrate_legacy():
+            self.save()
+
+    def save(self):
+        try:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            self.log('ITEMS', "save failed: %s", e, level='error')
+
+    def _set_record(self, name, rec):
+        bbox = rec.get('bbox')
+        self.records[name].update({
+            'place': rec.get('place'),
+            'zone': rec.get('zone'),
+            'time': rec.get('time'),
+            'conf': rec.get('conf'),
+            'bbox': tuple(bbox) if isinstance(bbox, list) else bbox,
+            'label': rec.get('label'),
+        })
+
+    def _migrate_legacy(self):
+        """Import legacy single-item records newer than the registry's; True if any was imported."""
+        migrated = False
+        for name, path in self.legacy_paths.items():
+            if name not in self.records or not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r') as f:
+                    rec = json.load(f)
+                with self.lock:
+                    if not isinstance(rec, dict) or rec.get('time') is None or \
+                            (self.records[name]['time'] or 0) >= rec['time']:
+                        continue
+                    self._set_record(name, rec)
+                migrated = True
+                self.log('ITEMS', "migrated %s from %s", name, path)
+            except Exception as e:
+                self.log('ITEMS', "could not migrate %s: %s", path, e, level='warning')
+        return migrated
+
+
+class ItemSearch:
+    """Bounded high-effort search windows opened by "where is my ..." queries.
+
+    While any window is open the camera loop runs the item model every frame on
+    tiled crops and pauses the kitchen model; items not seen before their deadline
+    are answered from the stored sighting instead.
+    """
+
+    def __init__(self, window=20.0, clock=time.monotonic):
+        self.window = float(window)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._deadlines = {}  # item -> clock() deadline
+
+    def start(self, item):
+        with self.lock:
+            self._deadlines[item] = self.clock() + self.window
+
+    def active(self):
+        with self.lock:
+            return bool(self._deadlines)
+
+    def found(self, updated):
+        """Items from this pass's updates that were being searched for (closes their window)."""
+        with self.lock:
+            hits = [i for i in updated if i in self._deadlines]
+            for i in hits:
+                del self._deadlines[i]
+        return hits
+
+    def expired(self):
+        now = self.clock()
+        with self.lock:
+            gone = [i for i, t in self._deadlines.items() if now >= t]
+            for i in gone:
+                del self._deadlines[i]
+        return gone
@@ -0,0 +1,186 @@
+# live_config.py
+"""
+Hot-reloadable tuning values (thresholds, weights, cadences) for a running loop.
+
+LiveConfig holds one immutable snapshot of the tunable values plus a version
+number. A change can come from three places: an edit to the JSON file (picked
+up by poll(), an mtime check), SIGHUP (which makes the next poll() reload), or
+apply() from the API. Either way the full set is validated against the schema
+first and then swapped in as a single reference, so a reader never sees half
+an update. The camera loop reads `values` once per frame and re-applies side
+effects (deque sizes, registry thresholds) at a frame boundary when `version`
+moves. Models, camera and audio are never touched. Every change is logged with
+its version, source and the keys that changed.
+"""
+
+import json
+import math
+import os
+import signal
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+
+from event_log import print_log
+
+
+# ---------- validators: value -> coerced value, or raise ValueError ----------
+def finite_float(v):
+    v = float(v)
+    if not math.isfinite(v):
+        raise ValueError(f"{v} is not a finite number")
+    return v
+
+
+def unit_float(v):
+    v = finite_float(v)
+    if not 0.0 <= v <= 1.0:
+        raise ValueError(f"{v} not in [0, 1]")
+    return v
+
+
+def positive_float(v):
+    v = finite_float(v)
+    if v <= 0:
+        raise ValueError(f"{v} must be > 0")
+    return v
+
+
+def positive_int(v):
+    if isinstance(v, bool) or int(v) != float(v):
+        raise ValueError(f"{v} must be an integer")
+    v = int(v)
+    if v < 1:
+        raise ValueError(f"{v} must be >= 1")
+    return v
+
+
+def float_map(keys, item=finite_float):
+    """Dict over exactly `keys` (partial updates merge onto the current dict)."""
+    def check(v, current=None):
+        if not isinstance(v, dict):
+            raise ValueError("expected an object")
+        unknown = set(v) - set(keys)
+        if unknown:
+            raise ValueError(f"unknown keys {sorted(unknown)}")
+        merged = dict(current or {})
+        merged.update({k: item(x) for k, x in v.items()})
+        missing = set(keys) - set(merged)
+        if missing:
+            raise ValueError(f"missing keys {sorted(missing)}")
+        return merged
+    check.merges = True
+    return check
+
+
+class LiveConfig:
+    def __init__(self, path, defaults, schema, check=None, history=50, log=None):
+        """defaults: {key: value}; schema: {key: validator}; check(values) raises on cross-field errors."""
+        self.path = path
+        self.schema = dict(schema)
+        self.check = check
+        self.log = log or print_log
+        self._lock = threading.Lock()  # serialises writers; readers never take it
+        self._mtime = None
+        self._signalled = False
+        self._overrides = {}  # what the file holds: only keys set there or through apply()
+        self.history = deque(maxlen=history)
+        self.defaults = self._validate(dict(defaults), {})
+        self.values = MappingProxyType(self.defaults)
+        self.version = 0
+
+    # ---------- readers (any thread) ----------
+    def snapshot(self):
+        return {'version': self.version, 'values': dict(self.values), 'history': list(self.history)}
+
+    # ---------- writers ----------
+    def apply(self, changes, source='api', persist=True):
+        """Validate `changes` on top of the current values and swap them in; raises ValueError if invalid."""
+        with self._lock:
+            new = self._validate(changes, dict(self.values))
+            version = self._swap(new, source)
+            self._overrides.update((k, new[k]) for k in changes)
+            if persist:
+                self._persist()
+        return version
+
+    def load(self, source='file'):
+        """Replace the values with defaults + the file's overrides. Invalid files keep the running values."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            self._mtime = os.path.getmtime(self.path)  # a bad file is reported once, not on every poll
+            with open(self.path, 'r') as f:
+                overrides = json.load(f)
+            with self._lock:
+                new = self._validate(overrides, dict(self.defaults))
+                self._swap(new, source)
+                self._overrides = {k: new[k] for k in overrides}
+            return True
+        except Exception as e:
+            self.log('CONFIG', "%s rejected, keeping v%d: %s", self.path, self.version, e, level='error')
+            return False
+
+    def poll(self):
+        """Cheap per-loop check: reload on SIGHUP or when the file's mtime changed."""
+        if self._signalled:
+            self._signalled = False
+            return self.load('signal')
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.load('file')
+
+    def install_signal_handler(self, signum=None):
+        """SIGHUP (where it exists) makes the next poll() reload; call from the main thread."""
+        signum = signum if signum is not None else getattr(signal, 'SIGHUP', None)
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_: setattr(self, '_signalled', True))
+        return True
+
+    # ---------- internals ----------
+    def _validate(self, changes, current):
+        if not isinstance(changes, dict):
+            raise ValueError("config must be a JSON object")
+        unknown = set(changes) - set(self.schema)
+        if unknown:
+            raise ValueError(f"unknown settings {sorted(unknown)}")
+        new = dict(current)
+        for key, value in changes.items():
+            validator = self.schema[key]
+            try:
+                if getattr(validator, 'merges', False):
+                    new[key] = validator(value, current.get(key))
+                else:
+                    new[key] = validator(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{key}: {e}")
+        if self.check is not None:
+            self.check(new)
+        return new
+
+    def _swap(self, new, source):
+        old = self.values
+        changed = {k: [old.get(k), v] for k, v in new.items() if old.get(k) != v}
+        if not changed and self.version:
+            return self.version
+        self.values = MappingProxyType(new)  # single reference swap
+        self.version += 1
+        self.history.append({'version': self.version, 'time': time.time(), 'source': source,
+                             'changed': sorted(changed)})
+        self.log('CONFIG', "v%d from %s: %s", self.version, source,
+                 ", ".join(f"{k} {a} -> {b}" for k, (a, b) in changed.items()) or "no changes")
+        return self.version
+
+    def _persist(self):
+        """Write the overrides only, so defaults changed later (env, constants) still apply."""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._overrides, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
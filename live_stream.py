@@ -0,0 +1,144 @@
+# live_stream.py
+"""
+Encode-once, fan-out MJPEG broadcaster for the caregiver live view.
+
+The camera loop only hands over a frame reference via publish(). A background
+encoder thread resizes + JPEG-encodes the newest frame at most `fps` times per
+second and shares that single buffer with every connected viewer. Encoding
+sleeps while nobody is watching, and viewers always read the latest buffer,
+so a slow client just skips frames instead of holding up the camera loop.
+
+Viewer slots are counted with acquire(max_clients) / release(): the check and
+the increment happen under one lock, so concurrent requests can't overshoot
+the cap, and the HTTP layer releases the slot when the response is closed,
+even if the stream never started. A viewer's stream ends once no new frame
+has arrived for `idle_timeout` seconds (camera restarting or gone), so a
+stalled camera can't pin the slots; the client reconnects when it is back.
+"""
+
+import threading
+import time
+
+import cv2
+
+from event_log import print_log
+
+
+MJPEG_BOUNDARY = "frame"
+MJPEG_MIMETYPE = f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
+
+
+class MjpegBroadcaster:
+    mimetype = MJPEG_MIMETYPE
+
+    def __init__(self, fps=5.0, width=320, quality=70, idle_timeout=10.0, log=None):
+        self.fps = max(0.1, float(fps))
+        self.width = int(width)
+        self.quality = int(quality)
+        self.idle_timeout = float(idle_timeout)
+        self.log = log or print_log
+        self._cond = threading.Condition()
+        self._pending = None   # newest raw frame handed over by the camera loop
+        self._jpeg = None      # newest encoded buffer, shared by all viewers
+        self._seq = 0
+        self._clients = 0
+        self._running = False
+        self._thread = None
+
+    @property
+    def clients(self):
+        return self._clients
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def acquire(self, max_clients=None):
+        """Reserve a viewer slot; False when `max_clients` viewers are already watching."""
+        with self._cond:
+            watching = self._clients
+            full = max_clients is not None and watching >= max_clients
+            if not full:
+                self._clients += 1
+                self._cond.notify_all()
+        if full:
+            self.log('STREAM', "viewer rejected, %d/%d watching", watching, max_clients, level='warning')
+        return not full
+
+    def release(self):
+        with self._cond:
+            self._clients = max(0, self._clients - 1)
+
+    def publish(self, frame):
+        """Called from the camera loop; never encodes, never blocks on viewers."""
+        if self._clients == 0:
+            return
+        with self._cond:
+            self._pending = frame
+            self._cond.notify_all()
+
+    def _encode(self, frame):
+        h, w = frame.shape[:2]
+        if self.width and w > self.width:
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        return buf.tobytes() if ok else None
+
+    def _encode_loop(self):
+        interval = 1.0 / self.fps
+        next_due = 0.0
+        while True:
+            # Wait out the frame interval first so we always encode the freshest frame
+            delay = next_due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            with self._cond:
+                while self._running and (self._clients == 0 or self._pending is None):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame, self._pending = self._pending, None
+            try:
+                jpeg = self._encode(frame)
+            except Exception as e:
+                self.log('STREAM', "encode failed: %s", e, level='error')
+                jpeg = None
+            next_due = time.time() + interval
+            if jpeg is None:
+                continue
+            with self._cond:
+                self._jpeg = jpeg
+                self._seq += 1
+                self._cond.notify_all()
+
+    def frames(self):
+        """Generator for a single viewer holding a slot from acquire(); yields multipart MJPEG parts."""
+        with self._cond:
+            last_seq = self._seq
+        while self._running:
+            with self._cond:
+                deadline = time.monotonic() + self.idle_timeout
+                while self._running and self._seq == last_seq:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                if self._seq == last_seq:
+                    if self._running:
+                        self.log('STREAM', "no frame for %.0fs, ending viewer stream", self.idle_timeout,
+                                 level='warning')
+                    return
+                jpeg, last_seq = self._jpeg, self._seq
+            if jpeg is None:
+                continue
+            yield (b"--" + MJPEG_BOUNDARY.encode() + b"\r\n"
+                   b"Content-Type: image/jpeg\r\n"
+                   b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Load test for the REST API (api_server.py) against a stub state source.
+
+A fake camera thread updates presence / last-seen at the rate a real loop
+would (inference is simulated with sleep, which releases the GIL like YOLO
+does). The script measures camera FPS alone, then again while concurrent
+keep-alive clients hammer /api/summary, /api/presence and /api/last_seen,
+and reports requests/s and p50/p99 latency per endpoint.
+
+    python load_test.py --mode production --clients 16 --duration 10
+    python load_test.py --mode dev --cache-ttl 0 --no-gzip
+"""
+
+import argparse
+import http.client
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+from api_server import create_api_app, serve_api
+from item_registry import ItemRegistry
+from presence_timeline import PresenceTimeline
+
+ENDPOINTS = ("/api/summary", "/api/presence", "/api/last_seen")
+
+
+class StubState:
+    """Same attributes the API reads from Scene_Prediction, filled by a fake camera loop."""
+
+    def __init__(self, workdir):
+        self.state_lock = threading.Lock()
+        self.LAST_SEEN_JSON_PATH = os.path.join(workdir, 'last_spec_seen.json')
+        self.PRESENCE_JSON_PATH = os.path.join(workdir, 'presence.json')
+        self.item_registry = ItemRegistry(path=os.path.join(workdir, 'items.json'), lock=self.state_lock)
+        self.presence_timeline = PresenceTimeline(os.path.join(workdir, 'timeline.jsonl'))
+        self.last_spec_seen = self.item_registry.records['spectacles']
+        self.last_presence = None
+
+
+class FakeCamera:
+    def __init__(self, state, infer_s=0.03, cpu_iters=20000):
+        self.state = state
+        self.infer_s = infer_s
+        self.cpu_iters = cpu_iters  # pure-Python per-frame work (holds the GIL)
+        self.frames = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            time.sleep(self.infer_s)
+            acc = 0
+            for i in range(self.cpu_iters):
+                acc += i & 7
+            now = time.time()
+            loc = random.choice(('Kitchen', 'EE Department Level 3'))
+            payload = {'location': loc, 'is_kitchen': loc == 'Kitchen', 'reason': 'stub',
+                       'score': float(acc % 5), 'time': now,
+                       'time_iso': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))}
+            with self.state.state_lock:
+                self.state.last_presence = payload
+            self.state.presence_timeline.record(loc, now, payload['score'])
+            self.state.item_registry.observe([('Spectacle', 0.9, (10, 20, 110, 90))], loc, ts=now)
+            self.frames += 1
+
+    def measure_fps(self, seconds):
+        start = self.frames
+        time.sleep(seconds)
+        return (self.frames - start) / seconds
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def client_worker(port, deadline, use_gzip, results, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    headers = {'Accept-Encoding': 'gzip'} if use_gzip else {}
+    i = random.randrange(len(ENDPOINTS))
+    while time.time() < deadline:
+        path = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+                continue
+        except Exception as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            continue
+        results[path].append(time.perf_counter() - t0)
+    conn.close()
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--mode', choices=('production', 'dev'), default='production')
+    ap.add_argument('--threads', type=int, default=4, help='API worker threads (production mode)')
+    ap.add_argument('--clients', type=int, default=16)
+    ap.add_argument('--duration', type=float, default=10.0)
+    ap.add_argument('--cache-ttl', type=float, default=1.0)
+    ap.add_argument('--no-gzip', action='store_true')
+    ap.add_argument('--infer-ms', type=float, default=30.0, help='simulated inference time per frame')
+    args = ap.parse_args()
+    # per-request access logs / queue-depth warnings would dominate the run
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+
+    workdir = tempfile.mkdtemp(prefix='cognia_load_')
+    state = StubState(workdir)
+    camera = FakeCamera(state, infer_s=args.infer_ms / 1000.0)
+    camera.start()
+
+    use_gzip = not args.no_gzip
+    app = create_api_app(state, use_gzip=use_gzip, cache_ttl=args.cache_ttl)
+    port = free_port()
+    threading.Thread(target=serve_api, args=(app, '127.0.0.1', port),
+                     kwargs={'mode': args.mode, 'threads': args.threads}, daemon=True).start()
+    if not wait_for_server(port):
+        raise SystemExit("API server did not start")
+
+    fps_idle = camera.measure_fps(min(5.0, args.duration))
+
+    results = {p: [] for p in ENDPOINTS}
+    errors = []
+    deadline = time.time() + args.duration
+    clients = [threading.Thread(target=client_worker, args=(port, deadline, use_gzip, results, errors), daemon=True)
+               for _ in range(args.clients)]
+    t0 = time.perf_counter()
+    for c in clients:
+        c.start()
+    fps_loaded = camera.measure_fps(args.duration * 0.9)
+    for c in clients:
+        c.join()
+    elapsed = time.perf_counter() - t0
+    camera.stop()
+
+    total = sum(len(v) for v in results.values())
+    print(f"mode={args.mode} threads={args.threads} clients={args.clients} "
+          f"gzip={use_gzip} cache_ttl={args.cache_ttl}s duration={elapsed:.1f}s")
+    print(f"{'endpoint':<16}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for path, lat in results.items():
+        print(f"{path:<16}{len(lat):>10}{percentile(lat, 50) * 1000:>10.2f}{percentile(lat, 99) * 1000:>10.2f}")
+    all_lat = [x for v in results.values() for x in v]
+    print(f"total: {total / elapsed:.0f} req/s, p99 {percentile(all_lat, 99) * 1000:.2f} ms, errors {len(errors)}")
+    print(f"camera fps: {fps_idle:.1f} idle -> {fps_loaded:.1f} under load "
+          f"({(fps_loaded / fps_idle - 1) * 100 if fps_idle else 0:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
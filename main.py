@@ -7,6 +7,9 @@ Headless (no Qt) version:
  - Porcupine wake-word ("Hey Pico")
  - AssemblyAI streaming ASR
  - gTTS playback via pygame
+ - one asyncio loop (voice_runtime.py) owns wake-word, ASR, intents, TTS queue and timers
+ - supervisor.py restarts a camera / voice / API thread that exits or raises; the models are loaded
+   once in a parent process that re-forks the worker (all three threads) if it dies
  - Presence + last-seen persistence (JSON files)
 
 Config via environment variables:
@@ -20,7 +23,6 @@ import sys
 import time
 import json
 import threading
-import traceback
 from collections import deque
 
 # Ensure no GUI backend is requested
@@ -64,23 +66,90 @@ except Exception as e:
     print("[ERROR] Porcupine/PvRecorder import failed:", e)
     raise
 
-import requests
+
+from item_registry import ItemRegistry, ItemSearch
+from zone_map import ZoneMap
+from presence_timeline import PresenceTimeline
+from voice_runtime import VoiceRuntime
+from frame_governor import FrameGovernor, DEFAULT_LEVELS, with_spec_cadence
+from phrase_translator import PhraseTranslator
+from camera_probe import CameraProbe
+from event_log import EventLog
+from snapshot_cache import SnapshotCache
+from live_config import LiveConfig, unit_float, positive_int, positive_float
+from supervisor import Supervisor, fork_supported
+from frame_pyramid import FramePyramid, to_frame
+from voiceflow_client import VoiceflowClient, VoiceflowError
 
 # -------------------------
 # CONFIG (edit / override via env)
 # -------------------------
 MODEL_KITCHEN = os.environ.get("MODEL_KITCHEN", "/home/zhipin/Documents/scene_integration/my_model.pt")
 MODEL_SPEC = os.environ.get("MODEL_SPEC", "/home/zhipin/Documents/scene_integration/my_model_spec.pt")
-LAST_SEEN_JSON_PATH = os.environ.get("LAST_SEEN_JSON_PATH", "last_spec_seen.json")
+LAST_SEEN_JSON_PATH = os.environ.get("LAST_SEEN_JSON_PATH", "last_spec_seen.json")  # legacy; imported on load
 PRESENCE_JSON_PATH = os.environ.get("PRESENCE_JSON_PATH", "presence.json")
-
-SPEC_EVERY_N = int(os.environ.get("SPEC_EVERY_N", "3"))
+ITEMS_JSON_PATH = os.environ.get("ITEMS_JSON_PATH", "last_seen_items.json")
+ZONES_JSON_PATH = os.environ.get("ZONES_JSON_PATH", "zones.json")
+TIMELINE_PATH = os.environ.get("TIMELINE_PATH", "presence_timeline.jsonl")
+# Cropped JPEG of each accepted sighting, encoded off the camera thread; directory capped at SNAPSHOT_MAX_MB
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_MAX_MB = float(os.environ.get("SNAPSHOT_MAX_MB", "20"))
+SNAPSHOT_WIDTH = int(os.environ.get("SNAPSHOT_WIDTH", "320"))
+# Best camera config found by the first probe; CAMERA_REPROBE=1 ignores it once
+CAMERA_PROFILE_PATH = os.environ.get("CAMERA_PROFILE_PATH", "camera_profile.json")
+CAMERA_REPROBE = os.environ.get("CAMERA_REPROBE", "0") == "1"
+CAMERA_BUFFER_SIZE = int(os.environ.get("CAMERA_BUFFER_SIZE", "1"))  # driver frames queued; 1 = newest only
+CAMERA_MAX_READ_FAILURES = int(os.environ.get("CAMERA_MAX_READ_FAILURES", "50"))  # in a row, then reopen
+# Tuning overrides applied while running (file edit, SIGHUP or PUT /api/config); env values are the defaults
+LIVE_CONFIG_PATH = os.environ.get("LIVE_CONFIG_PATH", "live_config.json")
+
+# Item model cadence when nobody is searching (at full governor level; lighter levels stretch it
+# in proportion to their spec_every_n), and the "where is my ..." search window
+SPEC_IDLE_EVERY_N = int(os.environ.get("SPEC_IDLE_EVERY_N", "10"))
+SEARCH_WINDOW = float(os.environ.get("SEARCH_WINDOW", "20"))
+SEARCH_TILES = int(os.environ.get("SEARCH_TILES", "2"))  # NxN overlapping crops during search
 PRESENCE_PUSH_INTERVAL = float(os.environ.get("PRESENCE_PUSH_INTERVAL", "15"))
 
+# Adaptive governor: share of the capture frame period inference may use, and CPU temperature band (deg C)
+GOVERNOR_ENABLED = os.environ.get("GOVERNOR_ENABLED", "1") != "0"
+GOV_FRAME_BUDGET = float(os.environ.get("GOV_FRAME_BUDGET", "0.8"))
+GOV_TEMP_HIGH = float(os.environ.get("GOV_TEMP_HIGH", "75"))
+GOV_TEMP_LOW = float(os.environ.get("GOV_TEMP_LOW", "65"))
+
 ASSEMBLYAI_API_KEY = os.environ.get("ASSEMBLYAI_API_KEY")
 PICOVOICE_ACCESS_KEY = os.environ.get("PICOVOICE_ACCESS_KEY", "FSo7LADnWrT20JU6nUyBrhypXy+U/1AikrLYeaPmwNHE1yQTDJ/aog==")
 KEYWORD_PATH = os.environ.get("KEYWORD_PATH", "/home/zhipin/Documents/scene_integration/hey-pico_en_raspberry-pi_v3_0_0.ppn")
 
+# Voice runtime: executor threads for blocking SDK calls, seconds of silence before the ASR session closes
+VOICE_WORKERS = int(os.environ.get("VOICE_WORKERS", "4"))
+RESPONSE_LANG = os.environ.get("RESPONSE_LANG", "en")  # 'en' or 'ms' (Bahasa Melayu) for spoken replies
+ASR_SESSION_IDLE = float(os.environ.get("ASR_SESSION_IDLE", "20"))
+
+# Voiceflow mode ("start" / "exit voiceflow"): pooled connection, streamed replies spoken sentence by sentence.
+# VOICEFLOW_PROJECT_ID enables the streaming endpoint; without it whole replies are fetched.
+VOICEFLOW_API_KEY = os.environ.get("VOICEFLOW_API_KEY")
+VOICEFLOW_PROJECT_ID = os.environ.get("VOICEFLOW_PROJECT_ID")
+VOICEFLOW_URL = os.environ.get("VOICEFLOW_URL", "https://general-runtime.voiceflow.com")
+VOICEFLOW_VERSION = os.environ.get("VOICEFLOW_VERSION", "production")
+VOICEFLOW_USER_ID = os.environ.get("VOICEFLOW_USER_ID", "cognia")  # conversation state is kept per user id
+VOICEFLOW_TIMEOUT = float(os.environ.get("VOICEFLOW_TIMEOUT", "15"))  # seconds without data before giving up
+VOICEFLOW_RETRIES = int(os.environ.get("VOICEFLOW_RETRIES", "2"))
+
+# Logging: ring of recent records (served at /api/logs), per-message rate limit, JSON lines for journald
+LOG_RING_SIZE = int(os.environ.get("LOG_RING_SIZE", "500"))
+LOG_RATE_WINDOW = float(os.environ.get("LOG_RATE_WINDOW", "10"))  # seconds
+LOG_RATE_BURST = int(os.environ.get("LOG_RATE_BURST", "5"))       # lines per message per window
+LOG_JSON = os.environ.get("LOG_JSON", "0") == "1"
+DIAG_API_PORT = int(os.environ.get("DIAG_API_PORT", "0"))  # >0 serves the REST API (incl. /api/logs) on this port
+# Bearer token for PUT /api/config and /api/zones; unset = writes only from localhost
+API_WRITE_TOKEN = os.environ.get("API_WRITE_TOKEN")
+
+# Crash recovery: 'fork' loads the models once in a parent that re-forks a dead worker, 'thread' only
+# restarts failed subsystem threads, 'off' runs them unsupervised. Restarts back off while crash-looping.
+SUPERVISOR_MODE = os.environ.get("SUPERVISOR_MODE", "fork")
+RESTART_DELAY = float(os.environ.get("RESTART_DELAY", "0.5"))     # seconds before a restart
+RESTART_MAX_DELAY = float(os.environ.get("RESTART_MAX_DELAY", "30"))
+
 # optional: set PV device index via env; if unset, we'll try a fallback approach
 PV_DEVICE_INDEX = os.environ.get("PV_DEVICE_INDEX", None)
 if PV_DEVICE_INDEX is not None:
@@ -89,8 +158,7 @@ if PV_DEVICE_INDEX is not None:
     except Exception:
         PV_DEVICE_INDEX = None
 
-# Other settings
-SPECTACLE_LABELS = {'spectacle','glasses','spectacles','eyeglasses','sunglasses'}
+# Other settings (per-item labels/thresholds live in item_registry.DEFAULT_TRACKED_ITEMS)
 SPEC_THRESHOLD = float(os.environ.get("SPEC_THRESHOLD", "0.60"))
 
 # -------------------------
@@ -98,18 +166,57 @@ SPEC_THRESHOLD = float(os.environ.get("SPEC_THRESHOLD", "0.60"))
 # -------------------------
 state_lock = threading.Lock()
 last_presence = None
-last_spec_seen = {'place': None, 'time': None, 'conf': None, 'bbox': None, 'label': None}
-wake_active = False
-find_spec_mode = False
-voiceflow_mode = False  # not used now, kept for compatibility
+# Hot paths only enqueue; one sink thread formats, rate-limits and writes
+event_log = EventLog(capacity=LOG_RING_SIZE, window=LOG_RATE_WINDOW, burst=LOG_RATE_BURST, json_lines=LOG_JSON).start()
+# All tracked items (spectacles, keys, wallet, ...) filled from one detector pass
+# Sole store of sightings; a last_spec_seen.json from older versions is imported on load
+item_registry = ItemRegistry(path=ITEMS_JSON_PATH, thresholds={'spectacles': SPEC_THRESHOLD}, lock=state_lock,
+                             legacy_paths={'spectacles': LAST_SEEN_JSON_PATH}, log=event_log.log)
+last_spec_seen = item_registry.records['spectacles']  # same dict; /api/last_seen reads it
+item_search = ItemSearch(window=SEARCH_WINDOW)  # items the user asked about, searched hard until found or timeout
+zone_map = ZoneMap(ZONES_JSON_PATH, log=event_log.log)  # per-camera named zones, picked up on file change
+# Presence history as merged intervals; a sample may be up to 3 pushes late and still extend one
+presence_timeline = PresenceTimeline(TIMELINE_PATH, max_gap=3 * PRESENCE_PUSH_INTERVAL, log=event_log.log)
+# Disabling the governor pins it at level 0; the item model's idle cadence starts at SPEC_IDLE_EVERY_N
+# and stretches as the governor sheds load (10 / 13 / 20 / 27 / 40 frames with the default levels)
+_gov_levels = DEFAULT_LEVELS if GOVERNOR_ENABLED else DEFAULT_LEVELS[:1]
+governor = FrameGovernor(with_spec_cadence(_gov_levels, SPEC_IDLE_EVERY_N),
+                         frame_budget=GOV_FRAME_BUDGET, temp_high=GOV_TEMP_HIGH, temp_low=GOV_TEMP_LOW,
+                         log=event_log.log)
+# Hot-reloadable tuning values; the env settings above are the defaults
+live_config = LiveConfig(LIVE_CONFIG_PATH, defaults={
+    'SPEC_THRESHOLD': SPEC_THRESHOLD, 'SPEC_IDLE_EVERY_N': SPEC_IDLE_EVERY_N,
+    'SEARCH_WINDOW': SEARCH_WINDOW, 'PRESENCE_PUSH_INTERVAL': PRESENCE_PUSH_INTERVAL,
+    'GOV_FRAME_BUDGET': GOV_FRAME_BUDGET,
+}, schema={
+    'SPEC_THRESHOLD': unit_float, 'SPEC_IDLE_EVERY_N': positive_int,
+    'SEARCH_WINDOW': positive_float, 'PRESENCE_PUSH_INTERVAL': positive_float, 'GOV_FRAME_BUDGET': unit_float,
+}, log=event_log.log)
+# Restarts the camera / voice / API subsystems; uptime and restart counters at /api/supervisor
+supervisor = Supervisor(restart_delay=RESTART_DELAY, max_delay=RESTART_MAX_DELAY, log=event_log.log)
+# Offline EN<->BM phrase translator; BM system prompts are prebuilt at startup
+translator = PhraseTranslator()
+snapshot_cache = SnapshotCache(SNAPSHOT_DIR, max_bytes=int(SNAPSHOT_MAX_MB * 1024 * 1024), width=SNAPSHOT_WIDTH,
+                               log=event_log.log)
+camera_probe = None  # set by open_camera(); chosen config + measured read latency / FPS
+# Voice I/O backends; None means the real SDK / hardware. voice_rig.py swaps in recorded
+# PCM, a fake keyword engine and a scripted streaming client to benchmark without a mic or keys.
+wake_engine_factory = None    # () -> Porcupine-like: .frame_length, .process(pcm) -> int, .delete()
+wake_recorder_factory = None  # (device_index, frame_length) -> PvRecorder-like: .start(), .read(), .stop(), .delete()
+asr_client_factory = None     # () -> StreamingClient-like: .on(), .connect(), .stream(), .disconnect()
+asr_audio_factory = None      # (sample_rate) -> iterable of PCM byte chunks with .close()
+voiceflow_mode = False  # "start" routes turns to Voiceflow until "exit voiceflow" (voice loop thread only)
+voiceflow = VoiceflowClient(VOICEFLOW_API_KEY, project_id=VOICEFLOW_PROJECT_ID, base_url=VOICEFLOW_URL,
+                            version=VOICEFLOW_VERSION, read_timeout=VOICEFLOW_TIMEOUT, retries=VOICEFLOW_RETRIES,
+                            log=event_log.log)
 last_transcript = ""
 recent_decisions = deque(maxlen=5)
 
 # -------------------------
 # Utilities: TTS (gTTS + pygame)
 # -------------------------
-def speak_text(text, lang='en'):
-    """Blocking tts then playback (non-fatal)."""
+def speak_text(text, lang='en', on_play=None):
+    """Blocking tts then playback (non-fatal). on_play() is called as audio starts."""
     if not text:
         return
     try:
@@ -120,53 +227,28 @@ def speak_text(text, lang='en'):
             pygame.mixer.init(frequency=44100)
             pygame.mixer.music.load(fname)
             pygame.mixer.music.play()
+            if on_play:
+                on_play()
             while pygame.mixer.music.get_busy():
                 pygame.time.wait(50)
         except Exception as e:
-            print("[TTS] playback error:", e)
+            event_log.error('TTS', "playback error: %s", e)
         try:
             os.remove(fname)
         except Exception:
             pass
     except Exception as e:
-        print("[TTS] failed to create/play TTS:", e)
+        event_log.error('TTS', "failed to create/play TTS: %s", e)
 
 def speak_text_async(text, lang='en'):
-    threading.Thread(target=speak_text, args=(text, lang), daemon=True).start()
+    """Queue text on the voice loop's TTS worker; safe to call from any thread."""
+    if RESPONSE_LANG == 'ms' and lang == 'en':
+        text, lang = translator.localize(text, 'ms'), 'ms'
+    voice.speak(text, lang)
 
 # -------------------------
 # Persistence helpers
 # -------------------------
-def load_last_seen():
-    global last_spec_seen
-    if os.path.exists(LAST_SEEN_JSON_PATH):
-        try:
-            with open(LAST_SEEN_JSON_PATH, 'r') as f:
-                data = json.load(f)
-            with state_lock:
-                last_spec_seen.update({
-                    'place': data.get('place'),
-                    'time': data.get('time'),
-                    'conf': data.get('conf'),
-                    'bbox': tuple(data['bbox']) if isinstance(data.get('bbox'), list) else data.get('bbox'),
-                    'label': data.get('label')
-                })
-            print("[STATE] loaded last_spec_seen")
-        except Exception as e:
-            print("[STATE] load failed:", e)
-
-def save_last_seen():
-    try:
-        data = dict(last_spec_seen)
-        if isinstance(data.get('bbox'), tuple):
-            data['bbox'] = list(data['bbox'])
-        if data.get('time'):
-            data['time_iso'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data['time']))
-        with open(LAST_SEEN_JSON_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print("[STATE] save failed:", e)
-
 def push_presence_update(location, reason, is_kitchen, score=None, speak=False):
     global last_presence
     try:
@@ -180,26 +262,37 @@ def push_presence_update(location, reason, is_kitchen, score=None, speak=False):
             'time_iso': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
         }
         with state_lock:
+            prev = last_presence
             last_presence = payload
-        with open(PRESENCE_JSON_PATH, 'w') as f:
-            json.dump(payload, f, indent=2)
+        presence_timeline.record(location, ts, score)
+        # presence.json only changes when the location does; the timeline keeps the history
+        if prev is None or prev['location'] != location or prev['is_kitchen'] != payload['is_kitchen']:
+            with open(PRESENCE_JSON_PATH, 'w') as f:
+                json.dump(payload, f, indent=2)
         if speak:
             speak_text_async(f"Presence: {payload['location']}. Reason: {reason}", 'en')
     except Exception as e:
-        print("[PRESENCE] failed:", e)
+        event_log.error('PRESENCE', "failed: %s", e)
 
 # -------------------------
 # YOLO model loading
 # -------------------------
-if not os.path.exists(MODEL_KITCHEN):
-    raise FileNotFoundError(f"Kitchen model missing: {MODEL_KITCHEN}")
-if not os.path.exists(MODEL_SPEC):
-    raise FileNotFoundError(f"Spec model missing: {MODEL_SPEC}")
+model = None
+spec_model = None
 
-print("[MODEL] loading YOLO models ...")
-model = YOLO(MODEL_KITCHEN, task='detect')
-spec_model = YOLO(MODEL_SPEC, task='detect')
-print("[MODEL] models loaded")
+def load_models():
+    """Load both YOLO models once; the camera loop calls this, the voice path never needs them."""
+    global model, spec_model
+    if model is not None:
+        return
+    if not os.path.exists(MODEL_KITCHEN):
+        raise FileNotFoundError(f"Kitchen model missing: {MODEL_KITCHEN}")
+    if not os.path.exists(MODEL_SPEC):
+        raise FileNotFoundError(f"Spec model missing: {MODEL_SPEC}")
+    print("[MODEL] loading YOLO models ...")
+    model = YOLO(MODEL_KITCHEN, task='detect')
+    spec_model = YOLO(MODEL_SPEC, task='detect')
+    print("[MODEL] models loaded")
 
 def safe_conf_from_box(box):
     try:
@@ -223,8 +316,8 @@ def safe_xyxy_from_box(box):
         pass
     return None
 
-def detect_objects(frame):
-    res = model(frame, verbose=False)[0]
+def detect_objects(frame, imgsz=640):
+    res = model(frame, imgsz=imgsz, verbose=False)[0]
     best = {}
     names = res.names
     for box in res.boxes:
@@ -238,18 +331,50 @@ def detect_objects(frame):
             continue
     return res.boxes, best, names
 
-def detect_spectacles(frame):
-    res = spec_model(frame, verbose=False)[0]
+def safe_label_from_box(box, names):
+    try:
+        return names[int(box.cls[0])]
+    except Exception:
+        return None
+
+def detect_spectacles(frame, imgsz=640):
+    """Single pass of the item model; its boxes feed every tracked item in the registry."""
+    res = spec_model(frame, imgsz=imgsz, verbose=False)[0]
     return res.boxes, res.names
 
+def detect_items_tiled(frame, imgsz=640, tiles=2, overlap=0.25):
+    """Search mode: item model on overlapping crops (one batched call) so small items get more pixels.
+
+    Returns (detections, names) with detections as (label, conf, bbox) in full-frame coordinates.
+    """
+    h, w = frame.shape[:2]
+    if tiles <= 1:
+        boxes, names = detect_spectacles(frame, imgsz)
+        return [(safe_label_from_box(b, names), safe_conf_from_box(b), safe_xyxy_from_box(b)) for b in boxes], names
+    tw = int(w / (tiles - (tiles - 1) * overlap))
+    th = int(h / (tiles - (tiles - 1) * overlap))
+    origins = [(int(i * (w - tw) / (tiles - 1)), int(j * (h - th) / (tiles - 1)))
+               for j in range(tiles) for i in range(tiles)]
+    crops = [frame[y:y + th, x:x + tw] for x, y in origins]
+    results = spec_model(crops, imgsz=imgsz, verbose=False)
+    detections = []
+    names = results[0].names if results else {}
+    for (ox, oy), res in zip(origins, results):
+        for b in res.boxes:
+            bbox = safe_xyxy_from_box(b)
+            if bbox is not None:
+                bbox = (bbox[0] + ox, bbox[1] + oy, bbox[2] + ox, bbox[3] + oy)
+            detections.append((safe_label_from_box(b, res.names), safe_conf_from_box(b), bbox))
+    return detections, names
+
 # -------------------------
 # AssemblyAI handlers
 # -------------------------
-def on_begin(client, event: BeginEvent):
-    global wake_active, last_transcript
-    wake_active = True
+# Handlers run on the voice loop thread only (VoiceRuntime dispatches SDK events there)
+def on_begin(runtime, event: BeginEvent):
+    global last_transcript
     last_transcript = ""
-    print("[ASR] session started")
+    event_log.info('ASR', "session started")
     speak_text_async("I'm listening.", 'en')
 
 def parse_reminder(text):
@@ -268,13 +393,8 @@ def parse_reminder(text):
         return v * 3600
     return v
 
-def countdown_timer(seconds):
-    for i in range(seconds, 0, -1):
-        time.sleep(1)
-    speak_text_async(f"{seconds} seconds reached!", 'en')
-
-def on_turn(client, event: TurnEvent):
-    global wake_active, find_spec_mode, last_transcript, voiceflow_mode
+def on_turn(runtime, event: TurnEvent):
+    global last_transcript, voiceflow_mode
 
     # Ignore partial empty transcripts
     if not event.end_of_turn:
@@ -293,13 +413,15 @@ def on_turn(client, event: TurnEvent):
 
     last_transcript = text
 
-    print("[ASR]", text)
+    event_log.info('ASR', "%s", text)
     low = text.lower()
 
     # --- Control voiceflow ---
     if low == "start":
         voiceflow_mode = True
         speak_text_async("Voiceflow activated.", 'en')
+        # launch the flow now: opens the pooled connection before the first real turn
+        runtime.submit(start_voiceflow)
         return
     
     if low == "exit voiceflow":
@@ -308,14 +430,13 @@ def on_turn(client, event: TurnEvent):
         return
 
     if voiceflow_mode:
-        vf = call_voiceflow(text)
-        speak_voiceflow_response(vf)
+        runtime.submit(speak_voiceflow_reply, text)
         return
 
     # --- Reminder logic ---
     delay = parse_reminder(text)
     if delay:
-        threading.Thread(target=countdown_timer, args=(delay,), daemon=True).start()
+        runtime.set_timer(delay, f"{delay} seconds reached!", 'en')
         speak_text_async("Reminder set.", 'en')
         return
 
@@ -330,46 +451,100 @@ def on_turn(client, event: TurnEvent):
             speak_text_async("I cannot read presence right now.", 'en')
         return
 
-    # --- Glasses detection ---
-    if 'where' in low and ('spec' in low or 'spectacle' in low or 'glasses' in low):
-        find_spec_mode = True
+    # --- Tracked item lookup (glasses, keys, wallet, phone, medication) ---
+    item = item_registry.match_query(low) if 'where' in low else None
+    if item:
+        item_search.start(item)
         speak_text_async("Turn around to check.", 'en')
         return
 
-    # --- Fallback translation ---
+    # --- Fallback translation (offline, EN<->BM); logged, not spoken ---
     try:
         translated = translator.translate(text)
-        print("[TRANSLATION]", translated)
-    except:
-        pass
-
-def on_terminated(client, event: TerminationEvent):
-    global wake_active
-    wake_active = False
-    print("[ASR] session ended")
-    speak_text_async("Session ended.", 'en')
+        event_log.info('TRANSLATION', "%s", translated)
+    except Exception as e:
+        event_log.error('TRANSLATION', "failed: %s", e)
 
-def on_error(client, error: StreamingError):
-    print("[ASR] error:", error)
+def start_voiceflow():
+    """Voice executor: restart the flow; its greeting is spoken if there is one."""
+    try:
+        greeting = voiceflow.reset(VOICEFLOW_USER_ID)
+    except VoiceflowError as e:
+        event_log.error('VOICEFLOW', "launch failed: %s", e)
+        return
+    if greeting:
+        voice.speak(greeting, 'en')
 
-def start_assembly_ai(sample_rate=44100):
-    """Blocking: starts streaming client and returns after the session ends."""
-    client = StreamingClient(StreamingClientOptions(api_key=ASSEMBLYAI_API_KEY, api_host="streaming.assemblyai.com"))
-    client.on(StreamingEvents.Begin, on_begin)
-    client.on(StreamingEvents.Turn, on_turn)
-    client.on(StreamingEvents.Termination, on_terminated)
-    client.on(StreamingEvents.Error, on_error)
+def speak_voiceflow_reply(text):
+    """Voice executor: stream the reply and queue each sentence for TTS as soon as it is complete.
 
+    Replies are spoken as Voiceflow wrote them: the word-level EN -> BM fallback would mix languages
+    in free text, so only the fixed prompts below go through RESPONSE_LANG."""
+    t0 = time.perf_counter()
+    chunks = 0
     try:
-        client.connect(StreamingParameters(sample_rate=sample_rate, format_turns=True))
-        mic = aai.extras.MicrophoneStream(sample_rate=sample_rate)
-        client.stream(mic)
-    finally:
+        for sentence in voiceflow.interact(VOICEFLOW_USER_ID, text):
+            if chunks == 0:
+                event_log.info('VOICEFLOW', "first sentence after %.0f ms", (time.perf_counter() - t0) * 1000)
+            voice.speak(sentence, 'en')
+            chunks += 1
+    except VoiceflowError as e:
+        event_log.error('VOICEFLOW', "request failed: %s", e)
+        speak_text_async("I cannot reach Voiceflow right now.", 'en')
+        return
+    if chunks == 0:
+        speak_text_async("Voiceflow had no answer.", 'en')
+
+def on_terminated(runtime, event: TerminationEvent):
+    event_log.info('ASR', "session ended")
+    speak_text_async("Session ended.", 'en')
+
+def on_error(runtime, error: StreamingError):
+    event_log.error('ASR', "error: %s", error)
+
+class AssemblyAISession:
+    """One streaming session; SDK callbacks are forwarded to the voice loop through emit()."""
+
+    def __init__(self, emit, sample_rate=44100):
+        self.sample_rate = sample_rate
+        self.mic = None
+        self._closed = False
+        if asr_client_factory is not None:
+            self.client = asr_client_factory()
+        else:
+            self.client = StreamingClient(StreamingClientOptions(api_key=ASSEMBLYAI_API_KEY, api_host="streaming.assemblyai.com"))
+        self.client.on(StreamingEvents.Begin, lambda c, e: emit('begin', e))
+        self.client.on(StreamingEvents.Turn, lambda c, e: emit('turn', e))
+        self.client.on(StreamingEvents.Termination, lambda c, e: emit('termination', e))
+        self.client.on(StreamingEvents.Error, lambda c, e: emit('error', e))
+
+    def run(self):
+        """Blocking: streams the microphone until close() or the server ends the session."""
+        self.client.connect(StreamingParameters(sample_rate=self.sample_rate, format_turns=True))
+        if asr_audio_factory is not None:
+            self.mic = asr_audio_factory(self.sample_rate)
+        else:
+            self.mic = aai.extras.MicrophoneStream(sample_rate=self.sample_rate)
+        self.client.stream(self.mic)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
         try:
-            client.disconnect(terminate=True)
+            if self.mic is not None:
+                self.mic.close()
+        except Exception:
+            pass
+        try:
+            self.client.disconnect(terminate=True)
         except Exception:
             pass
 
+def start_assembly_ai(emit, sample_rate=44100):
+    """Create a streaming session; the voice runtime runs and closes it on its executor."""
+    return AssemblyAISession(emit, sample_rate=sample_rate)
+
 # -------------------------
 # Wake-word (Porcupine) loop
 # -------------------------
@@ -395,118 +570,106 @@ def choose_pv_device_index():
         print("[PV] could not list devices, defaulting to 0:", e)
         return 0
 
-def wake_word_listener_loop():
-    global find_spec_mode
-    print("[WAKE] initializing Porcupine ...")
-    device_index = choose_pv_device_index()
-    try:
-        porcupine = pvporcupine.create(access_key=PICOVOICE_ACCESS_KEY, keyword_paths=[KEYWORD_PATH])
-    except Exception as e:
-        print("[WAKE] Porcupine create failed:", e)
-        return
+class PorcupineWakeDetector:
+    """Porcupine + PvRecorder, created per wait so the mic is free while ASR runs."""
 
-    try:
-        recorder = PvRecorder(device_index=device_index, frame_length=porcupine.frame_length)
-    except Exception as e:
-        print(f"[WAKE] PvRecorder init failed with device {device_index}:", e)
-        # try fallback without specifying device index
+    def __init__(self, device_index):
+        self.recorder = None
+        if wake_engine_factory is not None:
+            self.porcupine = wake_engine_factory()
+        else:
+            self.porcupine = pvporcupine.create(access_key=PICOVOICE_ACCESS_KEY, keyword_paths=[KEYWORD_PATH])
         try:
-            recorder = PvRecorder(frame_length=porcupine.frame_length)
-        except Exception as e2:
-            print("[WAKE] PvRecorder fallback failed:", e2)
-            return
+            if wake_recorder_factory is not None:
+                self.recorder = wake_recorder_factory(device_index, self.porcupine.frame_length)
+            else:
+                try:
+                    self.recorder = PvRecorder(device_index=device_index, frame_length=self.porcupine.frame_length)
+                except Exception as e:
+                    print(f"[WAKE] PvRecorder init failed with device {device_index}:", e)
+                    # try fallback without specifying device index
+                    self.recorder = PvRecorder(frame_length=self.porcupine.frame_length)
+            self.recorder.start()
+        except Exception:
+            self.close()
+            raise
+
+    def wait(self, stop_event):
+        """Blocking: True once the wake-word is heard, False if stop_event is set first."""
+        while not stop_event.is_set():
+            if self.porcupine.process(self.recorder.read()) >= 0:
+                return True
+        return False
+
+    def close(self):
+        if self.recorder is not None:
+            for fn in (self.recorder.stop, self.recorder.delete):
+                try:
+                    fn()
+                except Exception:
+                    pass
+            self.recorder = None
+        if self.porcupine is not None:
+            try:
+                self.porcupine.delete()
+            except Exception:
+                pass
+            self.porcupine = None
 
-    try:
-        recorder.start()
-    except Exception as e:
-        print("[WAKE] recorder.start() failed:", e)
-        return
+wake_device_index = None
 
-    print("[WAKE] Ready - say the wake-word")
-    try:
-        while True:
-            try:
-                pcm = recorder.read()
-                res = porcupine.process(pcm)
-                if res >= 0:
-                    print("[WAKE] detected")
-                    # stop recorder while handling
-                    try:
-                        recorder.stop()
-                    except Exception:
-                        pass
-                    try:
-                        recorder.delete()
-                    except Exception:
-                        pass
-                    try:
-                        porcupine.delete()
-                    except Exception:
-                        pass
-
-                    # Start AssemblyAI session (blocks until finished)
-                    try:
-                        start_assembly_ai(sample_rate=44100)
-                    except Exception as e:
-                        print("[WAKE] assembly ai session failed:", e)
-
-                    # Recreate porcupine & recorder after session
-                    try:
-                        porcupine = pvporcupine.create(access_key=PICOVOICE_ACCESS_KEY, keyword_paths=[KEYWORD_PATH])
-                        recorder = PvRecorder(device_index=device_index, frame_length=porcupine.frame_length)
-                        recorder.start()
-                        print("[WAKE] resumed listening")
-                    except Exception as e:
-                        print("[WAKE] recreate failed:", e)
-                        break
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                print("[WAKE] loop error:", e)
-                time.sleep(0.5)
-    finally:
-        try:
-            recorder.stop()
-            recorder.delete()
-        except Exception:
-            pass
-        try:
-            porcupine.delete()
-        except Exception:
-            pass
-        print("[WAKE] listener exiting")
+def make_wake_detector():
+    return PorcupineWakeDetector(wake_device_index)
+
+voice = VoiceRuntime(
+    wake_factory=make_wake_detector,
+    asr_factory=start_assembly_ai,
+    speak_blocking=speak_text,
+    handlers={'begin': on_begin, 'turn': on_turn, 'termination': on_terminated, 'error': on_error},
+    max_workers=VOICE_WORKERS,
+    session_idle=ASR_SESSION_IDLE,
+    log=event_log.log,
+)
+
+def wake_word_listener_loop():
+    """Voice thread: hosts the asyncio voice runtime until the process exits."""
+    global wake_device_index
+    print("[WAKE] initializing Porcupine ...")
+    wake_device_index = choose_pv_device_index()
+    voice.run()
+    print("[WAKE] listener exiting")
 
 # -------------------------
 # Camera loop (headless)
 # -------------------------
 def open_camera(preferred_size=(640,480)):
-    trials = [
-        (0, cv2.CAP_V4L2),
-        (0, cv2.CAP_ANY),
-        (1, cv2.CAP_V4L2),
-        (1, cv2.CAP_ANY),
-    ]
-    for idx, backend in trials:
-        try:
-            cap = cv2.VideoCapture(idx, backend)
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, preferred_size[0])
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, preferred_size[1])
-            if cap.isOpened():
-                ok, frame = cap.read()
-                if ok:
-                    print(f"[CAM] using video index {idx}, backend {backend}")
-                    return cap
-            try:
-                cap.release()
-            except Exception:
-                pass
-        except Exception as e:
-            print("[CAM] open attempt failed:", e)
-    print("[CAM] no usable camera found")
-    return None
+    """Open the camera from the cached probe result, probing (MJPEG, small buffer) only when needed."""
+    global camera_probe
+    camera_probe = CameraProbe(CAMERA_PROFILE_PATH, preferred_size=preferred_size,
+                               fps=governor.profile.capture_fps, buffer_size=CAMERA_BUFFER_SIZE, log=event_log.log)
+    return camera_probe.open(force_probe=CAMERA_REPROBE)
+
+def apply_live_config(cfg):
+    """Re-apply side effects of new tuning values; runs on the camera loop between frames."""
+    item_registry.set_threshold('spectacles', cfg['SPEC_THRESHOLD'])
+    item_search.window = cfg['SEARCH_WINDOW']
+    presence_timeline.max_gap = 3 * cfg['PRESENCE_PUSH_INTERVAL']
+    governor.frame_budget = cfg['GOV_FRAME_BUDGET']
+    governor.levels = with_spec_cadence(_gov_levels, cfg['SPEC_IDLE_EVERY_N'])
+
+def load_state():
+    """Persisted state, loaded once per process; a restarted camera loop keeps the in-memory copy."""
+    snapshot_cache.start()
+    item_registry.load()
+    zone_map.load()
+    presence_timeline.load()
+    live_config.load()
+    # SIGHUP re-reads LIVE_CONFIG_PATH; runs in the main thread of the process that owns the config
+    # (the worker in fork mode, where the parent forwards SIGHUP to it)
+    live_config.install_signal_handler()
 
 def camera_loop():
-    load_last_seen()
+    load_models()
     cap = open_camera((640,480))
     if cap is None:
         print("[CAM] aborting camera loop")
@@ -515,72 +678,108 @@ def camera_loop():
     frame_idx = 0
     prev_kitchen_now = None
     last_presence_push = 0.0
-    global find_spec_mode
+    prof = None
+    next_frame_at = time.monotonic()
+    applied_cfg = None
+    read_failures = 0
+    pyramid = FramePyramid()  # detector-size views, resized once per frame into reused buffers
 
     while True:
         try:
+            # tuning values: one snapshot per frame; a new snapshot is applied here, between frames
+            if frame_idx % 15 == 0:
+                live_config.poll()
+            cfg = live_config.values
+            if cfg is not applied_cfg:
+                apply_live_config(cfg)
+                applied_cfg = cfg
+
+            # governor-paced capture: lighter profiles read (and infer on) fewer frames
+            if governor.profile != prof:
+                prof = governor.profile
+                cap.set(cv2.CAP_PROP_FPS, prof.capture_fps)
+            delay = next_frame_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_frame_at = max(next_frame_at + 1.0 / prof.capture_fps, time.monotonic())
+
             ret, frame = cap.read()
             if not ret:
+                # unplugged / wedged camera: give up so the supervisor reopens it
+                read_failures += 1
+                if read_failures >= CAMERA_MAX_READ_FAILURES:
+                    event_log.error('CAM', "%d reads failed in a row, closing camera", read_failures)
+                    break
                 time.sleep(0.02)
                 continue
-
-            # presence detection (lightweight)
-            boxes, best_conf_map, names = detect_objects(frame)
+            read_failures = 0
+            pyramid.update(frame)
+            # a "where is my ..." search runs the item model on every frame and pauses the kitchen model
+            searching = item_search.active()
+
+            # presence detection (lightweight), every kitchen_stride frames
+            if not searching and frame_idx % prof.kitchen_stride == 0:
+                t0 = time.perf_counter()
+                boxes, best_conf_map, names = detect_objects(pyramid.view(prof.imgsz)[0], prof.imgsz)
+                governor.observe(time.perf_counter() - t0, 'kitchen')
             kitchen_now = False  # placeholder (put real logic if you have kitchen label)
             now = time.time()
-            if (prev_kitchen_now is None) or (kitchen_now != prev_kitchen_now) or (now - last_presence_push >= PRESENCE_PUSH_INTERVAL):
+            if (prev_kitchen_now is None) or (kitchen_now != prev_kitchen_now) or (now - last_presence_push >= cfg['PRESENCE_PUSH_INTERVAL']):
                 loc = 'Kitchen' if kitchen_now else 'Unknown'
                 loc = 'Level 3 EE department' # hardcoded for demo
                 push_presence_update(loc, "", kitchen_now, None, speak=False)
                 last_presence_push = now
                 prev_kitchen_now = kitchen_now
 
-            # spectacles detection every N frames
-            if frame_idx % SPEC_EVERY_N == 0:
-                spec_boxes, spec_names = detect_spectacles(frame)
-                only_one_class = len(spec_names) == 1
-                best_conf = None
-                best_bbox = None
-                best_label = None
-                for b in spec_boxes:
-                    conf = safe_conf_from_box(b)
-                    try:
-                        cls_id = int(b.cls[0])
-                        label = spec_names[cls_id]
-                    except Exception:
-                        label = None
-                    label_norm = str(label).strip().lower() if label else ""
-                    if (not only_one_class) and (label_norm not in SPECTACLE_LABELS):
-                        continue
-                    if best_conf is None or conf > best_conf:
-                        best_conf = conf
-                        best_label = label
-                        best_bbox = safe_xyxy_from_box(b)
-
-                if best_conf is not None and best_conf >= SPEC_THRESHOLD:
-                    place = 'Kitchen' if kitchen_now else 'Unknown'
-                    place = 'Level 3 EE department'  # hardcoded for demo
-                    ts = time.time()
-                    with state_lock:
-                        last_spec_seen.update({'place': place, 'time': ts, 'conf': best_conf, 'bbox': best_bbox, 'label': best_label})
-                    save_last_seen()
-                    if find_spec_mode:
-                        time_iso = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
-                        msg = f"Your spectacles were last seen at {place}, at {time_iso}."
-                        print("[ANNOUNCE]", msg)
+            # tracked items (spectacles, keys, wallet, ...), one model pass for all;
+            # every frame on tiled crops while searching, the profile's idle cadence otherwise
+            spec_every = 1 if searching else prof.spec_every_n
+            if frame_idx % spec_every == 0:
+                t0 = time.perf_counter()
+                if searching:
+                    detections, spec_names = detect_items_tiled(frame, prof.imgsz, SEARCH_TILES)
+                else:
+                    view, scale = pyramid.view(prof.imgsz)
+                    spec_boxes, spec_names = detect_spectacles(view, prof.imgsz)
+                    detections = ((safe_label_from_box(b, spec_names), safe_conf_from_box(b),
+                                   to_frame(safe_xyxy_from_box(b), scale, frame.shape))
+                                  for b in spec_boxes)
+                    # search bursts are deliberate; keep them out of the governor's latency estimate
+                    governor.observe(time.perf_counter() - t0, 'spec')
+                place = 'Kitchen' if kitchen_now else 'Unknown'
+                place = 'Level 3 EE department'  # hardcoded for demo
+                updated = item_registry.observe(detections, place, single_class=len(spec_names) == 1,
+                                                zone_map=zone_map, frame_shape=frame.shape)
+                if updated:
+                    item_registry.save()
+                    for item in updated:
+                        rec = item_registry.get(item)
+                        snapshot_cache.submit(item, frame, rec['bbox'], rec['time'])
+                    for item in item_search.found(updated):
+                        msg = item_registry.describe(item)
+                        event_log.info('ANNOUNCE', "%s", msg, item=item)
                         speak_text_async(msg, 'en')
-                        find_spec_mode = False
+
+            # search window over without a fresh sighting: answer from the stored one
+            for item in item_search.expired():
+                msg = f"I could not spot your {item} just now. " + item_registry.describe(item)
+                event_log.info('ANNOUNCE', "%s", msg, item=item)
+                speak_text_async(msg, 'en')
+
+            governor.update()
 
             # headless heartbeat logging
             if frame_idx % 150 == 0:
-                print(f"[CAM] running... frame {frame_idx}")
+                event_log.info('CAM', "running", frame=frame_idx, gov_level=governor.level,
+                               latency_s=governor.status()['latency_s'], temp_c=governor.temp_c)
+                zone_map.reload_if_changed()
 
             frame_idx += 1
         except KeyboardInterrupt:
             break
         except Exception as e:
-            print("[CAM] loop error:", e)
-            traceback.print_exc()
+            # repeated errors collapse into one "suppressed N repeats" line per window
+            event_log.exception('CAM', "loop error: %s", e)
             time.sleep(0.5)
 
     try:
@@ -592,6 +791,17 @@ def camera_loop():
 # -------------------------
 # MAIN
 # -------------------------
+def serve_diag_api():
+    """Optional REST API for remote diagnosis (/api/logs, /api/governor, /api/supervisor, ...)."""
+    from api_server import create_api_app, serve_api
+    serve_api(create_api_app(sys.modules[__name__], write_token=API_WRITE_TOKEN), '0.0.0.0', DIAG_API_PORT,
+              log=event_log.log)
+
+def shutdown():
+    voice.stop()
+    print("[MAIN] exiting")
+    event_log.stop()
+
 def main():
     # sanity check: API keys & models
     if not os.path.exists(MODEL_KITCHEN):
@@ -604,17 +814,33 @@ def main():
         print("[MAIN] keyword file missing:", KEYWORD_PATH)
         # not fatal; porcupine will fail at runtime
 
-    # start wakeword listener thread
-    t_wake = threading.Thread(target=wake_word_listener_loop, daemon=True)
-    t_wake.start()
-
-    # start camera loop in main thread (so KeyboardInterrupt works)
-    try:
-        camera_loop()
-    except KeyboardInterrupt:
-        print("[MAIN] KeyboardInterrupt received, exiting")
-    finally:
-        print("[MAIN] exiting")
+    if SUPERVISOR_MODE == 'off':
+        # unsupervised: voice on a thread, camera loop in the main thread (so KeyboardInterrupt works)
+        load_state()
+        if DIAG_API_PORT:
+            threading.Thread(target=serve_diag_api, daemon=True).start()
+        threading.Thread(target=wake_word_listener_loop, daemon=True).start()
+        try:
+            camera_loop()
+        except KeyboardInterrupt:
+            print("[MAIN] KeyboardInterrupt received, exiting")
+        finally:
+            shutdown()
+        return
 
-if _name_ == "_main_":
+    # each subsystem is restarted on its own when it returns or raises; state is loaded once per worker
+    supervisor.on_start = load_state
+    supervisor.on_stop = shutdown
+    supervisor.add('camera', camera_loop)
+    supervisor.add('voice', wake_word_listener_loop)
+    if DIAG_API_PORT:
+        supervisor.add('api', serve_diag_api)
+    if SUPERVISOR_MODE == 'fork' and fork_supported():
+        # import ultralytics + load both models once; every re-forked worker inherits them
+        supervisor.run_forked(preload=load_models)
+        event_log.stop()  # parent's own records (worker restarts)
+    else:
+        supervisor.run()
+
+if __name__ == "__main__":
     main()
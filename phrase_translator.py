@@ -0,0 +1,291 @@
+# phrase_translator.py
+"""
+Offline EN <-> BM (Malay) translation from a local phrase table.
+
+Lookup order per sentence: exact phrase -> sentence template (system prompts
+with {} slots) -> greedy longest-match over a word/phrase dictionary. No
+network: results are memoised in an LRU, and BM versions of every system
+prompt are built once at startup so Malay TTS replies cost a dict lookup.
+
+Run `python phrase_translator.py` for cold vs warm latency on a phrase corpus.
+"""
+
+import re
+import time
+from functools import lru_cache
+
+# Fixed system prompts spoken by main.py
+SYSTEM_PROMPTS = {
+    "I'm listening.": "Saya sedang mendengar.",
+    "Session ended.": "Sesi tamat.",
+    "Reminder set.": "Peringatan telah ditetapkan.",
+    "Turn around to check.": "Sila pusing untuk menyemak.",
+    "I cannot read presence right now.": "Saya tidak dapat membaca lokasi sekarang.",
+    "Voiceflow activated.": "Voiceflow diaktifkan.",
+    "Voiceflow deactivated.": "Voiceflow dinyahaktifkan.",
+    "I cannot reach Voiceflow right now.": "Saya tidak dapat menghubungi Voiceflow sekarang.",
+    "Voiceflow had no answer.": "Voiceflow tiada jawapan.",
+}
+
+# Prompts with variable parts; slots are translated through the phrase table when possible
+PROMPT_TEMPLATES = [
+    ("You are at {}.", "Anda berada di {}."),
+    ("{} seconds reached!", "{} saat telah tamat!"),
+    ("Your {} were last seen {}, in {}, at {}.", "{} anda kali terakhir dilihat {}, di {}, pada {}."),
+    ("Your {} was last seen {}, in {}, at {}.", "{} anda kali terakhir dilihat {}, di {}, pada {}."),
+    ("Your {} were last seen at {}, at {}.", "{} anda kali terakhir dilihat di {}, pada {}."),
+    ("Your {} was last seen at {}, at {}.", "{} anda kali terakhir dilihat di {}, pada {}."),
+    ("I have not seen your {} yet.", "Saya belum nampak {} anda lagi."),
+    ("I could not spot your {} just now.", "Saya tidak dapat mencari {} anda tadi."),
+]
+
+# Word / short-phrase dictionary (EN -> BM); multi-word keys win over single words
+PHRASES = {
+    "good morning": "selamat pagi",
+    "good afternoon": "selamat tengah hari",
+    "good evening": "selamat petang",
+    "good night": "selamat malam",
+    "thank you": "terima kasih",
+    "how are you": "apa khabar",
+    "i am hungry": "saya lapar",
+    "i am tired": "saya penat",
+    "i feel sick": "saya rasa tidak sihat",
+    "where am i": "saya di mana",
+    "where are my glasses": "di mana cermin mata saya",
+    "where are my spectacles": "di mana cermin mata saya",
+    "where is my wallet": "di mana dompet saya",
+    "where is my phone": "di mana telefon saya",
+    "where are my keys": "di mana kunci saya",
+    "where is my medicine": "di mana ubat saya",
+    "call my son": "telefon anak lelaki saya",
+    "call my daughter": "telefon anak perempuan saya",
+    "what time is it": "pukul berapa sekarang",
+    "remind me": "ingatkan saya",
+    "living room": "ruang tamu",
+    "dining table": "meja makan",
+    "on the dining table": "di atas meja makan",
+    "next to the sink": "di sebelah sinki",
+    "spectacles": "cermin mata",
+    "glasses": "cermin mata",
+    "keys": "kunci",
+    "key": "kunci",
+    "wallet": "dompet",
+    "phone": "telefon",
+    "medication": "ubat",
+    "medicine": "ubat",
+    "kitchen": "dapur",
+    "bedroom": "bilik tidur",
+    "bathroom": "bilik air",
+    "toilet": "tandas",
+    "house": "rumah",
+    "home": "rumah",
+    "door": "pintu",
+    "table": "meja",
+    "chair": "kerusi",
+    "bed": "katil",
+    "water": "air",
+    "food": "makanan",
+    "rice": "nasi",
+    "tea": "teh",
+    "coffee": "kopi",
+    "hello": "helo",
+    "yes": "ya",
+    "no": "tidak",
+    "please": "sila",
+    "help": "tolong",
+    "sorry": "maaf",
+    "i": "saya",
+    "me": "saya",
+    "my": "saya",
+    "you": "anda",
+    "your": "anda",
+    "we": "kami",
+    "where": "di mana",
+    "what": "apa",
+    "when": "bila",
+    "who": "siapa",
+    "why": "kenapa",
+    "how": "bagaimana",
+    "today": "hari ini",
+    "tomorrow": "esok",
+    "yesterday": "semalam",
+    "now": "sekarang",
+    "morning": "pagi",
+    "night": "malam",
+    "minute": "minit",
+    "minutes": "minit",
+    "second": "saat",
+    "seconds": "saat",
+    "hour": "jam",
+    "hours": "jam",
+    "want": "mahu",
+    "need": "perlu",
+    "eat": "makan",
+    "drink": "minum",
+    "sleep": "tidur",
+    "go": "pergi",
+    "come": "datang",
+    "see": "nampak",
+    "find": "cari",
+    "lost": "hilang",
+    "hungry": "lapar",
+    "tired": "penat",
+    "sick": "sakit",
+    "family": "keluarga",
+    "son": "anak lelaki",
+    "daughter": "anak perempuan",
+    "doctor": "doktor",
+    "hospital": "hospital",
+    "in": "di",
+    "at": "di",
+    "on": "di atas",
+    "and": "dan",
+    "or": "atau",
+    "with": "dengan",
+    "to": "ke",
+}
+
+_TOKEN_RE = re.compile(r"[\w']+|[^\w\s]")
+_WORD_SPLIT_RE = re.compile(r"([^\W\d_][\w']*)")  # words at odd indices, separators kept verbatim
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_MAX_NGRAM = 5
+
+
+def _compile_template(src):
+    return re.compile("^" + re.escape(src).replace(r"\{\}", "(.+?)") + "$", re.IGNORECASE)
+
+
+def _match_case(src, out):
+    return out[:1].upper() + out[1:] if src[:1].isupper() else out
+
+
+def _capitalize_like(word, out):
+    # Proper nouns ("Kitchen") stay capitalised; "I" is not a proper noun
+    return out[:1].upper() + out[1:] if len(word) > 1 and word[:1].isupper() else out
+
+
+class PhraseTranslator:
+    def __init__(self, cache_size=1024):
+        self._tables = {'en': {}, 'ms': {}}  # source language -> {phrase: translation}
+        for en, ms in PHRASES.items():
+            self._tables['en'][en] = ms
+            self._tables['ms'].setdefault(ms, en)
+        self._exact = {'en': {}, 'ms': {}}
+        for en, ms in SYSTEM_PROMPTS.items():
+            self._exact['en'][en.lower()] = ms
+            self._exact['ms'][ms.lower()] = en
+        self._templates = {
+            'en': [(_compile_template(en), ms) for en, ms in PROMPT_TEMPLATES],
+            'ms': [(_compile_template(ms), en) for en, ms in PROMPT_TEMPLATES],
+        }
+        self._translate_cached = lru_cache(maxsize=cache_size)(self._translate)
+        # BM version of every fixed system prompt, ready before the first reply
+        self.prompts_ms = {en: self._translate_cached(en, 'en', 'ms') for en in SYSTEM_PROMPTS}
+
+    def detect(self, text):
+        """'en' or 'ms', by which vocabulary covers more tokens."""
+        tokens = [t for t in _TOKEN_RE.findall(text.lower()) if t.isalnum() or "'" in t]
+        en = sum(1 for t in tokens if t in self._tables['en'])
+        ms = sum(1 for t in tokens if t in self._tables['ms'])
+        return 'ms' if ms > en else 'en'
+
+    def translate(self, text, src='auto', dest=None):
+        """Translate EN <-> BM; dest defaults to the other language."""
+        text = (text or '').strip()
+        if not text:
+            return ''
+        if src == 'auto':
+            src = self.detect(text)
+        dest = dest or ('ms' if src == 'en' else 'en')
+        if src == dest:
+            return text
+        return self._translate_cached(text, src, dest)
+
+    def localize(self, text, lang):
+        """Text to speak in `lang`; system prompts hit the prebuilt table."""
+        if lang != 'ms':
+            return text
+        hit = self.prompts_ms.get(text)
+        return hit if hit is not None else self.translate(text, 'en', 'ms')
+
+    def cache_info(self):
+        return self._translate_cached.cache_info()
+
+    # ---------- uncached path ----------
+    def _translate(self, text, src, dest):
+        return " ".join(self._sentence(s, src) for s in _SENTENCE_RE.split(text) if s)
+
+    def _sentence(self, sentence, src):
+        hit = self._exact[src].get(sentence.lower())
+        if hit is not None:
+            return hit
+        for rx, out in self._templates[src]:
+            m = rx.match(sentence)
+            if m:
+                slots = [self._words(g, src) for g in m.groups()]
+                return _match_case(sentence, out.format(*slots))
+        return _match_case(sentence, self._words(sentence, src))
+
+    def _words(self, text, src):
+        """Greedy longest match over the phrase table; digits, times and punctuation pass through."""
+        table = self._tables[src]
+        parts = _WORD_SPLIT_RE.split(text)
+        words, seps = parts[1::2], parts[0::2]
+        out = [seps[0]]
+        i = 0
+        while i < len(words):
+            n = 1
+            translated = words[i]
+            for size in range(min(_MAX_NGRAM, len(words) - i), 0, -1):
+                # an n-gram may only span plain whitespace
+                if any(seps[k].strip() for k in range(i + 1, i + size)):
+                    continue
+                hit = table.get(" ".join(words[i:i + size]).lower())
+                if hit is not None:
+                    n, translated = size, _capitalize_like(words[i], hit)
+                    break
+            out.append(translated)
+            out.append(seps[i + n])
+            i += n
+        return "".join(out)
+
+
+if __name__ == "__main__":
+    corpus = list(SYSTEM_PROMPTS) + [
+        "You are at Kitchen.",
+        "Your spectacles were last seen on the dining table, in Kitchen, at 2025-12-27 14:25:00.",
+        "Your wallet was last seen at Level 3 EE department, at 2025-12-27 09:10:00.",
+        "I have not seen your keys yet.",
+        "30 seconds reached!",
+        "Good morning, how are you?",
+        "I am hungry and I want rice.",
+        "Where is my phone?",
+        "Call my daughter now please.",
+        "selamat pagi, apa khabar",
+        "saya lapar",
+        "di mana dompet saya",
+    ]
+    t0 = time.perf_counter()
+    tr = PhraseTranslator()
+    build_ms = (time.perf_counter() - t0) * 1000
+    rounds = 200
+    t0 = time.perf_counter()
+    for text in corpus:
+        tr.translate(text)
+    cold_us = (time.perf_counter() - t0) * 1e6 / len(corpus)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            tr.translate(text)
+    warm_us = (time.perf_counter() - t0) * 1e6 / (rounds * len(corpus))
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for text in SYSTEM_PROMPTS:
+            tr.localize(text, 'ms')
+    prompt_us = (time.perf_counter() - t0) * 1e6 / (rounds * len(SYSTEM_PROMPTS))
+    for text in corpus:
+        print(f"  {text!r} -> {tr.translate(text)!r}")
+    print(f"init (incl. prompt prebuild): {build_ms:.2f} ms")
+    print(f"cold translate: {cold_us:.1f} us/phrase, warm (LRU): {warm_us:.2f} us/phrase, "
+          f"prebuilt prompt: {prompt_us:.2f} us")
+    print(tr.cache_info())
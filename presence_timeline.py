@@ -0,0 +1,186 @@
+# presence_timeline.py
+"""
+Run-length-encoded presence history.
+
+Presence samples are merged as they arrive into intervals
+[location, start, end, max_score]: a sample extends the open interval when the
+location is unchanged and it arrives within `max_gap` seconds, otherwise the
+open interval is closed and a new one starts. Closed intervals are appended to
+a JSONL log (one short line each, so months of history stay in a few MB) and
+kept in memory sorted by time, so day/range queries are a bisect + slice.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from event_log import print_log
+
+DAY_SECONDS = 24 * 3600
+
+
+def day_bounds(date_str=None):
+    """Local [start, end) epoch bounds for 'YYYY-MM-DD' (today when None). Raises ValueError."""
+    if date_str:
+        st = time.strptime(date_str, "%Y-%m-%d")
+    else:
+        st = time.localtime()
+    start = time.mktime((st.tm_year, st.tm_mon, st.tm_mday, 0, 0, 0, 0, 0, -1))
+    end = time.mktime((st.tm_year, st.tm_mon, st.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+    return start, end
+
+
+def interval_dict(iv, lo=None, hi=None):
+    loc, start, end, score = iv
+    if lo is not None:
+        start = max(start, lo)
+    if hi is not None:
+        end = min(end, hi)
+    return {
+        'location': loc,
+        'start': start,
+        'end': end,
+        'duration': round(end - start, 1),
+        'max_score': score,
+        'start_iso': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start)),
+        'end_iso': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(end)),
+    }
+
+
+class PresenceTimeline:
+    def __init__(self, path='presence_timeline.jsonl', max_gap=45.0, checkpoint_interval=60.0, log=None):
+        self.path = path
+        self.log = log or print_log
+        self.max_gap = float(max_gap)
+        self.checkpoint_interval = float(checkpoint_interval)
+        self.lock = threading.Lock()
+        self._intervals = []   # closed intervals, sorted and non-overlapping
+        self._ends = []        # parallel list of end times for bisect
+        self._open = None      # [location, start, end, max_score]
+        self._last_checkpoint = 0.0
+
+    # ---------- ingest ----------
+    def record(self, location, ts=None, score=None):
+        """Merge one presence sample. Returns True when a new interval was opened."""
+        ts = time.time() if ts is None else ts
+        score = float(score) if score is not None else 0.0
+        closed = None
+        with self.lock:
+            cur = self._open
+            if cur is not None and cur[0] == location and 0 <= ts - cur[2] <= self.max_gap:
+                cur[2] = ts
+                cur[3] = max(cur[3], score)
+                opened = False
+            else:
+                if cur is not None:
+                    closed = cur
+                    self._append_closed(cur)
+                self._open = [location, ts, ts, score]
+                opened = True
+        if closed is not None:
+            self._persist_closed(closed)
+        if opened or ts - self._last_checkpoint >= self.checkpoint_interval:
+            self._checkpoint_open()
+        return opened
+
+    def _append_closed(self, iv):
+        if self._intervals and iv[1] < self._ends[-1]:
+            iv[1] = self._ends[-1]
+        self._intervals.append(iv)
+        self._ends.append(iv[2])
+
+    def _persist_closed(self, iv):
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps([iv[0], round(iv[1], 1), round(iv[2], 1), round(iv[3], 2)]) + "\n")
+        except Exception as e:
+            self.log('TIMELINE', "append failed: %s", e, level='error')
+
+    def _checkpoint_open(self):
+        with self.lock:
+            cur = list(self._open) if self._open else None
+        if cur is None:
+            return
+        try:
+            tmp = self.path + '.open.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(cur, f)
+            os.replace(tmp, self.path + '.open')
+            self._last_checkpoint = cur[2]
+        except Exception as e:
+            self.log('TIMELINE', "checkpoint failed: %s", e, level='error')
+
+    def load(self):
+        """Replace the in-memory timeline with the file's (safe to call again, e.g. after a restart)."""
+        with self.lock:
+            self._intervals, self._ends, self._open = [], [], None
+        count = 0
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    for line in f:
+                        try:
+                            loc, start, end, score = json.loads(line)
+                        except Exception:
+                            continue
+                        with self.lock:
+                            self._append_closed([loc, float(start), float(end), float(score)])
+                        count += 1
+            if os.path.exists(self.path + '.open'):
+                with open(self.path + '.open', 'r') as f:
+                    loc, start, end, score = json.load(f)
+                with self.lock:
+                    # a crash between appending an interval and checkpointing its successor leaves the
+                    # appended one in .open; reviving it would write it again as a zero-length duplicate
+                    if not self._ends or float(end) > self._ends[-1]:
+                        self._open = [loc, float(start), float(end), float(score)]
+            self.log('TIMELINE', "loaded %d intervals", count)
+        except Exception as e:
+            self.log('TIMELINE', "load failed: %s", e, level='error')
+
+    # ---------- queries ----------
+    def _range(self, lo, hi):
+        """Intervals overlapping [lo, hi), including the open one."""
+        with self.lock:
+            i = bisect.bisect_right(self._ends, lo)
+            out = []
+            for iv in self._intervals[i:]:
+                if iv[1] >= hi:
+                    break
+                out.append(tuple(iv))
+            if self._open and self._open[2] > lo and self._open[1] < hi:
+                out.append(tuple(self._open))
+        return out
+
+    def day(self, date_str=None, offset=0, limit=100):
+        lo, hi = day_bounds(date_str)
+        rows = self._range(lo, hi)
+        page = rows[offset:offset + limit]
+        return {'total': len(rows), 'offset': offset, 'limit': limit,
+                'intervals': [interval_dict(iv, lo, hi) for iv in page]}
+
+    def totals(self, date_str=None):
+        lo, hi = day_bounds(date_str)
+        totals = {}
+        for loc, start, end, _ in self._range(lo, hi):
+            totals[loc] = totals.get(loc, 0.0) + (min(end, hi) - max(start, lo))
+        return {loc: round(sec, 1) for loc, sec in totals.items()}
+
+    def absences(self, location, min_seconds, lo, hi, offset=0, limit=100):
+        """Stretches inside [lo, hi) longer than min_seconds without any interval at `location`."""
+        hi = min(hi, time.time())
+        gaps = []
+        cursor = lo
+        for loc, start, end, _ in self._range(lo, hi):
+            if loc != location:
+                continue
+            if start - cursor >= min_seconds:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if hi - cursor >= min_seconds:
+            gaps.append((cursor, hi))
+        page = gaps[offset:offset + limit]
+        return {'total': len(gaps), 'offset': offset, 'limit': limit, 'location': location,
+                'absences': [interval_dict((location, s, e, 0.0)) for s, e in page]}
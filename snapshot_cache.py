@@ -0,0 +1,197 @@
+# snapshot_cache.py
+"""
+Last-seen snapshot thumbnails in a size-bounded on-disk cache.
+
+On an accepted sighting the camera loop calls submit(): if the box moved
+(IoU with the last captured box below `same_iou`) or the last thumbnail is
+older than `refresh_s`, the box plus a margin of surroundings is copied out
+of the frame (a small memcpy) and handed to a worker thread. Pending jobs
+are kept per item, latest wins, so a burst of sightings costs one encode;
+resize + JPEG + write all happen on the worker. After each write the oldest
+files are deleted until the directory is under `max_bytes` (the newest
+thumbnail of every item is always kept), so disk use stays flat.
+
+Files are named <item>-<epoch ms>.jpg; the cache index is rebuilt from the
+directory on start.
+"""
+
+import os
+import re
+import threading
+import time
+
+import cv2
+
+from event_log import print_log
+
+_NAME_RE = re.compile(r'^([a-z0-9_]+)-(\d+)\.jpg$')
+
+
+def bbox_iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / float(union) if union > 0 else 0.0
+
+
+def crop_with_margin(frame, bbox, margin):
+    """Box grown by `margin` x its size on each side (so the table / shelf shows), clipped to the frame."""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = bbox
+    mx, my = int((x2 - x1) * margin), int((y2 - y1) * margin)
+    x1, y1 = max(0, int(x1) - mx), max(0, int(y1) - my)
+    x2, y2 = min(w, int(x2) + mx), min(h, int(y2) + my)
+    if x2 <= x1 or y2 <= y1:
+        return None, None
+    return frame[y1:y2, x1:x2], (x1, y1, x2, y2)
+
+
+class SnapshotCache:
+    def __init__(self, directory='snapshots', max_bytes=20 * 1024 * 1024, width=320, quality=75,
+                 margin=0.75, same_iou=0.7, refresh_s=600.0, log=None):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.width = int(width)
+        self.quality = int(quality)
+        self.margin = float(margin)
+        self.same_iou = float(same_iou)
+        self.refresh_s = float(refresh_s)
+        self.log = log or print_log
+
+        self._cond = threading.Condition()
+        self._pending = {}   # item -> (crop, ts, bbox); newest sighting wins
+        self._captured = {}  # item -> (bbox, ts) last accepted for encoding (camera thread only)
+        self._latest = {}    # item -> {'file', 'time', 'bytes'}
+        self._files = []     # [(ts_ms, name, bytes)] oldest first
+        self._total = 0
+        self.encoded = 0
+        self.skipped = 0
+        self._running = False
+        self._thread = None
+
+    # ---------- camera thread ----------
+    def submit(self, item, frame, bbox, ts=None):
+        """Queue a thumbnail for this sighting unless the box is where it was last captured. Never blocks."""
+        if bbox is None or frame is None:
+            return False
+        ts = time.time() if ts is None else ts
+        last = self._captured.get(item)
+        if last is not None and bbox_iou(last[0], bbox) >= self.same_iou and ts - last[1] < self.refresh_s:
+            self.skipped += 1
+            return False
+        crop, _ = crop_with_margin(frame, bbox, self.margin)
+        if crop is None:
+            return False
+        self._captured[item] = (tuple(bbox), ts)
+        with self._cond:
+            self._pending[item] = (crop.copy(), ts, tuple(bbox))
+            self._cond.notify()
+        return True
+
+    # ---------- any thread ----------
+    def latest(self, item):
+        """{'file', 'path', 'time', 'bytes', 'etag'} of the newest thumbnail, or None."""
+        with self._cond:
+            info = self._latest.get(item)
+            if info is None:
+                return None
+            info = dict(info)
+        info['path'] = os.path.join(self.directory, info['file'])
+        info['etag'] = os.path.splitext(info['file'])[0]
+        return info
+
+    def stats(self):
+        with self._cond:
+            return {'files': len(self._files), 'bytes': self._total, 'max_bytes': self.max_bytes,
+                    'pending': len(self._pending), 'encoded': self.encoded, 'skipped_same_place': self.skipped}
+
+    def start(self):
+        if self._running:
+            return self
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name='snapshots', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    # ---------- worker ----------
+    def _scan(self):
+        files = []
+        for name in os.listdir(self.directory):
+            m = _NAME_RE.match(name)
+            if not m:
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            files.append((int(m.group(2)), name, size))
+        files.sort()
+        with self._cond:
+            self._files = files
+            self._total = sum(f[2] for f in files)
+            for ts_ms, name, size in files:
+                item = _NAME_RE.match(name).group(1)
+                self._latest[item] = {'file': name, 'time': ts_ms / 1000.0, 'bytes': size}
+        self._evict()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                item, (crop, ts, bbox) = self._pending.popitem()
+            try:
+                self._write(item, crop, ts)
+            except Exception as e:
+                self.log('SNAP', "%s thumbnail failed: %s", item, e, level='error')
+
+    def _write(self, item, crop, ts):
+        h, w = crop.shape[:2]
+        if w > self.width:
+            crop = cv2.resize(crop, (self.width, max(1, int(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', crop, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        if not ok:
+            return
+        ts_ms = int(ts * 1000)
+        name = f"{item}-{ts_ms}.jpg"
+        path = os.path.join(self.directory, name)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(buf.tobytes())
+        os.replace(tmp, path)
+        size = len(buf)
+        with self._cond:
+            self._files.append((ts_ms, name, size))
+            self._total += size
+            self._latest[item] = {'file': name, 'time': ts, 'bytes': size}
+            self.encoded += 1
+        self._evict()
+
+    def _evict(self):
+        """Delete oldest thumbnails until under max_bytes; the newest one per item is never deleted."""
+        doomed = []
+        with self._cond:
+            keep = {info['file'] for info in self._latest.values()}
+            survivors = []
+            for entry in self._files:
+                if self._total > self.max_bytes and entry[1] not in keep:
+                    doomed.append(entry[1])
+                    self._total -= entry[2]
+                else:
+                    survivors.append(entry)
+            self._files = survivors
+        for name in doomed:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
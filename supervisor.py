@@ -0,0 +1,251 @@
+# supervisor.py
+"""
+Crash recovery for the headless app without reloading the YOLO models.
+
+Supervisor runs each subsystem (camera loop, voice runtime, API server) as a
+named target on its own thread. When one returns or raises, only that target
+is restarted, after `restart_delay` (doubled up to `max_delay` while it keeps
+dying within `stable_after` seconds of starting). The others keep running.
+State is loaded once per process by on_start() (items, last seen, timeline)
+and stays in memory across target restarts, so a restarted target carries on
+where it stopped.
+
+run_forked() adds a parent process around that. The parent calls preload()
+once (import ultralytics, load both models) and then forks a worker that
+inherits the loaded models copy-on-write and runs the supervised threads.
+If the worker dies (segfault in a native library, OOM kill, os._exit), the
+parent forks a new one within `restart_delay`, with no re-import or
+re-load; a worker that stopped cleanly (exit code 0) ends the parent too.
+SIGHUP sent to the parent is forwarded to the worker.
+
+The subsystems share in-memory state (item search, TTS queue, registry), so
+they live in one worker as threads rather than in separate processes. That
+makes restarts per subsystem only for failures Python sees (a target that
+returns or raises). There is no process isolation between them: a segfault or
+OOM kill in any subsystem ends the worker, and the parent re-forks all of
+them together.
+
+status() reports uptime and restart counters for the process and for each
+subsystem; the worker inherits the parent's counters at fork time.
+"""
+
+import os
+import signal
+import threading
+import time
+
+from event_log import print_log
+
+
+def fork_supported():
+    return hasattr(os, 'fork') and hasattr(os, 'waitpid')
+
+
+class _Child:
+    def __init__(self, name, target):
+        self.name = name
+        self.target = target
+        self.thread = None
+        self.restarts = 0
+        self.started = None    # monotonic start of the current run
+        self.last_exit = None  # {'time', 'reason'}
+        self.delay = 0.0
+        self.due = None        # monotonic time of the pending restart
+
+
+class Supervisor:
+    def __init__(self, restart_delay=0.5, max_delay=30.0, stable_after=10.0, poll=0.1, on_start=None,
+                 on_stop=None, log=None, clock=time.monotonic):
+        """on_start() / on_stop(): setup and cleanup run once per run(), in the main thread (of the
+        worker in fork mode), around all targets; restarted targets don't repeat them."""
+        self.restart_delay = float(restart_delay)
+        self.max_delay = float(max_delay)
+        self.stable_after = float(stable_after)
+        self.poll = float(poll)
+        self.on_start = on_start
+        self.on_stop = on_stop
+        self.log = log or print_log
+        self.clock = clock
+        self.mode = 'thread'
+
+        self._children = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.started_at = time.time()        # supervisor (parent in fork mode) start, wall clock
+        self.process_started_at = time.time()
+        self.process_restarts = 0
+        self.last_process_exit = None
+        self.worker_pid = None
+        self._failure = None  # exception that ended run(), already logged there
+
+    def add(self, name, target):
+        """Supervise target() (blocking; returning or raising counts as a failure)."""
+        self._children[name] = _Child(name, target)
+        return self
+
+    # ---------- any thread ----------
+    def status(self):
+        now_wall, now = time.time(), self.clock()
+        with self._lock:
+            children = {
+                c.name: {'alive': c.thread is not None and c.thread.is_alive(), 'restarts': c.restarts,
+                         'uptime_s': round(now - c.started, 1) if c.started is not None and c.due is None else 0.0,
+                         'last_exit': c.last_exit}
+                for c in self._children.values()}
+        return {'mode': self.mode, 'pid': os.getpid(), 'uptime_s': round(now_wall - self.started_at, 1),
+                'process': {'restarts': self.process_restarts,
+                            'uptime_s': round(now_wall - self.process_started_at, 1),
+                            'last_exit': self.last_process_exit},
+                'subsystems': children}
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- thread mode ----------
+    def run(self):
+        """Blocking: start every target and restart failed ones until stop() or Ctrl+C."""
+        try:
+            if self.on_start is not None:
+                self.on_start()
+            for child in self._children.values():
+                self._start(child)
+            while not self._stop.wait(self.poll):
+                self._check()
+        except KeyboardInterrupt:
+            self.log('SUP', "KeyboardInterrupt received, stopping")
+            self._stop.set()
+        except BaseException as e:
+            # logged before on_stop(), which may flush and stop the log
+            self._failure = e
+            self.log('SUP', "supervisor failed: %s", e, level='error', exc=e)
+            raise
+        finally:
+            if self.on_stop is not None:
+                self.on_stop()
+
+    def _start(self, child):
+        with self._lock:
+            child.started = self.clock()
+            child.due = None
+            child.thread = threading.Thread(target=self._wrap, args=(child,), name=child.name, daemon=True)
+            child.thread.start()
+
+    def _wrap(self, child):
+        reason = "returned"
+        try:
+            child.target()
+        except BaseException as e:
+            reason = f"{type(e).__name__}: {e}"
+        with self._lock:
+            child.last_exit = {'time': time.time(), 'reason': reason}
+        if not self._stop.is_set():
+            self.log('SUP', "%s exited (%s)", child.name, reason, level='error')
+
+    def _check(self):
+        now = self.clock()
+        for child in self._children.values():
+            if child.thread.is_alive():
+                continue
+            if child.due is None:
+                ran = now - child.started
+                child.delay = self.restart_delay if ran >= self.stable_after or not child.delay \
+                    else min(self.max_delay, child.delay * 2)
+                child.due = now + child.delay
+            elif now >= child.due:
+                with self._lock:
+                    child.restarts += 1
+                self.log('SUP', "restarting %s (restart %d)", child.name, child.restarts)
+                self._start(child)
+
+    # ---------- fork mode ----------
+    def run_forked(self, preload=None):
+        """Blocking: preload() once in this process, then keep one forked worker running run()."""
+        if not fork_supported():
+            self.log('SUP', "fork not available, supervising threads in-process", level='warning')
+            if preload is not None:
+                preload()
+            return self.run()
+        if preload is not None:
+            t0 = time.perf_counter()
+            preload()
+            self.log('SUP', "preloaded in %.1fs; workers fork from here", time.perf_counter() - t0)
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        # reload requests (SIGHUP) sent to the parent go to the worker, which owns the live state
+        signal.signal(signal.SIGHUP, self._forward_signal)
+        delay = 0.0
+        while True:
+            self.process_started_at = time.time()
+            started = self.clock()
+            pid = os.fork()
+            if pid == 0:
+                self._worker_main()  # never returns
+            self.worker_pid = pid
+            self.log('SUP', "worker %d started", pid, restarts=self.process_restarts)
+            try:
+                _, status = os.waitpid(pid, 0)
+            except KeyboardInterrupt:
+                self._stop_worker(pid)
+                return
+            self.worker_pid = None
+            self.last_process_exit = {'time': time.time(), 'pid': pid, **self._exit_reason(status)}
+            if self.last_process_exit.get('code') == 0:
+                self.log('SUP', "worker %d stopped", pid)
+                return
+            self.log('SUP', "worker %d died (%s)", pid, self.last_process_exit, level='error')
+            ran = self.clock() - started
+            delay = self.restart_delay if ran >= self.stable_after or not delay \
+                else min(self.max_delay, delay * 2)
+            self.process_restarts += 1
+            try:
+                time.sleep(delay)
+            except KeyboardInterrupt:
+                return
+
+    def _worker_main(self):
+        code = 0
+        try:
+            self.mode = 'fork'
+            self.worker_pid = os.getpid()
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)  # until on_start() installs the real handler
+            self.run()
+        except BaseException as e:
+            code = 1
+            if e is not self._failure:
+                self.log('SUP', "worker failed: %s", e, level='error', exc=e)
+        finally:
+            os._exit(code)
+
+    def _forward_signal(self, signum, frame):
+        if self.worker_pid is not None and self.worker_pid != os.getpid():
+            try:
+                os.kill(self.worker_pid, signum)
+            except OSError:
+                pass
+
+    def _stop_worker(self, pid, timeout=5.0):
+        """Ctrl+C / SIGTERM on the parent: let the worker stop cleanly, then kill it."""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            return
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except (ChildProcessError, KeyboardInterrupt):
+                return
+            if done:
+                return
+            time.sleep(0.05)
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _exit_reason(status):
+        if os.WIFSIGNALED(status):
+            return {'signal': os.WTERMSIG(status)}
+        return {'code': os.WEXITSTATUS(status) if os.WIFEXITED(status) else status}
@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def quiet_log(*args, **kwargs):
+    """log= sink for tests that don't look at the output."""
+
+
+class LogRecords:
+    """log= sink keeping (tag, formatted message, fields) per call in `entries`."""
+
+    def __init__(self):
+        self.entries = []
+
+    def __call__(self, tag, msg, *args, level='info', exc=None, **fields):
+        self.entries.append((tag, msg % args if args else msg, fields))
+
+    def messages(self):
+        return [e[1] for e in self.entries]
+
+
+def api_state(tmp_path, **attrs):
+    """Minimal state source for api_server.create_api_app; `attrs` adds optional subsystems."""
+    return SimpleNamespace(state_lock=threading.Lock(), last_spec_seen={}, last_presence=None,
+                           LAST_SEEN_JSON_PATH=str(tmp_path / 'last_seen.json'),
+                           PRESENCE_JSON_PATH=str(tmp_path / 'presence.json'), **attrs)
+
+
+@contextmanager
+def publishing(stream, interval=0.01):
+    """Stand-in camera loop publishing a small frame to `stream` until the block exits."""
+    done = threading.Event()
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def camera():
+        while not done.wait(interval):
+            stream.publish(frame)
+
+    threading.Thread(target=camera, daemon=True).start()
+    try:
+        yield done
+    finally:
+        done.set()
@@ -0,0 +1,56 @@
+import gzip
+import json
+
+from api_server import GZIP_MIN_BYTES, ResponseCache, create_api_app
+from conftest import api_state
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_are_rebuilt_only_after_the_ttl():
+    clock = Clock()
+    cache = ResponseCache(1.0, clock=clock)
+    builds = []
+
+    def build():
+        builds.append(clock.now)
+        return {'n': len(builds)}
+
+    assert json.loads(cache.get('summary', build, use_gzip=False)[1]) == {'n': 1}
+    clock.now += 0.9
+    assert json.loads(cache.get('summary', build, use_gzip=False)[1]) == {'n': 1}
+    clock.now += 0.1
+    assert json.loads(cache.get('summary', build, use_gzip=False)[1]) == {'n': 2}
+    assert builds == [100.0, 101.0]
+
+
+def test_only_bodies_above_the_threshold_are_gzipped():
+    cache = ResponseCache(1.0, clock=Clock())
+    _, body, gz = cache.get('small', lambda: {'x': 'a' * 10}, use_gzip=True)
+    assert len(body) < GZIP_MIN_BYTES and gz is None
+
+    _, body, gz = cache.get('large', lambda: {'x': 'a' * GZIP_MIN_BYTES}, use_gzip=True)
+    assert gz is not None and gzip.decompress(gz) == body
+    assert cache.get('other', lambda: {'x': 'a' * GZIP_MIN_BYTES}, use_gzip=False)[2] is None
+
+
+def test_app_serves_gzip_only_to_clients_that_accept_it(tmp_path):
+    src = api_state(tmp_path)
+    src.last_spec_seen = {'place': 'Kitchen', 'note': 'a' * GZIP_MIN_BYTES}
+    client = create_api_app(src, cache_ttl=60).test_client()
+
+    resp = client.get('/api/last_seen', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(resp.data))['last_seen']['place'] == 'Kitchen'
+
+    # served from the cache: a sighting recorded within the TTL is not visible yet
+    src.last_spec_seen['place'] = 'Hall'
+    resp = client.get('/api/last_seen')
+    assert 'Content-Encoding' not in resp.headers
+    assert json.loads(resp.data)['last_seen']['place'] == 'Kitchen'
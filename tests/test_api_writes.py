@@ -0,0 +1,41 @@
+import pytest
+
+from api_server import create_api_app
+from conftest import api_state, quiet_log
+from live_config import LiveConfig, unit_float
+
+
+@pytest.fixture
+def src(tmp_path):
+    return api_state(tmp_path, live_config=LiveConfig(str(tmp_path / 'cfg.json'), {'SPEC_THRESHOLD': 0.5},
+                                                      {'SPEC_THRESHOLD': unit_float}, log=quiet_log))
+
+
+def put_config(client, remote='127.0.0.1', **headers):
+    return client.put('/api/config', json={'SPEC_THRESHOLD': 0.6}, headers=headers,
+                      environ_base={'REMOTE_ADDR': remote})
+
+
+def test_without_token_writes_only_from_localhost(src):
+    client = create_api_app(src, cache_ttl=0).test_client()
+    assert put_config(client, remote='192.168.1.20').status_code == 403
+    assert src.live_config.values['SPEC_THRESHOLD'] == 0.5
+    assert put_config(client).status_code == 200
+    assert src.live_config.values['SPEC_THRESHOLD'] == 0.6
+    assert client.get('/api/config', environ_base={'REMOTE_ADDR': '192.168.1.20'}).status_code == 200
+
+
+def test_token_required_from_anywhere(src):
+    client = create_api_app(src, cache_ttl=0, write_token='s3cret').test_client()
+    assert put_config(client).status_code == 401
+    assert put_config(client, remote='192.168.1.20', Authorization='Bearer wrong').status_code == 401
+    assert put_config(client, remote='192.168.1.20', Authorization='Bearer s3cret').status_code == 200
+
+
+def test_cors_preflight_does_not_allow_writes(src):
+    client = create_api_app(src, cache_ttl=0).test_client()
+    resp = client.options('/api/config', headers={'Origin': 'http://evil.example',
+                                                  'Access-Control-Request-Method': 'PUT'})
+    assert 'PUT' not in resp.headers.get('Access-Control-Allow-Methods', '')
+    resp = client.get('/api/config', headers={'Origin': 'http://dashboard.example'})
+    assert resp.headers.get('Access-Control-Allow-Origin') in ('*', 'http://dashboard.example')
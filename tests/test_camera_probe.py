@@ -0,0 +1,69 @@
+import cv2
+
+import camera_probe
+from camera_probe import CameraProbe
+from conftest import quiet_log
+
+
+class FakeCapture:
+    """A driver that only does YUYV at 1280x720 with a 4-frame buffer, whatever is asked."""
+
+    def __init__(self, index, backend):
+        self.props = {}
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC:
+            value = cv2.VideoWriter_fourcc(*'YUYV')
+        elif prop == cv2.CAP_PROP_FRAME_WIDTH:
+            value = 1280
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            value = 720
+        elif prop == cv2.CAP_PROP_BUFFERSIZE:
+            value = 4
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return float(self.props.get(prop, 0))
+
+    def read(self):
+        return True, None
+
+    def release(self):
+        pass
+
+
+def test_probe_caches_what_the_driver_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_probe.cv2, 'VideoCapture', FakeCapture)
+    monkeypatch.setattr(camera_probe, 'list_devices', lambda max_index=2: [(0, 'fake cam')])
+    monkeypatch.setattr(camera_probe, 'list_formats', lambda index: {})
+    probe = CameraProbe(str(tmp_path / 'camera_profile.json'), preferred_size=(640, 480), backends=('ANY',))
+    config = probe.probe()
+    assert (config['fourcc'], config['width'], config['height'], config['buffer_size']) == ('YUYV', 1280, 720, 4)
+
+    assert probe.open() is not None
+    reopened = CameraProbe(probe.cache_path, preferred_size=(640, 480), backends=('ANY',))
+    assert reopened.open() is not None
+    assert reopened.source == 'cache'
+    assert reopened.status()['config']['fourcc'] == 'YUYV'
+
+
+def test_cached_open_reuses_stored_measurements(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_probe.cv2, 'VideoCapture', FakeCapture)
+    monkeypatch.setattr(camera_probe, 'list_devices', lambda max_index=2: [(0, 'fake cam')])
+    monkeypatch.setattr(camera_probe, 'list_formats', lambda index: {})
+    probe = CameraProbe(str(tmp_path / 'camera_profile.json'), backends=('ANY',), log=quiet_log)
+    assert probe.open() is not None
+    assert probe.source == 'probe' and probe.measured['fps']
+
+    def no_timed_reads(*args, **kwargs):
+        raise AssertionError("cached open must not time reads")
+
+    monkeypatch.setattr(camera_probe, 'measure', no_timed_reads)
+    reopened = CameraProbe(probe.cache_path, backends=('ANY',), log=quiet_log)
+    assert reopened.open() is not None
+    assert reopened.source == 'cache'
+    assert reopened.measured == probe.measured
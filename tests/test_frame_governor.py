@@ -0,0 +1,158 @@
+import pytest
+
+from conftest import LogRecords
+from frame_governor import CPU_CUR_FREQ, CPU_MAX_FREQ, DEFAULT_LEVELS, THERMAL_TEMP, FrameGovernor, with_spec_cadence
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    def write(rel, value):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{value}\n")
+
+    def set_state(temp_c=50.0, cur_khz=1500000, max_khz=1500000):
+        write(THERMAL_TEMP, int(temp_c * 1000))
+        write(CPU_CUR_FREQ, cur_khz)
+        write(CPU_MAX_FREQ, max_khz)
+
+    set_state()
+    set_state.root = str(tmp_path)
+    return set_state
+
+
+def make_governor(sysfs, **kw):
+    clock = FakeClock()
+    records = LogRecords()
+    gov = FrameGovernor(sysfs_root=sysfs.root, clock=clock, sensor_interval=0.0, log=records, **kw)
+    return gov, clock, records
+
+
+def replay(gov, clock, inference_s, seconds):
+    """Run the camera loop's pattern for `seconds`: one model call every kitchen_stride frames,
+    `inference_s(imgsz)` seconds each, 0 for the frames in between. Returns the levels visited."""
+    levels = []
+    frame = 0
+    end = clock.t + seconds
+    while clock.t < end:
+        p = gov.profile
+        gov.observe(inference_s(p.imgsz) if frame % p.kitchen_stride == 0 else 0.0)
+        gov.update()
+        if not levels or levels[-1] != gov.level:
+            levels.append(gov.level)
+        clock.t += 1.0 / p.capture_fps
+        frame += 1
+    return levels
+
+
+def area_cost(s640):
+    """Inference seconds proportional to input area, `s640` at 640."""
+    return lambda imgsz: s640 * (imgsz / 640.0) ** 2
+
+
+def test_sensors_read_from_sysfs_tree(sysfs):
+    sysfs(temp_c=61.5, cur_khz=600000, max_khz=1500000)
+    gov, _, _ = make_governor(sysfs)
+    gov.update()
+    assert gov.temp_c == 61.5
+    assert gov.freq_ratio == pytest.approx(0.4)
+
+
+def test_skipped_frames_do_not_dilute_latency(sysfs):
+    gov, _, _ = make_governor(sysfs)
+    for i in range(40):
+        gov.observe(0.1 if i % 4 == 0 else 0.0)
+    assert gov.latency == {'kitchen': pytest.approx(0.1)}
+
+
+def test_steps_down_until_load_fits_and_stays(sysfs):
+    # 0.1 s at 640: 150% of level 0's 66 ms frame period, 60% of level 1's (stride 2 at 12 fps)
+    gov, clock, records = make_governor(sysfs)
+    levels = replay(gov, clock, area_cost(0.1), seconds=120)
+    assert levels == [0, 1]
+    assert gov.load() == pytest.approx(0.6)
+    assert [r[0] for r in records.entries] == ['GOV']
+    assert 'over budget' in records.entries[0][1]
+
+
+def test_no_oscillation_when_only_the_lighter_level_fits(sysfs):
+    # level 2 fits with room to spare, but level 1 would not: it must not bounce back up
+    gov, clock, _ = make_governor(sysfs)
+    levels = replay(gov, clock, area_cost(0.16), seconds=300)
+    assert levels == [0, 1, 2]
+
+
+def test_ramps_up_after_hold_once_heavier_level_fits(sysfs):
+    gov, clock, _ = make_governor(sysfs)
+    replay(gov, clock, area_cost(0.2), seconds=30)
+    assert gov.level >= 2
+    # the load drops (e.g. a scene with fewer objects): climb back one level per hold period
+    t0 = clock.t
+    levels = replay(gov, clock, area_cost(0.02), seconds=60)
+    assert levels[0] >= 2 and levels[-1] == 0
+    assert levels == sorted(levels, reverse=True)
+    assert clock.t - t0 >= gov.ramp_up_hold * len(levels[1:])
+
+
+def test_hot_soc_steps_down_and_cools_back(sysfs):
+    gov, clock, records = make_governor(sysfs, ramp_up_hold=5.0)
+    sysfs(temp_c=80.0)
+    replay(gov, clock, area_cost(0.01), seconds=5)
+    hot_level = gov.level
+    assert hot_level >= 2  # one step per cooldown while hot
+    assert all('hot' in r[1] for r in records.entries)
+
+    sysfs(temp_c=70.0)  # inside the hysteresis band: hold
+    assert replay(gov, clock, area_cost(0.01), seconds=20) == [hot_level]
+
+    sysfs(temp_c=55.0)
+    assert replay(gov, clock, area_cost(0.01), seconds=40)[-1] == 0
+
+
+def test_throttled_clock_blocks_ramp_up(sysfs):
+    gov, clock, _ = make_governor(sysfs)
+    replay(gov, clock, area_cost(0.2), seconds=30)
+    level = gov.level
+    sysfs(cur_khz=600000)
+    assert replay(gov, clock, area_cost(0.02), seconds=60) == [level]
+
+
+def test_budget_follows_frame_period(sysfs):
+    gov, _, _ = make_governor(sysfs)
+    gov.observe(0.05)
+    # 50 ms per inference: 75% of level 0's period (15 fps), 30% of level 1's (12 fps, stride 2)
+    assert gov.load() == pytest.approx(0.75)
+    assert gov.load(DEFAULT_LEVELS[1]) == pytest.approx(0.3)
+    gov.update()
+    assert gov.level == 0
+    gov.frame_budget = 0.7
+    gov.clock.t = 5.0
+    gov.update()
+    assert gov.level == 1
+
+
+def test_load_counts_each_model_at_its_own_cadence(sysfs):
+    gov, _, _ = make_governor(sysfs)
+    # level 0: kitchen (50 ms) every frame, item model (100 ms) every 3rd frame
+    for frame in range(30):
+        gov.observe(0.05, 'kitchen')
+        if frame % 3 == 0:
+            gov.observe(0.1, 'spec')
+    assert gov.latency == {'kitchen': pytest.approx(0.05), 'spec': pytest.approx(0.1)}
+    assert gov.load() == pytest.approx((0.05 / 1 + 0.1 / 3) * 15)
+    # level 1: kitchen every 2nd frame, item model every 4th, at 12 fps
+    assert gov.load(DEFAULT_LEVELS[1]) == pytest.approx((0.05 / 2 + 0.1 / 4) * 12)
+
+
+def test_spec_cadence_stretches_down_the_ladder():
+    levels = with_spec_cadence(DEFAULT_LEVELS, 10)
+    assert [p.spec_every_n for p in levels] == [10, 13, 20, 27, 40]
+    assert [p.kitchen_stride for p in levels] == [p.kitchen_stride for p in DEFAULT_LEVELS]
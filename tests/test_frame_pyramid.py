@@ -0,0 +1,38 @@
+import numpy as np
+
+from frame_pyramid import FramePyramid, to_frame
+
+
+def make_frame(h=480, w=640):
+    return np.random.default_rng(0).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def test_full_size_view_is_the_frame_itself():
+    frame = make_frame()
+    view, scale = FramePyramid().update(frame).view(640)
+    assert view is frame and scale == 1.0
+
+
+def test_reduced_view_is_letterboxed_into_a_reused_buffer():
+    pyramid = FramePyramid()
+    view, scale = pyramid.update(make_frame()).view(320)
+    assert scale == 0.5
+    assert view.shape == (256, 320, 3)  # 240 rows padded up to the stride
+    assert (view[240:] == 114).all()
+
+    again, _ = pyramid.view(320)
+    assert again is view and pyramid.shared == 1
+    nxt, _ = pyramid.update(make_frame()).view(320)
+    assert nxt is view and pyramid.allocations == 1 and pyramid.resizes == 2
+
+
+def test_to_frame_maps_view_boxes_back_and_clips_the_padding():
+    frame = make_frame()
+    _, scale = FramePyramid().update(frame).view(416)
+    # 640x480 -> 416x312 view padded to 416x320; a box in the view maps back by 1 / scale
+    assert scale == 0.65
+    assert to_frame((65, 13, 130, 260), scale) == (100, 20, 200, 400)
+    # a box running into the bottom padding (view rows 312..319) is clipped to the frame
+    assert to_frame((65, 300, 130, 319), scale, frame.shape) == (100, 461, 200, 480)
+    assert to_frame((-5, 0, 420, 10), scale, frame.shape)[::2] == (0, 640)
+    assert to_frame(None, scale) is None
@@ -0,0 +1,54 @@
+import json
+
+from conftest import LogRecords
+from item_registry import ItemRegistry
+
+LEGACY = {'place': 'Kitchen', 'time': 1700000000.0, 'conf': 0.7, 'bbox': [1, 2, 3, 4], 'label': 'Spectacle',
+          'time_iso': '2023-11-14 22:13:20'}
+
+
+def make_registry(tmp_path, records):
+    return ItemRegistry(path=str(tmp_path / 'items.json'), legacy_paths={'spectacles': str(tmp_path / 'legacy.json')},
+                        log=records)
+
+
+def test_legacy_record_migrated_once(tmp_path):
+    (tmp_path / 'legacy.json').write_text(json.dumps(LEGACY))
+    records = LogRecords()
+    reg = make_registry(tmp_path, records)
+    reg.load()
+    assert reg.get('spectacles')['place'] == 'Kitchen'
+    assert reg.get('spectacles')['bbox'] == (1, 2, 3, 4)
+    saved = json.loads((tmp_path / 'items.json').read_text())
+    assert saved['spectacles']['time'] == LEGACY['time']
+    assert any(msg.startswith('migrated') for msg in records.messages())
+
+    # a second start reads the registry and leaves the (now older or equal) legacy record alone
+    records.entries.clear()
+    mtime = (tmp_path / 'items.json').stat().st_mtime_ns
+    make_registry(tmp_path, records).load()
+    assert not any(msg.startswith('migrated') for msg in records.messages())
+    assert (tmp_path / 'items.json').stat().st_mtime_ns == mtime
+
+
+def test_newer_registry_record_wins_and_legacy_never_written(tmp_path):
+    (tmp_path / 'legacy.json').write_text(json.dumps(LEGACY))
+    records = LogRecords()
+    reg = make_registry(tmp_path, records)
+    reg.observe([('glasses', 0.9, (5, 6, 7, 8))], 'Bedroom', ts=LEGACY['time'] + 60)
+    reg.save()
+    reg = make_registry(tmp_path, records)
+    reg.load()
+    assert reg.get('spectacles')['place'] == 'Bedroom'
+    assert json.loads((tmp_path / 'legacy.json').read_text()) == LEGACY
+
+
+def test_query_matches_whole_words_only(tmp_path):
+    reg = make_registry(tmp_path, [])
+    assert reg.match_query("Where are my keys?") == 'keys'
+    assert reg.match_query("where is my key") == 'keys'
+    assert reg.match_query("have you seen my specs") == 'spectacles'
+    assert reg.match_query("where did I leave the medicine") == 'medication'
+    for text in ("type on the keyboard", "the monkey", "something special", "inspect the stove",
+                 "my medical appointment"):
+        assert reg.match_query(text) is None, text
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from conftest import quiet_log
+from live_config import LiveConfig, float_map, positive_float, positive_int, unit_float
+
+
+def make_config(path, **kw):
+    return LiveConfig(str(path), defaults={'BUDGET': 0.8, 'EVERY_N': 10, 'WINDOW': 20.0,
+                                           'WEIGHTS': {'a': 1.0, 'b': 2.0}},
+                      schema={'BUDGET': unit_float, 'EVERY_N': positive_int, 'WINDOW': positive_float,
+                              'WEIGHTS': float_map(('a', 'b'))},
+                      log=quiet_log, **kw)
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf'])
+def test_non_finite_numbers_rejected(tmp_path, value):
+    cfg = make_config(tmp_path / 'cfg.json')
+    for key in ('BUDGET', 'WINDOW'):
+        with pytest.raises(ValueError):
+            cfg.apply({key: float(value)}, persist=False)
+    with pytest.raises(ValueError):
+        cfg.apply({'WEIGHTS': {'a': float(value)}}, persist=False)
+    assert cfg.version == 0 and cfg.values == cfg.defaults
+
+
+def test_persists_only_overrides(tmp_path):
+    path = tmp_path / 'cfg.json'
+    path.write_text(json.dumps({'EVERY_N': 5}))
+    cfg = make_config(path)
+    assert cfg.load()
+    cfg.apply({'WINDOW': 30})
+    assert json.loads(path.read_text()) == {'EVERY_N': 5, 'WINDOW': 30.0}
+
+    # a default changed later (env / constant) still applies to keys never overridden
+    later = LiveConfig(str(path), defaults=dict(cfg.defaults, BUDGET=0.5), schema=cfg.schema,
+                       log=quiet_log)
+    assert later.load()
+    assert later.values['BUDGET'] == 0.5
+    assert later.values['EVERY_N'] == 5
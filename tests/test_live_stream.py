@@ -0,0 +1,67 @@
+import threading
+
+from api_server import create_api_app
+from conftest import LogRecords, api_state, publishing, quiet_log
+from live_stream import MjpegBroadcaster
+
+
+def test_cap_holds_under_concurrent_acquire():
+    stream = MjpegBroadcaster(log=quiet_log)
+    barrier = threading.Barrier(16)
+    results = []
+
+    def viewer():
+        barrier.wait()
+        results.append(stream.acquire(max_clients=3))
+
+    threads = [threading.Thread(target=viewer) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 3
+    assert stream.clients == 3
+
+
+def test_api_releases_slot_when_response_closes(tmp_path):
+    stream = MjpegBroadcaster(fps=50, log=quiet_log)
+    stream.start()
+    client = create_api_app(api_state(tmp_path, live_stream=stream), cache_ttl=0,
+                            stream_max_clients=1).test_client()
+    try:
+        with publishing(stream):
+            first = client.get('/api/stream.mjpg', buffered=False)
+            assert first.status_code == 200
+            assert client.get('/api/stream.mjpg').status_code == 503
+            assert next(first.response).startswith(b"--frame")
+            first.close()
+            assert stream.clients == 0
+
+            # a viewer that disconnects before its first frame must not leak the slot
+            client.get('/api/stream.mjpg', buffered=False).close()
+            assert stream.clients == 0
+    finally:
+        stream.stop()
+
+
+def test_stalled_camera_ends_the_stream_and_frees_the_slot(tmp_path):
+    records = LogRecords()
+    stream = MjpegBroadcaster(fps=50, idle_timeout=0.2, log=records)
+    stream.start()
+    client = create_api_app(api_state(tmp_path, live_stream=stream), cache_ttl=0,
+                            stream_max_clients=1).test_client()
+    try:
+        with publishing(stream) as camera_stopped:
+            resp = client.get('/api/stream.mjpg', buffered=False)
+            assert next(resp.response).startswith(b"--frame")
+            camera_stopped.set()  # the stream ends on its own instead of waiting forever
+            list(resp.response)
+            resp.close()
+        assert stream.clients == 0
+        assert any(m.startswith("no frame for") for m in records.messages())
+
+        assert stream.acquire(max_clients=1)
+        assert not stream.acquire(max_clients=1)
+        assert records.messages()[-1] == "viewer rejected, 1/1 watching"
+    finally:
+        stream.stop()
@@ -0,0 +1,33 @@
+from phrase_translator import PhraseTranslator, SYSTEM_PROMPTS
+
+
+def test_system_prompts_are_prebuilt_both_ways():
+    t = PhraseTranslator()
+    assert t.prompts_ms == SYSTEM_PROMPTS
+    assert t.localize("Turn around to check.", 'ms') == "Sila pusing untuk menyemak."
+    assert t.localize("Turn around to check.", 'en') == "Turn around to check."
+    assert t.translate("Saya sedang mendengar.") == "I'm listening."
+
+
+def test_templates_translate_their_slots():
+    t = PhraseTranslator()
+    out = t.translate("Your wallet was last seen at Kitchen, at 2025-12-27 09:10:00.", 'en')
+    assert out == "Dompet anda kali terakhir dilihat di Dapur, pada 2025-12-27 09:10:00."
+    assert t.translate("30 seconds reached!", 'en') == "30 saat telah tamat!"
+
+
+def test_detect_and_word_fallback():
+    t = PhraseTranslator()
+    assert t.detect("Good morning, how are you?") == 'en'
+    assert t.detect("Saya lapar dan saya mahu nasi.") == 'ms'
+    assert t.translate("Good morning, how are you?") == "Selamat pagi, apa khabar?"
+    # unknown words pass through unchanged
+    assert t.translate("I want xylophone.", 'en') == "Saya mahu xylophone."
+
+
+def test_results_are_memoised():
+    t = PhraseTranslator()
+    t.translate("I am hungry and I want rice.", 'en')
+    hits = t.cache_info().hits
+    t.translate("I am hungry and I want rice.", 'en')
+    assert t.cache_info().hits == hits + 1
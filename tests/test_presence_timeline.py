@@ -0,0 +1,54 @@
+from presence_timeline import PresenceTimeline, day_bounds
+
+
+def _record_day(tl, lo):
+    tl.record("Kitchen", lo + 100)
+    tl.record("Kitchen", lo + 130)
+    tl.record("Room", lo + 200)
+    tl.record("Room", lo + 220)
+    tl.record("Kitchen", lo + 300)  # closes Room, stays open
+
+
+def test_load_twice_keeps_totals(tmp_path):
+    path = str(tmp_path / "timeline.jsonl")
+    lo, _ = day_bounds()
+    tl = PresenceTimeline(path, max_gap=45.0)
+    _record_day(tl, lo)
+    expected = tl.totals()
+    assert expected == {"Kitchen": 30.0, "Room": 20.0}
+
+    reloaded = PresenceTimeline(path, max_gap=45.0)
+    reloaded.load()
+    assert reloaded.totals() == expected
+    reloaded.load()
+    assert reloaded.totals() == expected
+    assert len(reloaded.day()['intervals']) == 3
+
+
+def test_load_replaces_open_interval(tmp_path):
+    path = str(tmp_path / "timeline.jsonl")
+    lo, _ = day_bounds()
+    tl = PresenceTimeline(path, max_gap=45.0)
+    _record_day(tl, lo)
+    tl.load()
+    tl.record("Kitchen", lo + 320)  # continues the reloaded open interval
+    assert tl.totals() == {"Kitchen": 50.0, "Room": 20.0}
+
+
+def test_stale_checkpoint_is_not_revived(tmp_path):
+    # crash after "Room" was appended but before the new open interval was checkpointed
+    path = tmp_path / "timeline.jsonl"
+    lo, _ = day_bounds()
+    tl = PresenceTimeline(str(path), max_gap=45.0)
+    tl.record("Room", lo + 200)
+    tl.record("Room", lo + 220)
+    tl._persist_closed(["Room", lo + 200, lo + 220, 0.0])
+    assert (tmp_path / "timeline.jsonl.open").exists()
+
+    reloaded = PresenceTimeline(str(path), max_gap=45.0)
+    reloaded.load()
+    reloaded.record("Kitchen", lo + 300)
+    reloaded.record("Room", lo + 400)  # closes Kitchen
+    lines = path.read_text().splitlines()
+    assert [line.split(",")[0] for line in lines] == ['["Room"', '["Kitchen"']
+    assert reloaded.totals() == {"Room": 20.0, "Kitchen": 0.0}
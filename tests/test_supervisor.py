@@ -0,0 +1,52 @@
+import os
+import signal
+
+import pytest
+
+from supervisor import Supervisor, fork_supported
+
+pytestmark = pytest.mark.skipif(not fork_supported(), reason="needs os.fork")
+
+
+@pytest.fixture
+def restore_signals():
+    saved = {s: signal.getsignal(s) for s in (signal.SIGTERM, signal.SIGHUP)}
+    yield
+    for s, handler in saved.items():
+        signal.signal(s, handler)
+
+
+def file_log(path):
+    def log(tag, msg, *args, level='info', exc=None, **fields):
+        with open(path, 'a') as f:
+            f.write(f"{os.getpid()} {level} [{tag}] {msg % args if args else msg}"
+                    f"{' exc=' + type(exc).__name__ if exc is not None else ''}\n")
+    return log
+
+
+def test_clean_worker_exit_is_not_restarted(tmp_path, restore_signals):
+    sup = Supervisor(restart_delay=0.01, log=file_log(tmp_path / 'log'))
+    sup.add('quits', lambda: sup.stop())
+    sup.run_forked()
+    log = (tmp_path / 'log').read_text()
+    assert sup.process_restarts == 0
+    assert sup.last_process_exit['code'] == 0
+    assert 'stopped' in log and 'died' not in log
+
+
+def test_worker_crash_is_logged_with_its_exception_and_reforked(tmp_path, restore_signals):
+    marker = tmp_path / 'failed-once'
+
+    def on_start():
+        if not marker.exists():
+            marker.write_text('x')
+            raise RuntimeError("state file unreadable")
+
+    sup = Supervisor(restart_delay=0.01, on_start=on_start, log=file_log(tmp_path / 'log'))
+    sup.add('quits', lambda: sup.stop())
+    sup.run_forked()
+    lines = (tmp_path / 'log').read_text().splitlines()
+    failed = [l for l in lines if 'state file unreadable' in l]
+    assert len(failed) == 1 and failed[0].endswith('exc=RuntimeError')
+    assert sup.process_restarts == 1
+    assert sup.last_process_exit['code'] == 0
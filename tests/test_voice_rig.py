@@ -0,0 +1,48 @@
+from array import array
+
+from voice_rig import (EVENT_BEGIN, EVENT_TERMINATION, EVENT_TURN, FakeKeywordDetector, FakeTTS, PcmRecorder,
+                       PcmStream, ScriptedStreamingClient, summarize, synth_pcm)
+
+
+def test_synth_pcm_is_deterministic():
+    assert synth_pcm(16000) == synth_pcm(16000)
+    assert len(synth_pcm(16000, 0.5, 0.4, 0.3)) == 16000 * 12 // 10
+
+
+def test_keyword_fires_once_on_the_burst():
+    samples = synth_pcm(16000, lead_s=0.5)
+    recorder = PcmRecorder(samples, 512, speed=1000.0)
+    detector = FakeKeywordDetector(frame_length=512)
+    recorder.start()
+    hits = [i for i in range(len(samples) // 512 + 4) if detector.process(recorder.read()) == 0]
+    # first frame reaching into the burst that starts at 0.5 s (sample 8000)
+    assert hits == [8000 // 512]
+
+
+def test_scripted_client_emits_turns_at_their_audio_offsets():
+    script = ((0.2, "where", False), (0.4, "Where am I?", True))
+    client = ScriptedStreamingClient(script, connect_delay=0.0)
+    events = []
+    for name in (EVENT_BEGIN, EVENT_TURN, EVENT_TERMINATION):
+        client.on(name, lambda c, e, name=name: events.append((name, getattr(e, 'transcript', None))))
+    client.connect(None)
+    client.stream(PcmStream(array('h', [0] * 16000), 16000, chunk_ms=50, speed=1000.0))
+    client.disconnect()  # termination is only sent once
+    assert events == [(EVENT_BEGIN, None), (EVENT_TURN, "where"), (EVENT_TURN, "Where am I?"),
+                      (EVENT_TERMINATION, None)]
+    # streaming stops once the script is done, not at the end of the audio
+    assert 0.4 <= client._audio_s < 0.5
+
+
+def test_fake_tts_calls_on_play_after_synthesis():
+    tts = FakeTTS(synth_s=0.0, chars_per_s=1e6)
+    played = []
+    tts("hello", 'en', lambda: played.append(len(tts.spoken)))
+    assert played == [1]
+    assert [(lang, text) for _, lang, text in tts.spoken] == [('en', 'hello')]
+
+
+def test_summarize_reports_percentiles_in_ms():
+    results = [{'total': t / 1000.0, 'wake_to_begin': None} for t in (100, 300, 200, 400)]
+    out = summarize(results)
+    assert out == {'total': {'p50_ms': 300.0, 'p95_ms': 400.0, 'max_ms': 400.0}}
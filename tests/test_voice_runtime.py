@@ -0,0 +1,156 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import LogRecords
+from voice_runtime import VoiceRuntime
+
+
+class IdleWake:
+    """Wake detector that never fires; wait() returns once the runtime stops."""
+
+    def wait(self, stop_event):
+        stop_event.wait()
+        return False
+
+    def close(self):
+        pass
+
+
+class OneShotWake:
+    """Fires once, then behaves like IdleWake."""
+
+    def __init__(self):
+        self.fired = False
+
+    def __call__(self):
+        return self
+
+    def wait(self, stop_event):
+        if not self.fired:
+            self.fired = True
+            return True
+        stop_event.wait()
+        return False
+
+    def close(self):
+        pass
+
+
+class Speaker:
+    def __init__(self):
+        self.spoken = []
+        self.cond = threading.Condition()
+
+    def __call__(self, text, lang, on_play):
+        on_play()
+        with self.cond:
+            self.spoken.append((text, lang))
+            self.cond.notify_all()
+
+    def wait_for(self, n, timeout=5.0):
+        with self.cond:
+            assert self.cond.wait_for(lambda: len(self.spoken) >= n, timeout), self.spoken
+        return self.spoken
+
+
+def no_asr(emit):
+    raise AssertionError("no session expected")
+
+
+def start(runtime):
+    """Run the loop in a thread and wait until it accepts work."""
+    t = threading.Thread(target=runtime.run, daemon=True)
+    t.start()
+    deadline = time.monotonic() + 5.0
+    while runtime._loop is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return t
+
+
+@pytest.fixture
+def running():
+    started = []
+
+    def run(runtime):
+        started.append((runtime, start(runtime)))
+        return runtime
+
+    yield run
+    for runtime, t in started:
+        runtime.stop()
+        t.join(timeout=5.0)
+        assert not t.is_alive()
+
+
+def test_speak_before_run_is_played_once_the_loop_is_up(running):
+    speaker = Speaker()
+    runtime = VoiceRuntime(IdleWake, no_asr, speaker, {}, log=LogRecords())
+    runtime.speak("Good morning.")
+    runtime.speak("")  # ignored
+    running(runtime)
+    assert speaker.wait_for(1) == [("Good morning.", 'en')]
+
+
+def test_timer_speaks_after_its_delay(running):
+    speaker = Speaker()
+    runtime = running(VoiceRuntime(IdleWake, no_asr, speaker, {}, log=LogRecords()))
+    start = time.monotonic()
+    runtime.set_timer(0.1, "30 seconds reached!", 'en')
+    assert speaker.wait_for(1) == [("30 seconds reached!", 'en')]
+    assert time.monotonic() - start >= 0.1
+    assert not runtime._timers
+
+
+def test_stop_cancels_pending_timers():
+    speaker = Speaker()
+    records = LogRecords()
+    runtime = VoiceRuntime(IdleWake, no_asr, speaker, {}, log=records)
+    runtime.set_timer(0.0, "too early")
+    assert records.messages() == ["timer ignored, runtime not running"]
+
+    t = start(runtime)
+    runtime.set_timer(0.3, "never spoken")
+    time.sleep(0.05)
+    runtime.stop()
+    t.join(timeout=5.0)
+    time.sleep(0.4)
+    assert speaker.spoken == []
+    assert not runtime._timers
+    assert "runtime stopped" in records.messages()
+
+
+def test_session_events_run_handlers_on_the_loop_and_measure_latency(running):
+    speaker = Speaker()
+    handled = []
+
+    class Session:
+        def __init__(self, emit):
+            self.emit = emit
+            self.closed = threading.Event()
+
+        def run(self):
+            self.emit('begin', SimpleNamespace(id='s1'))
+            self.emit('turn', SimpleNamespace(transcript="where am i", end_of_turn=False))
+            self.emit('turn', SimpleNamespace(transcript="Where am I?", end_of_turn=True))
+            self.emit('termination', SimpleNamespace())
+
+        def close(self):
+            self.closed.set()
+
+    def on_turn(runtime, event):
+        handled.append((threading.current_thread().name, event.transcript))
+        if event.end_of_turn:
+            runtime.speak("You are in the Kitchen.")
+
+    runtime = running(VoiceRuntime(OneShotWake(), Session, speaker, {'turn': on_turn}, log=LogRecords()))
+    assert speaker.wait_for(1) == [("You are in the Kitchen.", 'en')]
+    deadline = time.monotonic() + 5.0
+    while runtime.last_latency is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert [text for _, text in handled] == ["where am i", "Where am I?"]
+    assert len({name for name, _ in handled}) == 1  # both on the loop thread
+    assert set(runtime.last_latency) == {'wake_to_begin', 'begin_to_turn', 'turn_to_audio', 'total'}
+    assert runtime.last_latency['total'] >= runtime.last_latency['turn_to_audio'] >= 0
@@ -0,0 +1,81 @@
+import pytest
+import requests
+
+from conftest import LogRecords
+from voiceflow_client import SentenceChunker, VoiceflowClient, VoiceflowError
+
+
+def test_chunker_joins_short_sentences_and_waits_for_the_end():
+    chunker = SentenceChunker(min_chars=12)
+    assert chunker.feed("Sure. Your keys are ") == []
+    assert chunker.feed("on the table. They were") == ["Sure. Your keys are on the table."]
+    assert chunker.feed(' seen "at noon." Bye') == ['They were seen "at noon."']
+    assert chunker.flush() == ["Bye"]
+    assert chunker.flush() == []
+
+
+def test_chunker_cuts_long_text_without_a_sentence_end():
+    chunker = SentenceChunker(max_chars=20)
+    # cut at the last space inside max_chars; only a single over-long word is split
+    assert chunker.feed("first part, second part and more") == ["first part, second"]
+    assert chunker.flush() == ["part and more"]
+    assert SentenceChunker(max_chars=10).feed("abcdefghijklmnop") == ["abcdefghij"]
+
+
+class Script:
+    """Stand-in for VoiceflowClient._request: each call plays the next list of chunks / exceptions."""
+
+    def __init__(self, *attempts):
+        self.attempts = list(attempts)
+        self.calls = 0
+
+    def __call__(self, user_id, action, state):
+        steps = self.attempts[self.calls]
+        self.calls += 1
+        for step in steps:
+            if isinstance(step, Exception):
+                raise step
+            yield step
+
+
+def make_client(script, records, retries=2):
+    client = VoiceflowClient('VF.key', retries=retries, backoff=0.0, log=records)
+    client._request = script
+    return client
+
+
+def test_failures_before_the_first_chunk_are_retried():
+    records = LogRecords()
+    script = Script([requests.ConnectionError("reset")], [VoiceflowError("HTTP 503")], ["Hello there."])
+    client = make_client(script, records)
+    assert list(client.interact('u1', "hi")) == ["Hello there."]
+    assert script.calls == 3
+    state = client.sessions()['u1']
+    assert (state['turns'], state['retries'], state['errors']) == (1, 2, 0)
+
+
+def test_no_retry_once_a_chunk_was_yielded():
+    records = LogRecords()
+    script = Script(["Your keys are on the table.", requests.ConnectionError("reset")], ["never played"])
+    client = make_client(script, records)
+    assert list(client.interact('u1', "where are my keys")) == ["Your keys are on the table."]
+    assert script.calls == 1
+    assert records.messages() == ["reply cut short: reset"]
+    assert client.sessions()['u1']['errors'] == 1
+
+
+def test_non_retryable_or_exhausted_errors_raise():
+    bad_request = VoiceflowError("HTTP 400")
+    bad_request.retryable = False
+    script = Script([bad_request])
+    with pytest.raises(VoiceflowError, match="HTTP 400"):
+        list(make_client(script, LogRecords()).interact('u1', "hi"))
+    assert script.calls == 1
+
+    script = Script(*[[requests.Timeout("slow")]] * 3)
+    with pytest.raises(VoiceflowError, match="slow"):
+        list(make_client(script, LogRecords(), retries=2).interact('u1', "hi"))
+    assert script.calls == 3
+
+    with pytest.raises(VoiceflowError, match="API_KEY"):
+        list(VoiceflowClient(None).interact('u1', "hi"))
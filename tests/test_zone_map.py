@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import quiet_log
+from zone_map import ZoneMap, compile_zones
+
+CONFIG = {
+    'frame_size': [640, 480],
+    'cell': 4,
+    'zones': [
+        {'name': 'on the dining table', 'rect': [40, 260, 300, 420]},
+        # triangle: its bounding box overlaps the table, the triangle itself does not
+        {'name': 'next to the sink', 'polygon': [[400, 200], [620, 200], [620, 420]]},
+    ],
+}
+
+
+def make_map(tmp_path, config=CONFIG):
+    zones = ZoneMap(str(tmp_path / 'zones.json'), log=quiet_log)
+    zones.update(config)
+    return zones
+
+
+def test_lookup_uses_the_bbox_footprint(tmp_path):
+    zones = make_map(tmp_path)
+    # bottom centre (170, 400) is on the table even though the box top is above it
+    assert zones.lookup((150, 100, 190, 400)) == 'on the dining table'
+    assert zones.lookup((590, 300, 610, 340)) == 'next to the sink'
+    # inside the triangle's bounding box but below its diagonal
+    assert zones.lookup((420, 380, 440, 400)) is None
+    assert zones.lookup(None) is None
+
+
+def test_lookup_rescales_to_the_calibrated_frame_size(tmp_path):
+    zones = make_map(tmp_path)
+    # a 320x240 frame: (85, 200) is (170, 400) in calibration pixels, on the table
+    assert zones.lookup((75, 50, 95, 200), frame_shape=(240, 320, 3)) == 'on the dining table'
+    # without rescaling the same box would fall outside every zone
+    assert zones.lookup((75, 50, 95, 200)) is None
+
+
+@pytest.mark.parametrize('zone', [
+    {'name': 'table', 'rect': [0, None, 10, 10]},
+    {'name': 'table', 'rect': [0, 0, 10]},
+    {'name': 'table', 'rect': 5},
+    {'name': 'table', 'polygon': [1, 2, 3]},
+    {'name': 'table', 'polygon': [[0, 0], [10, 0], ['a', 10]]},
+    {'name': 'table'},
+])
+def test_malformed_zones_raise_value_error(zone):
+    with pytest.raises(ValueError, match="zone 'table'"):
+        compile_zones({'zones': [zone]})
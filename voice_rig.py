@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Deterministic test rig / regression benchmark for the voice path.
+
+Runs main.py's real wake_word_listener_loop, start_assembly_ai and on_turn
+with no microphone, Picovoice or AssemblyAI credentials. It plugs in
+main.py's voice I/O hooks:
+
+  PcmRecorder            PvRecorder stand-in that replays PCM (a recorded
+                         16-bit mono WAV/raw file, or a synthetic
+                         silence + burst clip) at real-time pace
+  FakeKeywordDetector    Porcupine stand-in that fires on the first frame
+                         whose RMS crosses a threshold
+  ScriptedStreamingClient  StreamingClient stand-in: Begin on connect, then
+                         Turn events at fixed audio offsets, then Termination
+  FakeTTS                speak_blocking stand-in with a fixed synthesis delay
+
+Every wake produces one wake -> session start -> final turn -> first TTS audio
+breakdown (VoiceRuntime.last_latency); the script prints p50/p95/max per
+stage and exits non-zero when the p50 total exceeds --budget-ms.
+
+    python voice_rig.py --runs 5
+    python voice_rig.py --wake-pcm hey_pico.wav --speech-pcm where_am_i.wav --budget-ms 3500
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import wave
+from array import array
+from types import SimpleNamespace
+
+try:
+    from assemblyai.streaming.v3 import StreamingEvents
+    EVENT_BEGIN, EVENT_TURN = StreamingEvents.Begin, StreamingEvents.Turn
+    EVENT_TERMINATION, EVENT_ERROR = StreamingEvents.Termination, StreamingEvents.Error
+except Exception:
+    EVENT_BEGIN, EVENT_TURN, EVENT_TERMINATION, EVENT_ERROR = 'Begin', 'Turn', 'Termination', 'Error'
+
+WAKE_SAMPLE_RATE = 16000
+# (audio seconds into the session, transcript, end_of_turn)
+DEFAULT_SCRIPT = (
+    (0.6, "where", False),
+    (0.9, "where am", False),
+    (1.2, "where am i", False),
+    (1.5, "Where am I?", True),
+)
+STAGES = ('wake_to_begin', 'begin_to_turn', 'turn_to_audio', 'total')
+
+
+# ---------- audio ----------
+def synth_pcm(sample_rate, lead_s=0.5, burst_s=0.4, tail_s=0.3, amplitude=8000, seed=7):
+    """Silence, a noise burst (the 'keyword' / 'utterance'), silence; same samples every call."""
+    rng = random.Random(seed)
+    n_lead, n_burst, n_tail = (int(sample_rate * s) for s in (lead_s, burst_s, tail_s))
+    burst = (int(amplitude * math.sin(i * 0.07) + rng.randint(-amplitude // 4, amplitude // 4)) for i in range(n_burst))
+    return array('h', [0] * n_lead) + array('h', burst) + array('h', [0] * n_tail)
+
+
+def load_pcm(path, sample_rate):
+    """16-bit mono WAV or headerless PCM, nearest-sample resampled to sample_rate."""
+    if path.lower().endswith('.wav'):
+        with wave.open(path, 'rb') as w:
+            if w.getsampwidth() != 2 or w.getnchannels() != 1:
+                raise ValueError(f"{path}: need 16-bit mono PCM")
+            src_rate = w.getframerate()
+            samples = array('h', w.readframes(w.getnframes()))
+    else:
+        src_rate = sample_rate
+        with open(path, 'rb') as f:
+            samples = array('h', f.read())
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    if src_rate != sample_rate:
+        n = int(len(samples) * sample_rate / src_rate)
+        samples = array('h', (samples[int(i * src_rate / sample_rate)] for i in range(n)))
+    return samples
+
+
+class PcmRecorder:
+    """PvRecorder interface over a PCM buffer; read() paces frames like a live mic, then returns silence.
+
+    start() first blocks on `wait_quiet()` (if given) so each replay begins
+    after the previous run's replies have finished playing.
+    """
+
+    def __init__(self, samples, frame_length, sample_rate=WAKE_SAMPLE_RATE, speed=1.0, wait_quiet=None):
+        self.samples = samples
+        self.frame_length = frame_length
+        self.frame_s = frame_length / float(sample_rate) / speed
+        self.wait_quiet = wait_quiet
+        self._pos = 0
+        self._next = None
+
+    def start(self):
+        if self.wait_quiet is not None:
+            self.wait_quiet()
+        self._next = time.perf_counter()
+
+    def read(self):
+        self._next += self.frame_s
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        frame = self.samples[self._pos:self._pos + self.frame_length].tolist()
+        self._pos += self.frame_length
+        return frame + [0] * (self.frame_length - len(frame))
+
+    def stop(self):
+        pass
+
+    def delete(self):
+        pass
+
+
+class PcmStream:
+    """MicrophoneStream interface: iterates PCM byte chunks at real-time pace, then silence until close()."""
+
+    def __init__(self, samples, sample_rate, chunk_ms=50, speed=1.0):
+        self.samples = samples
+        self.chunk = max(1, int(sample_rate * chunk_ms / 1000))
+        self.chunk_s = self.chunk / float(sample_rate) / speed
+        self._closed = False
+
+    def __iter__(self):
+        pos, nxt = 0, time.perf_counter()
+        silence = array('h', [0] * self.chunk).tobytes()
+        while not self._closed:
+            nxt += self.chunk_s
+            delay = nxt - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            part = self.samples[pos:pos + self.chunk]
+            pos += self.chunk
+            yield part.tobytes() + silence[2 * len(part):] if len(part) else silence
+
+    def close(self):
+        self._closed = True
+
+
+# ---------- wake-word / ASR / TTS stand-ins ----------
+class FakeKeywordDetector:
+    """Porcupine interface; process() returns keyword index 0 on the first frame at or above rms_threshold."""
+
+    def __init__(self, rms_threshold=2000, frame_length=512, sample_rate=WAKE_SAMPLE_RATE):
+        self.rms_threshold = rms_threshold
+        self.frame_length = frame_length
+        self.sample_rate = sample_rate
+        self._fired = False
+
+    def process(self, pcm):
+        if self._fired or not pcm:
+            return -1
+        rms = math.sqrt(sum(x * x for x in pcm) / len(pcm))
+        if rms >= self.rms_threshold:
+            self._fired = True
+            return 0
+        return -1
+
+    def delete(self):
+        pass
+
+
+class ScriptedStreamingClient:
+    """StreamingClient interface; Turn events fire once the streamed audio reaches each script offset."""
+
+    def __init__(self, script=DEFAULT_SCRIPT, connect_delay=0.15, terminate=True, speed=1.0):
+        self.script = tuple(script)
+        self.connect_delay = connect_delay / speed
+        self.terminate = terminate
+        self.sample_rate = 16000
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._terminated = False
+        self._audio_s = 0.0
+
+    def on(self, event, handler):
+        self._handlers[event] = handler
+
+    def _emit(self, event, payload):
+        handler = self._handlers.get(event)
+        if handler is not None:
+            handler(self, payload)
+
+    def connect(self, params):
+        self.sample_rate = getattr(params, 'sample_rate', None) or self.sample_rate
+        time.sleep(self.connect_delay)  # websocket + session handshake
+        self._emit(EVENT_BEGIN, SimpleNamespace(id='rig-session', expires_at=int(time.time()) + 3600))
+
+    def stream(self, source):
+        pending = list(self.script)
+        order = 0
+        for chunk in source:
+            if self._closed:
+                break
+            self._audio_s += len(chunk) / (2.0 * self.sample_rate)
+            while pending and pending[0][0] <= self._audio_s:
+                _, text, end_of_turn = pending.pop(0)
+                self._emit(EVENT_TURN, SimpleNamespace(
+                    turn_order=order, transcript=text, end_of_turn=end_of_turn,
+                    end_of_turn_confidence=1.0 if end_of_turn else 0.0, turn_is_formatted=end_of_turn, words=[]))
+                if end_of_turn:
+                    order += 1
+            if not pending and self.terminate:
+                break
+        self._terminate()
+
+    def disconnect(self, terminate=True):
+        self._closed = True
+        if terminate:
+            self._terminate()
+
+    def _terminate(self):
+        with self._lock:
+            if self._terminated:
+                return
+            self._terminated = True
+        self._emit(EVENT_TERMINATION, SimpleNamespace(
+            audio_duration_seconds=round(self._audio_s, 3), session_duration_seconds=round(self._audio_s, 3)))
+
+
+class FakeTTS:
+    """speak_blocking(text, lang, on_play): fixed synthesis delay, then 'plays' for len(text) / chars_per_s."""
+
+    def __init__(self, synth_s=0.25, chars_per_s=15.0, speed=1.0):
+        self.synth_s = synth_s / speed
+        self.chars_per_s = chars_per_s * speed
+        self.spoken = []
+        self._busy = 0
+        self._last_done = 0.0
+
+    def __call__(self, text, lang='en', on_play=None):
+        self._busy += 1  # a single TTS worker calls this, so no lock
+        try:
+            time.sleep(self.synth_s)
+            self.spoken.append((time.perf_counter(), lang, text))
+            if on_play:
+                on_play()
+            time.sleep(len(text) / self.chars_per_s)
+        finally:
+            self._busy -= 1
+            self._last_done = time.perf_counter()
+
+    def wait_quiet(self, settle_s=0.5, timeout=30.0):
+        """Block until nothing has been spoken for settle_s (queued replies get picked up well within that)."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if not self._busy and time.perf_counter() - self._last_done >= settle_s:
+                return
+            time.sleep(0.01)
+
+
+# ---------- rig ----------
+def install(app, script=DEFAULT_SCRIPT, wake_samples=None, speech_samples=None, tts=None,
+            connect_delay=0.15, speed=1.0):
+    """Point main.py's voice hooks at the stand-ins; returns the FakeTTS in use."""
+    wake_samples = wake_samples if wake_samples is not None else synth_pcm(WAKE_SAMPLE_RATE)
+    speech_cache = {}
+
+    def speech_for(rate):
+        if rate not in speech_cache:
+            speech_cache[rate] = speech_samples(rate) if speech_samples else synth_pcm(rate, 0.2, 1.4, 0.4, seed=11)
+        return speech_cache[rate]
+
+    tts = tts or FakeTTS(speed=speed)
+    app.PV_DEVICE_INDEX = 0
+    app.wake_engine_factory = lambda: FakeKeywordDetector()
+    app.wake_recorder_factory = lambda idx, frame_length: PcmRecorder(wake_samples, frame_length, speed=speed,
+                                                                      wait_quiet=tts.wait_quiet)
+    app.asr_client_factory = lambda: ScriptedStreamingClient(script, connect_delay, speed=speed)
+    app.asr_audio_factory = lambda rate: PcmStream(speech_for(rate), rate, speed=speed)
+    app.voice.speak_blocking = tts
+    return tts
+
+
+def collect(app, runs, timeout):
+    """Run app.wake_word_listener_loop until `runs` latency breakdowns are in (or timeout)."""
+    results = []
+    t = threading.Thread(target=app.wake_word_listener_loop, daemon=True)
+    t.start()
+    last = None
+    deadline = time.time() + timeout
+    while len(results) < runs and time.time() < deadline:
+        lat = app.voice.last_latency
+        if lat is not None and lat is not last:
+            results.append(dict(lat))
+            last = lat
+        time.sleep(0.005)
+    app.voice.stop()
+    t.join(timeout=5)
+    return results
+
+
+def summarize(results):
+    out = {}
+    for stage in STAGES:
+        vals = sorted(r[stage] for r in results if r.get(stage) is not None)
+        if vals:
+            out[stage] = {'p50_ms': round(vals[len(vals) // 2] * 1000, 1),
+                          'p95_ms': round(vals[min(len(vals) - 1, int(0.95 * len(vals)))] * 1000, 1),
+                          'max_ms': round(vals[-1] * 1000, 1)}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--wake-pcm', help='16-bit mono WAV/raw PCM containing the wake-word')
+    ap.add_argument('--speech-pcm', help='16-bit mono WAV/raw PCM streamed to the ASR stand-in')
+    ap.add_argument('--script', help='JSON list of [audio_seconds, transcript, end_of_turn]')
+    ap.add_argument('--connect-ms', type=float, default=150.0, help='simulated ASR connect time')
+    ap.add_argument('--tts-ms', type=float, default=250.0, help='simulated TTS synthesis time')
+    ap.add_argument('--speed', type=float, default=1.0, help='run audio / delays faster than real time')
+    ap.add_argument('--budget-ms', type=float, help='fail if the p50 total exceeds this')
+    ap.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = ap.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, 'r') as f:
+            script = tuple((float(t), str(text), bool(eot)) for t, text, eot in json.load(f))
+
+    # Presence file for "where am i"; must be set before main.py reads its env config
+    workdir = tempfile.mkdtemp(prefix='cognia_voice_rig_')
+    presence_path = os.path.join(workdir, 'presence.json')
+    with open(presence_path, 'w') as f:
+        json.dump({'location': 'Kitchen', 'time': time.time()}, f)
+    os.environ['PRESENCE_JSON_PATH'] = presence_path
+    for name, fname in (('LAST_SEEN_JSON_PATH', 'last_spec_seen.json'), ('ITEMS_JSON_PATH', 'last_seen_items.json'),
+                        ('TIMELINE_PATH', 'presence_timeline.jsonl')):
+        os.environ[name] = os.path.join(workdir, fname)
+
+    import main as app  # YOLO models are only loaded by camera_loop()
+
+    wake = load_pcm(args.wake_pcm, WAKE_SAMPLE_RATE) if args.wake_pcm else None
+    speech = (lambda rate: load_pcm(args.speech_pcm, rate)) if args.speech_pcm else None
+    tts = install(app, script, wake, speech, FakeTTS(args.tts_ms / 1000.0, speed=args.speed),
+                  connect_delay=args.connect_ms / 1000.0, speed=args.speed)
+    per_run = 1.0 + (script[-1][0] if script else 0) + 5.0
+    results = collect(app, args.runs, timeout=args.runs * per_run / args.speed + 10)
+    summary = summarize(results)
+
+    if args.json:
+        print(json.dumps({'runs': len(results), 'stages': summary}, indent=2))
+    else:
+        print(f"\nvoice rig: {len(results)}/{args.runs} runs, speed x{args.speed}")
+        print(f"{'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for stage, s in summary.items():
+            print(f"{stage:<16}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['max_ms']:>10}")
+        print("spoken:", sorted({text for _, _, text in tts.spoken}))
+    if len(results) < args.runs:
+        print("[RIG] not every run produced a response")
+        sys.exit(1)
+    if args.budget_ms is not None and summary['total']['p50_ms'] > args.budget_ms:
+        print(f"[RIG] p50 total {summary['total']['p50_ms']} ms over budget {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# voice_runtime.py
+"""
+Single asyncio event loop for the voice side.
+
+One loop owns the wake-word wait, the ASR session, intent dispatch, the TTS
+queue and reminder timers. Blocking SDK work (Porcupine reads, the ASR stream,
+gTTS + playback) runs on a small bounded executor, so the thread count is fixed
+at 1 loop thread + `max_workers`. ASR callbacks arrive on SDK threads and are
+forwarded onto the loop, so handlers and voice state only ever run on one thread.
+
+Pluggable pieces (plain callables, see main.py for the real ones):
+  wake_factory()            -> detector with .wait(stop_event) -> bool and .close()
+  asr_factory(emit)         -> session with .run() (blocking) and .close();
+                               the session calls emit(name, event) for
+                               'begin' / 'turn' / 'termination' / 'error'
+  speak_blocking(text, lang, on_play) -> synthesise + play; call on_play() when audio starts
+  handlers                  -> {'begin': fn(runtime, event), 'turn': ..., ...}; they run on
+                               the loop, so blocking work goes through runtime.submit()
+  log(tag, msg, *args, level=...) -> optional non-blocking logger (event_log.EventLog.log);
+                               defaults to print
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from event_log import print_log
+
+
+class VoiceRuntime:
+    def __init__(self, wake_factory, asr_factory, speak_blocking, handlers,
+                 max_workers=4, session_idle=20.0, wake_retry=2.0, tts_queue_size=16, log=None):
+        self.wake_factory = wake_factory
+        self.asr_factory = asr_factory
+        self.speak_blocking = speak_blocking
+        self.handlers = handlers
+        self.session_idle = float(session_idle)
+        self.wake_retry = float(wake_retry)
+        self.tts_queue_size = int(tts_queue_size)
+        self.log = log or print_log
+        self.max_workers = int(max_workers)
+        self.executor = None
+
+        # Loop-owned state (only touched on the loop thread)
+        self.session_active = False
+        self.last_latency = None
+        self._marks = {}
+        self._timers = set()
+        self._last_activity = 0.0
+
+        self._loop = None
+        self._main_task = None
+        self._tts_queue = None
+        self._stop_event = threading.Event()
+        self._stopped = False
+        self._handoff_lock = threading.Lock()
+        self._early = deque(maxlen=self.tts_queue_size)  # speak() calls made while the loop is not up
+
+    # ---------- thread-safe entry points ----------
+    def run(self):
+        """Blocking: run the voice loop in the calling thread until stop(). Can be called again after
+        the loop died (supervisor.py restarts it); speak() calls in between are kept for the next run."""
+        if self._stopped:
+            return
+        self._stop_event.clear()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="voice")
+        asyncio.run(self._main())
+
+    def stop(self):
+        self._stopped = True
+        self._stop_event.set()
+        loop, task = self._loop, self._main_task
+        if loop is not None and task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+
+    def speak(self, text, lang='en'):
+        if not text:
+            return
+        with self._handoff_lock:
+            if self._loop is None:
+                self._early.append((text, lang))
+                return
+            self._loop.call_soon_threadsafe(self._enqueue_tts, text, lang)
+
+    def submit(self, fn, *args):
+        """Run blocking fn(*args) on the voice executor (e.g. a network call from a handler); errors are logged."""
+        def done(fut):
+            if not fut.cancelled() and fut.exception() is not None:
+                self.log('VOICE', "%s failed: %s", getattr(fn, '__name__', fn), fut.exception(), level='error')
+        try:
+            self.executor.submit(fn, *args).add_done_callback(done)
+        except (AttributeError, RuntimeError):
+            self.log('VOICE', "%s ignored, runtime not running", getattr(fn, '__name__', fn), level='warning')
+
+    def set_timer(self, seconds, text, lang='en'):
+        """Speak `text` after `seconds` without a dedicated thread."""
+        if self._loop is None:
+            self.log('VOICE', "timer ignored, runtime not running", level='warning')
+            return
+        self._loop.call_soon_threadsafe(self._add_timer, float(seconds), text, lang)
+
+    # ---------- loop internals ----------
+    async def _main(self):
+        self._tts_queue = asyncio.Queue(maxsize=self.tts_queue_size)
+        with self._handoff_lock:
+            self._loop = asyncio.get_running_loop()
+            early, self._early = list(self._early), deque(maxlen=self.tts_queue_size)
+        for text, lang in early:
+            self._enqueue_tts(text, lang)
+        self._main_task = asyncio.current_task()
+        tts_task = asyncio.ensure_future(self._tts_worker())
+        try:
+            await self._wake_loop()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._stop_event.set()
+            with self._handoff_lock:
+                self._loop = None
+            tts_task.cancel()
+            for handle in list(self._timers):
+                handle.cancel()
+            self._timers.clear()
+            self.executor.shutdown(wait=False)
+            self.log('VOICE', "runtime stopped")
+
+    def _blocking(self, fn, *args):
+        return self._loop.run_in_executor(self.executor, fn, *args)
+
+    def _enqueue_tts(self, text, lang):
+        try:
+            self._tts_queue.put_nowait((text, lang))
+        except asyncio.QueueFull:
+            self.log('TTS', "queue full, dropping: %s", text, level='warning')
+
+    def _add_timer(self, seconds, text, lang):
+        handle = None
+
+        def fire():
+            self._timers.discard(handle)
+            self._enqueue_tts(text, lang)
+
+        handle = self._loop.call_later(seconds, fire)
+        self._timers.add(handle)
+
+    async def _tts_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            text, lang = await self._tts_queue.get()
+            on_play = lambda: loop.call_soon_threadsafe(self._mark, 'first_audio')
+            try:
+                await self._blocking(self.speak_blocking, text, lang, on_play)
+            except Exception as e:
+                self.log('TTS', "failed: %s", e, level='error')
+
+    async def _wake_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                detector = await self._blocking(self.wake_factory)
+            except Exception as e:
+                self.log('WAKE', "init failed: %s", e, level='error')
+                await asyncio.sleep(self.wake_retry)
+                continue
+            try:
+                self.log('WAKE', "Ready - say the wake-word")
+                hit = await self._blocking(detector.wait, self._stop_event)
+            except Exception as e:
+                self.log('WAKE', "listen error: %s", e, level='error')
+                hit = False
+                await asyncio.sleep(self.wake_retry)
+            finally:
+                # the audio device must be released before the ASR session opens the mic
+                await self._blocking(detector.close)
+            if not hit:
+                continue
+            self.log('WAKE', "detected")
+            self._marks = {'wake': time.perf_counter()}
+            try:
+                await self._run_session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log('WAKE', "assembly ai session failed: %s", e, level='error')
+
+    async def _run_session(self):
+        session = await self._blocking(self.asr_factory, self._emit)
+        self._last_activity = self._loop.time()
+        stream = asyncio.ensure_future(self._blocking(session.run))
+        try:
+            while not stream.done():
+                await asyncio.wait({stream}, timeout=1.0)
+                if not stream.done() and self._loop.time() - self._last_activity > self.session_idle:
+                    self.log('ASR', "idle, closing session")
+                    break
+        finally:
+            await self._blocking(session.close)
+            if not stream.done():
+                await asyncio.wait({stream}, timeout=5.0)
+            if stream.done() and not stream.cancelled() and stream.exception():
+                self.log('ASR', "stream error: %s", stream.exception(), level='error')
+            self.session_active = False
+
+    def _emit(self, name, event):
+        """Called from SDK threads; hops the event onto the loop."""
+        self._loop.call_soon_threadsafe(self._dispatch, name, event)
+
+    def _dispatch(self, name, event):
+        self._last_activity = self._loop.time()
+        if name == 'begin':
+            self.session_active = True
+            self._mark('begin')
+        elif name == 'turn' and getattr(event, 'end_of_turn', False):
+            self._mark('turn')
+        elif name == 'termination':
+            self.session_active = False
+        handler = self.handlers.get(name)
+        if handler is None:
+            return
+        try:
+            handler(self, event)
+        except Exception as e:
+            self.log('VOICE', "%s handler error: %s", name, e, level='error')
+
+    def _mark(self, name):
+        m = self._marks
+        if name == 'first_audio':
+            # Only the first audio after a final turn counts as the response
+            if 'turn' not in m or 'first_audio' in m:
+                return
+        elif name in m:
+            return
+        m[name] = time.perf_counter()
+        if name == 'first_audio':
+            self.last_latency = {
+                'wake_to_begin': m['begin'] - m['wake'] if 'begin' in m and 'wake' in m else None,
+                'begin_to_turn': m['turn'] - m['begin'] if 'begin' in m else None,
+                'turn_to_audio': m['first_audio'] - m['turn'],
+                'total': m['first_audio'] - m['wake'] if 'wake' in m else None,
+            }
+            self.log('VOICE', "latency", **{k: round(v, 3) for k, v in self.last_latency.items() if v is not None})
+            # next turn in the same session is measured from its own final transcript
+            self._marks = {k: v for k, v in m.items() if k in ('wake', 'begin')}
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Voiceflow runtime plus a time-to-first-spoken-word benchmark.
+
+MockVoiceflowServer serves both endpoints voiceflow_client.py uses: the
+classic POST /state/user/<id>/interact (all traces once the reply is fully
+generated) and POST /v2/project/<p>/user/<id>/interact/stream (server-sent
+completion events, one word every 1/--words-per-s). Every new connection
+pays --connect-ms first (TCP + TLS handshake stand-in), replies start after
+--first-token-ms, and --fail-every N answers every Nth request with a 503 to
+exercise retries. Conversation state (turn count) is kept per user id.
+
+The benchmark sends the same turns three ways and reports, per turn, when
+the first sentence is ready and when it would start playing (TTS synthesis
+modelled as --tts-ms + --tts-ms-per-char x length):
+  per-turn        new connection per request, whole reply, spoken in one go
+                  (what a plain requests.post per turn would do)
+  pooled          VoiceflowClient without streaming: kept-alive connection,
+                  reply still waited for in full, then spoken sentence by sentence
+  pooled+stream   VoiceflowClient on the streaming endpoint
+
+    python voiceflow_bench.py --turns 10
+    python voiceflow_bench.py --fail-every 3 --connect-ms 250
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from voiceflow_client import VoiceflowClient
+
+REPLIES = (
+    "You have two reminders left today. Take your blood pressure tablet at six in the evening, "
+    "with food. After that, your daughter is calling at eight to check in. Would you like me to "
+    "repeat either of them?",
+    "Your spectacles were last seen on the dining table about ten minutes ago. If they are not "
+    "there, try the kitchen counter, which is the other place they usually turn up.",
+    "It is a quarter past three in the afternoon. The weather is warm and dry, so it is a good "
+    "time for a short walk outside if you feel like it.",
+)
+
+
+class MockVoiceflowServer:
+    def __init__(self, port=0, connect_ms=150.0, first_token_ms=400.0, words_per_s=25.0, fail_every=0):
+        self.connect_s = connect_ms / 1000.0
+        self.first_token_s = first_token_ms / 1000.0
+        self.word_s = 1.0 / words_per_s if words_per_s > 0 else 0.0
+        self.fail_every = int(fail_every)
+        self.users = {}        # user id -> turns
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='voiceflow-mock', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _next_reply(self, user_id, action):
+        with self._lock:
+            self.requests += 1
+            fail = self.fail_every and self.requests % self.fail_every == 0
+            if fail:
+                return None
+            if action.get('type') == 'launch':
+                self.users[user_id] = 0
+                return "Hello, how can I help?"
+            turn = self.users.get(user_id, 0)
+            self.users[user_id] = turn + 1
+            return REPLIES[turn % len(REPLIES)]
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with mock._lock:
+                    mock.connections += 1
+                time.sleep(mock.connect_s)  # handshake cost, once per connection
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                try:
+                    action = json.loads(body or b'{}').get('action') or {}
+                except ValueError:
+                    action = {}
+                m = re.match(r'^/v2/project/[^/]+/user/([^/]+)/interact/stream', self.path) or \
+                    re.match(r'^/state/user/([^/]+)/interact', self.path)
+                if m is None:
+                    return self._send(404, b'{"error": "not found"}')
+                reply = mock._next_reply(m.group(1), action)
+                if reply is None:
+                    return self._send(503, b'{"error": "injected failure"}')
+                if '/interact/stream' in self.path:
+                    return self._stream(reply)
+                words = reply.split()
+                time.sleep(mock.first_token_s + mock.word_s * len(words))  # whole reply generated first
+                self._send(200, json.dumps([{'type': 'text', 'payload': {'message': reply}},
+                                            {'type': 'end'}]).encode())
+
+            def _send(self, status, data):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _event(self, trace):
+                data = f"event: trace\ndata: {json.dumps(trace)}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def _stream(self, reply):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                time.sleep(mock.first_token_s)
+                self._event({'type': 'completion', 'payload': {'state': 'start'}})
+                for i, word in enumerate(reply.split()):
+                    if i:
+                        time.sleep(mock.word_s)
+                    self._event({'type': 'completion', 'payload': {'state': 'content',
+                                                                   'content': (" " if i else "") + word}})
+                self._event({'type': 'completion', 'payload': {'state': 'end'}})
+                self._event({'type': 'end'})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def per_turn_request(url, user_id, text):
+    """Baseline: fresh connection and the whole reply, like a bare requests.post per turn."""
+    resp = requests.post(f"{url}/state/user/{user_id}/interact", headers={'Authorization': 'mock'},
+                         json={'action': {'type': 'text', 'payload': text}}, timeout=(3.05, 15.0))
+    resp.raise_for_status()
+    message = " ".join(t['payload']['message'] for t in resp.json() if t.get('type') in ('text', 'speak'))
+    yield message  # spoken as one TTS call
+
+
+def run_turns(chunks_for, turns, tts_ms, tts_ms_per_char):
+    """[(first sentence ms, first audio ms, whole reply ms)] per turn."""
+    rows = []
+    for i in range(turns):
+        t0 = time.perf_counter()
+        first = first_audio = None
+        for chunk in chunks_for(f"question {i}"):
+            if first is None:
+                first = (time.perf_counter() - t0) * 1000.0
+                first_audio = first + tts_ms + tts_ms_per_char * len(chunk)
+        rows.append((first, first_audio, (time.perf_counter() - t0) * 1000.0))
+    return rows
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--turns', type=int, default=10)
+    ap.add_argument('--connect-ms', type=float, default=150.0, help='per new connection (TCP + TLS stand-in)')
+    ap.add_argument('--first-token-ms', type=float, default=400.0)
+    ap.add_argument('--words-per-s', type=float, default=25.0, help='generation speed of the mock backend')
+    ap.add_argument('--tts-ms', type=float, default=250.0, help='TTS synthesis: fixed cost per call')
+    ap.add_argument('--tts-ms-per-char', type=float, default=2.0, help='TTS synthesis: cost per character')
+    ap.add_argument('--fail-every', type=int, default=0, help='mock answers every Nth request with 503')
+    ap.add_argument('--json', action='store_true', help='print results as JSON')
+    args = ap.parse_args()
+
+    server = MockVoiceflowServer(connect_ms=args.connect_ms, first_token_ms=args.first_token_ms,
+                                 words_per_s=args.words_per_s, fail_every=args.fail_every).start()
+    quiet = lambda *a, **k: None
+    pooled = VoiceflowClient('mock', base_url=server.url, stream=False, backoff=0.05, log=quiet)
+    streaming = VoiceflowClient('mock', project_id='mock', base_url=server.url, backoff=0.05, log=quiet)
+    modes = (
+        ('per-turn', lambda text: per_turn_request(server.url, 'bench-a', text)),
+        ('pooled', lambda text: pooled.interact('bench-b', text)),
+        ('pooled+stream', lambda text: streaming.interact('bench-c', text)),
+    )
+    results = {}
+    try:
+        for name, chunks_for in modes:
+            connections = server.connections
+            try:
+                rows = run_turns(chunks_for, args.turns, args.tts_ms, args.tts_ms_per_char)
+            except Exception as e:  # the baseline has no retries
+                results[name] = {'error': str(e)}
+                continue
+            results[name] = {
+                'first_sentence_p50_ms': percentile([r[0] for r in rows], 50),
+                'first_audio_p50_ms': percentile([r[1] for r in rows], 50),
+                'first_audio_p95_ms': percentile([r[1] for r in rows], 95),
+                'reply_done_p50_ms': percentile([r[2] for r in rows], 50),
+                'connections': server.connections - connections,
+            }
+    finally:
+        server.stop()
+    for client, name in ((pooled, 'pooled'), (streaming, 'pooled+stream')):
+        if name in results and 'error' not in results[name]:
+            results[name]['retries'] = sum(s['retries'] for s in client.sessions().values())
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.turns} turns, connect {args.connect_ms:.0f} ms, first token {args.first_token_ms:.0f} ms, "
+          f"{args.words_per_s:.0f} words/s, TTS {args.tts_ms:.0f} ms + {args.tts_ms_per_char:.1f} ms/char"
+          + (f", 503 every {args.fail_every} requests" if args.fail_every else ""))
+    print(f"{'mode':<15} {'1st sentence':>12} {'1st audio p50':>13} {'p95':>8} {'reply done':>11} "
+          f"{'conns':>6} {'retries':>8}")
+    for name, _ in modes:
+        r = results[name]
+        if 'error' in r:
+            print(f"{name:<15} failed: {r['error']}")
+            continue
+        print(f"{name:<15} {r['first_sentence_p50_ms']:>12.0f} {r['first_audio_p50_ms']:>13.0f} "
+              f"{r['first_audio_p95_ms']:>8.0f} {r['reply_done_p50_ms']:>11.0f} {r['connections']:>6} "
+              f"{r.get('retries', '-'):>8}")
+
+
+if __name__ == '__main__':
+    main()
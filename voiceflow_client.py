@@ -0,0 +1,232 @@
+# voiceflow_client.py
+"""
+Pooled, streaming client for the Voiceflow dialog backend (voiceflow mode).
+
+One requests.Session holds a small keep-alive pool, so after the first turn
+(or warm-up via reset()) a turn costs no TCP/TLS handshake. With a project id
+the client uses the streaming endpoint (server-sent events, LLM completions
+as they are generated); otherwise it falls back to the classic interact call
+and gets all traces at once. Either way the text is cut into sentence-sized
+chunks by SentenceChunker and yielded as soon as each one is complete, so TTS
+can start on the first sentence while the rest is still arriving.
+
+Failures before anything was yielded (connect errors, timeouts, 429 / 5xx)
+are retried with exponential backoff; once a sentence has been spoken a
+retry would repeat it, so a mid-stream failure ends the reply instead.
+Per-user state (turn count, last activity, whether the flow ended) is kept
+client side; the conversation itself lives on the Voiceflow runtime, keyed by
+user id, and turns of one user are serialised.
+
+voiceflow_bench.py has a local mock server and a time-to-first-word benchmark.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from event_log import print_log
+
+DEFAULT_URL = "https://general-runtime.voiceflow.com"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# sentence end: . ! ? (optionally followed by closing quotes / brackets) and whitespace
+_SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+
+class VoiceflowError(Exception):
+    pass
+
+
+class SentenceChunker:
+    """Streamed text in, sentence-sized chunks out.
+
+    Sentences shorter than `min_chars` are held and joined with the next one
+    (one TTS call for "Sure. " is mostly overhead); text past `max_chars`
+    without a sentence end is cut at the last comma or space.
+    """
+
+    def __init__(self, min_chars=12, max_chars=200):
+        self.min_chars = int(min_chars)
+        self.max_chars = int(max_chars)
+        self._buf = ""
+
+    def feed(self, text):
+        self._buf += text
+        out = []
+        start = 0
+        for m in _SENTENCE_END.finditer(self._buf):
+            if m.end() - start >= self.min_chars:
+                out.append(self._buf[start:m.end()].strip())
+                start = m.end()
+        self._buf = self._buf[start:]
+        while len(self._buf) > self.max_chars:
+            cut = max(self._buf.rfind(", ", 0, self.max_chars), self._buf.rfind(" ", 0, self.max_chars))
+            cut = cut + 1 if cut > 0 else self.max_chars
+            out.append(self._buf[:cut].strip())
+            self._buf = self._buf[cut:]
+        return [c for c in out if c]
+
+    def flush(self):
+        rest, self._buf = self._buf.strip(), ""
+        return [rest] if rest else []
+
+
+class VoiceflowClient:
+    def __init__(self, api_key, project_id=None, base_url=DEFAULT_URL, version='production',
+                 connect_timeout=3.05, read_timeout=15.0, retries=2, backoff=0.3, max_backoff=4.0,
+                 pool_size=2, stream=True, min_chars=12, log=None):
+        self.api_key = api_key
+        self.project_id = project_id
+        self.base_url = base_url.rstrip('/')
+        self.version = version
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.stream = bool(stream and project_id)
+        self.min_chars = int(min_chars)
+        self.log = log or print_log
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(pool_size), max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Authorization': api_key or '', 'versionID': version,
+                                     'Content-Type': 'application/json'})
+
+        self._lock = threading.Lock()
+        self._users = {}  # user_id -> {'lock', 'turns', 'last', 'ended', 'retries', 'errors'}
+
+    # ---------- public ----------
+    def interact(self, user_id, text):
+        """Generator of sentence chunks for the reply to `text`; raises VoiceflowError if nothing arrived."""
+        return self._interact(user_id, {'type': 'text', 'payload': text})
+
+    def reset(self, user_id):
+        """Start the flow over (launch) and return the greeting; also opens a pooled connection."""
+        state = self._state(user_id)
+        with state['lock']:
+            state['ended'] = False
+        return " ".join(self._interact(user_id, {'type': 'launch'}))
+
+    def reply(self, user_id, text):
+        """Whole reply as one string (non-speech callers)."""
+        return " ".join(self.interact(user_id, text))
+
+    def sessions(self):
+        with self._lock:
+            return {uid: {k: v for k, v in st.items() if k != 'lock'} for uid, st in self._users.items()}
+
+    def close(self):
+        self.session.close()
+
+    # ---------- internals ----------
+    def _state(self, user_id):
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                state = self._users[user_id] = {'lock': threading.Lock(), 'turns': 0, 'last': None,
+                                                'ended': False, 'retries': 0, 'errors': 0}
+            return state
+
+    def _interact(self, user_id, action):
+        if not self.api_key:
+            raise VoiceflowError("VOICEFLOW_API_KEY not set")
+        state = self._state(user_id)
+        with state['lock']:  # one turn at a time per user: the runtime state is sequential
+            yielded = False
+            attempt = 0
+            while True:
+                try:
+                    for chunk in self._request(user_id, action, state):
+                        yielded = True
+                        yield chunk
+                    break
+                except (requests.RequestException, VoiceflowError) as e:
+                    retryable = not yielded and attempt < self.retries and getattr(e, 'retryable', True)
+                    if not retryable:
+                        state['errors'] += 1
+                        if yielded:
+                            self.log('VOICEFLOW', "reply cut short: %s", e, level='warning')
+                            break
+                        raise VoiceflowError(str(e)) from e
+                    delay = getattr(e, 'retry_after', None)
+                    if delay is None:
+                        delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+                    delay = min(delay, self.max_backoff)
+                    attempt += 1
+                    state['retries'] += 1
+                    self.log('VOICEFLOW', "attempt %d failed (%s), retrying in %.2fs", attempt, e, delay,
+                             level='warning')
+                    time.sleep(delay)
+            state['turns'] += 1
+            state['last'] = time.time()
+
+    def _request(self, user_id, action, state):
+        if self.stream:
+            url = f"{self.base_url}/v2/project/{self.project_id}/user/{user_id}/interact/stream"
+            resp = self.session.post(url, params={'completion_events': 'true', 'environment': self.version},
+                                     json={'action': action}, headers={'Accept': 'text/event-stream'},
+                                     timeout=self.timeout, stream=True)
+        else:
+            url = f"{self.base_url}/state/user/{user_id}/interact"
+            resp = self.session.post(url, json={'action': action}, timeout=self.timeout)
+        with resp:
+            if resp.status_code != 200:
+                resp.content  # drain the (small) error body so the connection goes back to the pool
+                err = VoiceflowError(f"HTTP {resp.status_code}")
+                err.retryable = resp.status_code in RETRY_STATUS
+                retry_after = resp.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    err.retry_after = float(retry_after)
+                raise err
+            traces = self._sse_traces(resp) if self.stream else iter(resp.json())
+            chunker = SentenceChunker(min_chars=self.min_chars)
+            for trace in traces:
+                for chunk in self._trace_text(trace, chunker, state):
+                    yield chunk
+            for chunk in chunker.flush():
+                yield chunk
+
+    @staticmethod
+    def _sse_traces(resp):
+        """Parse a text/event-stream body into trace dicts as the lines arrive."""
+        data = []
+        for line in resp.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if line == "":
+                if data:
+                    try:
+                        yield json.loads("\n".join(data))
+                    except ValueError:
+                        pass
+                    data = []
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+        if data:
+            try:
+                yield json.loads("\n".join(data))
+            except ValueError:
+                pass
+
+    @staticmethod
+    def _trace_text(trace, chunker, state):
+        kind = trace.get('type')
+        payload = trace.get('payload') or {}
+        if kind in ('text', 'speak'):
+            # a whole message: speak it as its own chunk(s)
+            return chunker.feed(str(payload.get('message', '')) + " ") + chunker.flush()
+        if kind == 'completion':
+            if payload.get('state') == 'content':
+                return chunker.feed(str(payload.get('content', '')))
+            if payload.get('state') == 'end':
+                return chunker.flush()
+        if kind == 'end':
+            state['ended'] = True
+        return []
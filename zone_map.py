@@ -0,0 +1,145 @@
+# zone_map.py
+"""
+Precomputed zone map for fine-grained "where" answers.
+
+Named zones ("on the dining table", "next to the sink") are calibrated per
+camera as rectangles or polygons in frame pixels and compiled once into a
+small label grid (one uint8 per CELL x CELL block). Mapping a detection to a
+zone is then a single array lookup at the bbox footprint (bottom-centre, where
+the object rests on a surface). Edits recompile off to the side and swap the
+compiled grid in one assignment, so the camera loop never sees a half-built map.
+
+zones.json:
+{
+  "frame_size": [640, 480],
+  "cell": 4,
+  "zones": [
+    {"name": "on the dining table", "rect": [40, 260, 300, 420]},
+    {"name": "next to the sink", "polygon": [[400, 200], [620, 200], [620, 360], [400, 360]]}
+  ]
+}
+Later zones are painted over earlier ones where they overlap.
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+
+from event_log import print_log
+
+ZONE_NONE = 0
+MAX_ZONES = 255
+
+
+def compile_zones(config):
+    """Validate a zone config and return (grid, names, frame_size, cell). Raises ValueError."""
+    if not isinstance(config, dict):
+        raise ValueError("zone config must be an object")
+    try:
+        fw, fh = (int(v) for v in config.get('frame_size', (640, 480)))
+        cell = int(config.get('cell', 4))
+    except Exception:
+        raise ValueError("frame_size must be [width, height] and cell an integer")
+    if fw <= 0 or fh <= 0 or cell <= 0:
+        raise ValueError("frame_size and cell must be positive")
+    zones = config.get('zones', [])
+    if not isinstance(zones, list) or len(zones) > MAX_ZONES:
+        raise ValueError(f"zones must be a list of at most {MAX_ZONES} entries")
+
+    gw, gh = (fw + cell - 1) // cell, (fh + cell - 1) // cell
+    grid = np.zeros((gh, gw), dtype=np.uint8)
+    names = [None]
+    for z in zones:
+        name = str(z.get('name', '')).strip() if isinstance(z, dict) else ''
+        if not name:
+            raise ValueError("every zone needs a name")
+        try:
+            if 'rect' in z:
+                x1, y1, x2, y2 = (float(v) for v in z['rect'])
+                pts = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+            elif 'polygon' in z and len(z['polygon']) >= 3:
+                pts = [[float(x), float(y)] for x, y in z['polygon']]
+            else:
+                pts = None
+        except (TypeError, ValueError):
+            raise ValueError(f"zone '{name}': rect must be [x1, y1, x2, y2] and polygon a list of [x, y] numbers")
+        if pts is None:
+            raise ValueError(f"zone '{name}' needs a rect or a polygon of 3+ points")
+        poly = np.round(np.array(pts, dtype=np.float32) / cell).astype(np.int32)
+        cv2.fillPoly(grid, [poly], len(names))
+        names.append(name)
+    return grid, tuple(names), (fw, fh), cell
+
+
+class ZoneMap:
+    def __init__(self, path='zones.json', log=None):
+        self.path = path
+        self.log = log or print_log
+        self._mtime = None
+        self.version = 0
+        self.config = {'frame_size': [640, 480], 'cell': 4, 'zones': []}
+        # Compiled snapshot, replaced as a whole: (grid, names, frame_size, cell)
+        self._compiled = compile_zones(self.config)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r') as f:
+                config = json.load(f)
+            self._swap(config)
+            self._mtime = mtime
+            self.log('ZONES', "loaded %d zones (v%d)", len(self._compiled[1]) - 1, self.version)
+            return True
+        except Exception as e:
+            self.log('ZONES', "load failed: %s", e, level='error')
+            return False
+
+    def reload_if_changed(self):
+        """Cheap mtime check so a long-running loop picks up edits made by another process."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.load()
+
+    def update(self, config):
+        """Validate, compile, swap in and persist a new config (raises ValueError if invalid)."""
+        self._swap(config)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.config, f, indent=2)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+        self.log('ZONES', "updated %d zones (v%d)", len(self._compiled[1]) - 1, self.version)
+
+    def _swap(self, config):
+        compiled = compile_zones(config)
+        self.config = config
+        self._compiled = compiled
+        self.version += 1
+
+    def lookup(self, bbox, frame_shape=None):
+        """Zone name at the bbox footprint, or None. frame_shape rescales if it differs from calibration."""
+        if not bbox:
+            return None
+        grid, names, (fw, fh), cell = self._compiled
+        if len(names) == 1:
+            return None
+        x1, y1, x2, y2 = bbox
+        x, y = (x1 + x2) * 0.5, float(y2)
+        if frame_shape is not None:
+            x *= fw / float(frame_shape[1])
+            y *= fh / float(frame_shape[0])
+        gx = min(max(int(x) // cell, 0), grid.shape[1] - 1)
+        gy = min(max(int(y) // cell, 0), grid.shape[0] - 1)
+        idx = grid[gy, gx]
+        return names[idx] if idx != ZONE_NONE else None
+
+    def snapshot(self):
+        return {'version': self.version, 'config': self.config}